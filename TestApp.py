@@ -1,13 +1,37 @@
-import openpyxl
 import sys
 import os
-import re
-from PyQt5.QtCore import QTimer, Qt, QPoint
+import time
+
+APP_START = time.perf_counter()  # time to first paint is measured from here
+
+from PyQt5.QtCore import (
+    QAbstractListModel, QAbstractTableModel, QFileSystemWatcher, QModelIndex, QThread, QTimer, Qt, QPoint, pyqtSignal
+)
 from PyQt5.QtWidgets import (
-    QApplication, QDialog, QFileDialog, QFrame, QLineEdit, QMessageBox, 
-    QProgressBar, QTableWidget, QTableWidgetItem, QWidget, QVBoxLayout, 
-    QHBoxLayout, QPushButton, QLabel, QSizePolicy, QScrollArea
+    QApplication, QCompleter, QDialog, QFileDialog, QFrame, QLineEdit, QMessageBox, 
+    QProgressBar, QTableView, QHeaderView, QWidget, QVBoxLayout, 
+    QHBoxLayout, QPushButton, QLabel, QSizePolicy, QScrollArea, QSpinBox, QCheckBox, QStackedWidget
 )
+from log_reader import LOG_SUFFIXES, is_log_file, line_index_for, open_log
+from log_records import TimeRange
+from log_summary import HitSummary, summary_text
+from mapping_table import MappingHistory, find_latest, load_latest
+# scan_engine and log_follow are imported where they are used: they pull in
+# multiprocessing and ctypes, which the first window does not need
+
+# Target time from start to the first painted window (in seconds). Only
+# reported: a slower start is logged and flagged by benchmark.py
+FIRST_PAINT_TARGET = 0.5
+
+# Quiet time after a change in data/ before a newer mapping table is loaded,
+# so a workbook that is still being copied is not read half written
+MAPPING_SETTLE_MS = 1000
+
+# Closest codes listed in HelpWindow when the input matches no code exactly
+CLOSEST_MATCHES = 5
+
+# Attempts to load a newer mapping table that fails to open before giving up on it
+MAPPING_RELOAD_RETRIES = 3
 
 
 class CustomHeader(QFrame):
@@ -30,8 +54,9 @@ class CustomHeader(QFrame):
         self.search_btn = QPushButton("Search File")
         self.help_btn = QPushButton("Help")
         self.about_btn = QPushButton("About")
+        self.results_btn = QPushButton("Results")  # shown once a scan has results
 
-        for btn in [self.search_btn, self.help_btn, self.about_btn]:
+        for btn in [self.search_btn, self.help_btn, self.about_btn, self.results_btn]:
             btn.setFixedSize(100, 30)
             btn.setStyleSheet("""
                 QPushButton {
@@ -47,6 +72,8 @@ class CustomHeader(QFrame):
         layout.addWidget(self.search_btn)
         layout.addWidget(self.help_btn)
         layout.addWidget(self.about_btn)
+        layout.addWidget(self.results_btn)
+        self.results_btn.setVisible(False)
         layout.addStretch()
 
         # Window control buttons
@@ -73,7 +100,7 @@ class CustomHeader(QFrame):
         self.setLayout(layout)
 
         # Connections
-        self.close_btn.clicked.connect(QApplication.quit)
+        self.close_btn.clicked.connect(parent.close)  # closeEvent stops running scans
         self.minimize_btn.clicked.connect(parent.showMinimized)
         self.maximize_btn.clicked.connect(self.toggle_max_restore)
 
@@ -82,14 +109,21 @@ class CustomHeader(QFrame):
         self.search_btn.clicked.connect(lambda: self.handle_active(self.search_btn, parent.open_search_window))
         self.help_btn.clicked.connect(lambda: self.handle_active(self.help_btn, parent.open_help_window))
         self.about_btn.clicked.connect(lambda: self.handle_active(self.about_btn, parent.open_about_window))
+        self.results_btn.clicked.connect(lambda: self.handle_active(self.results_btn, parent.open_results_window))
 
         # Color for active button 
-        if active == "Search":
-            self.set_active_button(self.search_btn)
-        elif active == "Help":
-            self.set_active_button(self.help_btn)
-        elif active == "About":
-            self.set_active_button(self.about_btn)
+        self.set_active(active)
+
+    def set_active(self, active):
+        """Highlight the button of a section ("Search", "Help", "About", "Results"), None for none."""
+        buttons = {"Search": self.search_btn, "Help": self.help_btn, "About": self.about_btn,
+                   "Results": self.results_btn}
+        button = buttons.get(active)
+        if button is not None:
+            self.set_active_button(button)
+        elif self.active_btn:
+            self.active_btn.setStyleSheet(self.button_style())
+            self.active_btn = None
 
 
     def toggle_max_restore(self):
@@ -128,84 +162,213 @@ class CustomHeader(QFrame):
 
 
 class BaseWindow(QWidget):
+    """Base of the pages shown in AppWindow, holds the settings and data shared by all of them."""
+
+    shell = None  # the AppWindow the pages live in
+    header_section = "Search"  # header button highlighted while the page is shown
     shared_df = None
+    shared_mapping = None  # MappingHistory of the loaded tables, rows of the current one are in shared_df
+    scan_workers = os.cpu_count() or 1  # processes used for scanning, shared by all windows
+    persist_line_index = False  # save "<log>.lidx" line indexes next to the scanned logs
+    use_search_index = False  # answer keyword searches from the persistent inverted index
+    time_range_text = ("", "")  # from/to time window as typed in UserChoiceWindow
+    time_range = None  # parsed TimeRange of the window, None scans everything
+    mapping_state = "loading"  # "loading", "ready" or "failed", the table loads in the background
+    mapping_error = ""
     def __init__(self):
         super().__init__()
-        self.old_pos = None
         self.selected_files = []
 
-        if BaseWindow.shared_df is None:
-            try:
-                base_dir = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(sys.argv[0])))
-                mapping_dir = os.path.join(base_dir, "data")
-                latest_version = -1
-                latest_file = None
-
-                for filename in os.listdir(mapping_dir):
-                    if filename.startswith("mapping_table") and filename.endswith(".xlsx"):
-                        match = re.search(r"mapping_table(\d+)\.xlsx", filename)
-                        if match:
-                            version = int(match.group(1))
-                            if version > latest_version:
-                                latest_version = version
-                                latest_file = filename
-
-                if latest_file:
-                    file_path = os.path.join(mapping_dir, latest_file)
-                    workbook = openpyxl.load_workbook(file_path)
-                    sheet = workbook["Sample"]
-
-                    # Получаем заголовки
-                    headers = [cell.value.strip() if isinstance(cell.value, str) else str(cell.value)
-                               for cell in next(sheet.iter_rows(min_row=1, max_row=1))]
-
-                    # Читаем строки с ffill логикой
-                    data = []
-                    previous_cause = None
-                    for row in sheet.iter_rows(min_row=2, values_only=True):
-                        row_dict = dict(zip(headers, row))
-                        
-                        # Приведение типов
-                        code = str(row_dict.get("Err Code")).strip() if row_dict.get("Err Code") is not None else ""
-                        cause = row_dict.get("Cause")
-                        action = str(row_dict.get("Action")).strip() if row_dict.get("Action") is not None else ""
-
-                        # FILL предыдущим Cause если пустой
-                        if cause is None:
-                            cause = previous_cause
-                        else:
-                            previous_cause = cause
-
-                        data.append({
-                            "Err Code": code,
-                            "Cause": cause,
-                            "Action": action
-                        })
-
-
-                    BaseWindow.shared_df = data
-                    print(f"[INFO] Loaded mapping table: {latest_file}")
-                else:
-                    raise FileNotFoundError("No valid mapping_tableXXXX.xlsx file found in /data.")
+    @property
+    def mapping(self):
+        return BaseWindow.shared_mapping
 
-            except Exception as e:
-                print(f"[ERROR] Failed to load mapping table: {e}")
+    @property
+    def df(self):
+        return BaseWindow.shared_df
 
-        self.df = BaseWindow.shared_df
+    def mapping_changed(self):
+        """Called on every page once the mapping table has loaded (or failed to) and after a newer version was swapped in."""
 
-    # Moving for Window
-    def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton:
-            self.old_pos = event.globalPos()
+    def show_user_choice(self, parent_dialog):
+        parent_dialog.accept()
+        QMessageBox.information(self, "User's Choice", "You selected a file!")
 
-    def mouseMoveEvent(self, event):
-        if self.old_pos:
-            delta = QPoint(event.globalPos() - self.old_pos)
-            self.move(self.x() + delta.x(), self.y() + delta.y())
-            self.old_pos = event.globalPos()
+    @staticmethod
+    def button_style(base_color="white", hover_color="#e0e0e0", border="1px solid black", font_size="14px", bold=False):
+        return f"""
+            QPushButton {{
+                background-color: {base_color};
+                border: {border};
+                font-size: {font_size};
+                {"font-weight: bold;" if bold else ""}
+            }}
+            QPushButton:hover {{
+                background-color: {hover_color};
+            }}
+        """
 
-    def mouseReleaseEvent(self, event):
+class AppWindow(QWidget):
+    """The one top-level window: CustomHeader over a stack of pages.
+
+    Pages are built once and kept, navigating only switches the visible page
+    and hands it the selected files. The result page of the last scan stays
+    in the stack, so "Results" brings it back without scanning again.
+    """
+
+    def __init__(self):
+        super().__init__()
+        BaseWindow.shell = self
         self.old_pos = None
+        self.pages = {}  # page class -> its only instance
+        self.result_window = None  # FoundResultWindow of the last scan
+        self.first_paint = None  # seconds from APP_START to the first paint
+        self.mapping_loader = None
+        self.mapping_watcher = None  # watches data/ for newer mapping tables
+        self.mapping_retries = 0
+        base_dir = getattr(sys, '_MEIPASS', os.path.dirname(os.path.abspath(sys.argv[0])))
+        self.mapping_dir = os.path.join(base_dir, "data")
+
+        # Restarted on every change in data/, checks for a newer table once it is quiet
+        self.mapping_timer = QTimer(self)
+        self.mapping_timer.setSingleShot(True)
+        self.mapping_timer.setInterval(MAPPING_SETTLE_MS)
+        self.mapping_timer.timeout.connect(self.check_mapping)
+
+        self.setWindowFlags(Qt.FramelessWindowHint)
+        self.setMinimumSize(800, 600)
+        self.resize(800, 600)
+        self.setStyleSheet("background-color: #dcdcdc;")
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+
+        self.header = CustomHeader(self)
+        layout.addWidget(self.header)
+
+        self.stack = QStackedWidget()
+        layout.addWidget(self.stack)
+        self.setLayout(layout)
+
+        self.show_main()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.first_paint is None:
+            self.first_paint = time.perf_counter() - APP_START
+            target = "" if self.first_paint <= FIRST_PAINT_TARGET else f" (over the {FIRST_PAINT_TARGET * 1000:.0f} ms target)"
+            print(f"[INFO] First paint after {self.first_paint * 1000:.0f} ms{target}")
+            # Everything that is not needed to show the window starts now
+            QTimer.singleShot(0, self.load_mapping)
+
+    def load_mapping(self):
+        """Load the newest mapping table in a background thread and start watching data/ for newer ones."""
+        if self.mapping_loader is not None and self.mapping_loader.isRunning():
+            return
+        self.mapping_loader = MappingLoader(self.mapping_dir)
+        self.mapping_loader.loaded.connect(self.mapping_loaded)
+        self.mapping_loader.failed.connect(self.mapping_failed)
+        self.mapping_loader.start()
+
+        if self.mapping_watcher is None and os.path.isdir(self.mapping_dir):
+            self.mapping_watcher = QFileSystemWatcher([self.mapping_dir], self)
+            self.mapping_watcher.directoryChanged.connect(self.mapping_dir_changed)
+
+    def mapping_dir_changed(self, path):
+        self.mapping_retries = 0
+        self.mapping_timer.start()
+
+    def check_mapping(self):
+        """Load the newest mapping table if data/ has a higher version than the current one."""
+        if self.mapping_loader is not None and self.mapping_loader.isRunning():
+            self.mapping_timer.start()  # check again once this load is done
+            return
+        try:
+            latest = find_latest(self.mapping_dir)
+        except OSError:
+            return
+        current = BaseWindow.shared_mapping.version if BaseWindow.shared_mapping is not None else None
+        if latest is not None and (current is None or latest[0] > current):
+            self.load_mapping()
+
+    def mapping_loaded(self, mapping):
+        # Indexes were built by the loader thread, the swap itself is a reference change
+        history = BaseWindow.shared_mapping
+        if history is None:
+            history = MappingHistory()
+        reloaded = history.current is not None
+        history.add(mapping)
+        BaseWindow.shared_mapping = history
+        BaseWindow.shared_df = history.current.rows
+        BaseWindow.mapping_state = "ready"
+        self.mapping_retries = 0
+        print(f"[INFO] {'Reloaded' if reloaded else 'Loaded'} mapping table: {os.path.basename(mapping.source)}")
+        self.notify_mapping()
+
+    def mapping_failed(self, error):
+        if BaseWindow.shared_mapping is not None:
+            # A newer table that does not open yet (e.g. still being copied), keep the current one
+            print(f"[ERROR] Failed to reload mapping table: {error}")
+            if self.mapping_retries < MAPPING_RELOAD_RETRIES:
+                self.mapping_retries += 1
+                self.mapping_timer.start()
+            return
+        BaseWindow.mapping_state = "failed"
+        BaseWindow.mapping_error = error
+        print(f"[ERROR] Failed to load mapping table: {error}")
+        self.notify_mapping()
+
+    def notify_mapping(self):
+        for page in list(self.pages.values()) + [self.result_window]:
+            if page is not None:
+                page.mapping_changed()
+
+    def page(self, page_class):
+        """The cached page of a class, built on first use."""
+        page = self.pages.get(page_class)
+        if page is None:
+            page = self.pages[page_class] = page_class()
+            self.stack.addWidget(page)
+        return page
+
+    def show_page(self, page):
+        self.stack.setCurrentWidget(page)
+        self.header.set_active(page.header_section)
+        return page
+
+    def is_current(self, page):
+        return self.stack.currentWidget() is page
+
+    def show_main(self):
+        self.show_page(self.page(MainWindow))
+
+    def show_user_choice(self, selected_files):
+        self.show_page(self.page(UserChoiceWindow)).set_files(selected_files)
+
+    def show_manual(self, selected_files):
+        self.show_page(self.page(ManualModeWindow)).set_files(selected_files)
+
+    def show_nothing_found(self, selected_files):
+        self.show_page(self.page(NothingFoundWindow)).set_files(selected_files)
+
+    def start_analysis(self, selected_files, search_text):
+        self.show_page(self.page(AnalyzingWindow)).start(selected_files, search_text)
+
+    def set_result_window(self, result_window):
+        """Make ``result_window`` the result page, the one of the previous scan is dropped."""
+        if self.result_window is not None:
+            self.result_window.close()  # stops its scan and follow workers
+            self.stack.removeWidget(self.result_window)
+            self.result_window.deleteLater()
+        self.result_window = result_window
+        self.stack.addWidget(result_window)
+        self.header.results_btn.setVisible(False)
+
+    def show_results(self):
+        if self.result_window is not None:
+            self.header.results_btn.setVisible(True)
+            self.show_page(self.result_window)
 
     # Header functions for buttons
     def open_search_window(self):
@@ -214,66 +377,82 @@ class BaseWindow(QWidget):
             self,
             "Select one or more log files",
             "",
-            "Log Files (*.log);;All Files (*)"
+            "Log Files ({});;All Files (*)".format(" ".join("*" + suffix for suffix in LOG_SUFFIXES))
         )
+        # The header highlights the pressed button, put it back in case the page stays
+        self.header.set_active(self.stack.currentWidget().header_section)
 
         if files:
-            # Keep only .log files (case-insensitive)
-            valid_files = [f for f in files if f.lower().endswith(".log")]
+            # Keep only (possibly compressed) .log files, case-insensitive
+            valid_files = [f for f in files if is_log_file(f)]
 
             if not valid_files:
-                QMessageBox.warning(self, "Invalid File(s)", "Please select only .log files.")
+                QMessageBox.warning(self, "Invalid File(s)",
+                                    "Please select only .log files ({}).".format(", ".join(LOG_SUFFIXES)))
                 return
 
-            self.selected_files = valid_files
-            self.user_choice_window = UserChoiceWindow(valid_files)
-            self.user_choice_window.show()
-            self.close()
-        else:
-            self.selected_files = []
-
+            self.show_user_choice(valid_files)
 
     def open_help_window(self):
-        self.help_window = HelpWindow()
-        self.help_window.show()
-        self.close()
+        self.show_page(self.page(HelpWindow))
 
     def open_about_window(self):
-        self.about_window = AboutWindow()
-        self.about_window.show()
-        self.close()
+        self.show_page(self.page(AboutWindow))
 
-    def show_user_choice(self, parent_dialog):
-        parent_dialog.accept()
-        QMessageBox.information(self, "User's Choice", "You selected a file!")
+    def open_results_window(self):
+        self.show_results()
+
+    # Moving for Window
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.old_pos = event.globalPos()
+
+    def mouseMoveEvent(self, event):
+        if self.old_pos:
+            delta = QPoint(event.globalPos() - self.old_pos)
+            self.move(self.x() + delta.x(), self.y() + delta.y())
+            self.old_pos = event.globalPos()
+
+    def mouseReleaseEvent(self, event):
+        self.old_pos = None
+
+    def closeEvent(self, event):
+        if self.result_window is not None:
+            self.result_window.close()
+        self.mapping_timer.stop()
+        if self.mapping_loader is not None:
+            self.mapping_loader.wait()
+        super().closeEvent(event)
+
+
+class MappingLoader(QThread):
+    """Loads the newest mapping table from ``mapping_dir`` outside of the GUI thread."""
+
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, mapping_dir):
+        super().__init__()
+        self.mapping_dir = mapping_dir
+
+    def run(self):
+        try:
+            mapping = load_latest(self.mapping_dir)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.loaded.emit(mapping)
 
-    @staticmethod
-    def button_style(base_color="white", hover_color="#e0e0e0", border="1px solid black", font_size="14px", bold=False):
-        return f"""
-            QPushButton {{
-                background-color: {base_color};
-                border: {border};
-                font-size: {font_size};
-                {"font-weight: bold;" if bold else ""}
-            }}
-            QPushButton:hover {{
-                background-color: {hover_color};
-            }}
-        """
 
 class MainWindow(BaseWindow):
+    header_section = None
+
     def __init__(self):
         super().__init__()
-        self.setWindowFlags(Qt.FramelessWindowHint)
-        self.setMinimumSize(800, 600)
-        self.selected_files = []  # selected files (logs)
 
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
 
-        self.header = CustomHeader(self)
-        layout.addWidget(self.header)
-
         # Centered container of instuctions
         center_container = QWidget()
         center_layout = QVBoxLayout(center_container)
@@ -314,23 +493,45 @@ class MainWindow(BaseWindow):
         self.setStyleSheet("background-color: #dcdcdc;")
 
 
+class SuggestionModel(QAbstractListModel):
+    """Codes suggested while typing in HelpWindow, shown with their cause; the code is what gets completed."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.suggestions = []  # [(code, cause)], best match first
+
+    def set_suggestions(self, suggestions):
+        self.beginResetModel()
+        self.suggestions = suggestions
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.suggestions)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        code, cause = self.suggestions[index.row()]
+        if role == Qt.EditRole:
+            return code
+        if role == Qt.DisplayRole:
+            return f"{code}  –  {cause}"
+        return None
+
+
 class HelpWindow(BaseWindow):
+    header_section = "Help"
+
     def __init__(self):
         super().__init__()
-        self.setWindowFlags(Qt.FramelessWindowHint)
-        self.setFixedSize(800, 600)
         self.setStyleSheet("background-color: #dcdcdc;")
 
         # Default condition for window
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
 
-        # Header
-        self.header = CustomHeader(self, active="Help")
-        layout.addWidget(self.header)
-
         # Title for instructions
-        title = QLabel("Input error code and click «Enter» button")
+        title = QLabel("Input error code (or part of it, or words of its cause) and click «Enter» button")
         title.setAlignment(Qt.AlignCenter)
         title.setStyleSheet("font-size: 14px; font-weight: bold;")
         layout.addWidget(title)
@@ -351,6 +552,16 @@ class HelpWindow(BaseWindow):
         self.input_field.setPlaceholderText("Input Error Code")
         self.input_field.setFixedHeight(28)
         self.input_field.setStyleSheet("font-size: 13px; padding: 4px;")
+        self.input_field.textEdited.connect(self.update_suggestions)
+        self.input_field.returnPressed.connect(self.perform_search)
+
+        # As-you-type suggestions, ranked by the mapping table's search index (not filtered again by Qt)
+        self.suggestions = SuggestionModel(self)
+        self.completer = QCompleter(self.suggestions, self)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setWidget(self.input_field)
+        self.completer.popup().setStyleSheet("font-size: 13px; background-color: white;")
+        self.completer.activated[str].connect(self.choose_suggestion)
 
         self.enter_btn = QPushButton("Enter")
         self.enter_btn.setFixedSize(80, 28)
@@ -361,6 +572,12 @@ class HelpWindow(BaseWindow):
         input_row.addWidget(self.enter_btn)
         panel_layout.addLayout(input_row)
 
+        # Shown while the mapping table is still loading (or when it failed)
+        self.mapping_status = QLabel()
+        self.mapping_status.setAlignment(Qt.AlignCenter)
+        self.mapping_status.setStyleSheet("font-size: 13px; border: none;")
+        panel_layout.addWidget(self.mapping_status)
+
         # Results with titles
         result_row = QHBoxLayout()
 
@@ -414,60 +631,96 @@ class HelpWindow(BaseWindow):
         result_row.addLayout(action_box)
         panel_layout.addLayout(result_row)
 
+        # Mapping table version that answered the last search
+        self.version_label = QLabel()
+        self.version_label.setAlignment(Qt.AlignCenter)
+        self.version_label.setStyleSheet("font-size: 12px; border: none;")
+        panel_layout.addWidget(self.version_label)
+
         layout.addWidget(panel, alignment=Qt.AlignCenter)
         self.setLayout(layout)
+        self.mapping_changed()
+
+    def mapping_changed(self):
+        state = BaseWindow.mapping_state
+        self.input_field.setEnabled(state == "ready")
+        self.enter_btn.setEnabled(state == "ready")
+        if state == "loading":
+            self.mapping_status.setText("Loading mapping table...")
+        elif state == "failed":
+            self.mapping_status.setText(f"Mapping table not loaded: {BaseWindow.mapping_error}")
+        self.mapping_status.setVisible(state != "ready")
+        if state == "ready":
+            self.version_label.setText(f"Mapping table v{self.mapping.version}")
+
+    def update_suggestions(self, text):
+        """Suggest codes for what has been typed so far."""
+        codes = self.mapping.search(text) if self.mapping and text.strip() else []
+        self.suggestions.set_suggestions([(code, self.mapping.lookup(code)[0]) for code in codes])
+        if codes:
+            self.completer.complete()
+        else:
+            self.completer.popup().hide()
+
+    def choose_suggestion(self, code):
+        self.input_field.setText(code)
+        self.perform_search()
 
     def perform_search(self):
         code = self.input_field.text().strip()
+        self.completer.popup().hide()
 
         self.cause_result.clear()
         self.action_result.clear()
+        self.version_label.clear()
 
         if not code:
             QMessageBox.warning(self, "Input Error", "Please enter an error code.")
             return
 
-        if not self.df:
+        if not self.mapping:
             QMessageBox.critical(self, "Data Error", "Mapping table not loaded.")
             return
 
-        # Найти первую строку по коду
-        target_row = next((row for row in self.df if row["Err Code"] == code), None)
+        result = self.mapping.lookup(code)
 
-        if not target_row:
-            self.cause_result.setText("No matching error code found.")
+        if result is None:
+            # A code dropped from the current table is still shown, marked as removed
+            result = self.mapping.lookup_removed(code)
+
+        if result is None:
+            closest = self.mapping.search(code, CLOSEST_MATCHES)
+            if closest:
+                lines = "\n".join(f"{match}: {self.mapping.lookup(match)[0]}" for match in closest)
+                self.cause_result.setText(f"No matching error code found. Closest matches:\n{lines}")
+            else:
+                self.cause_result.setText("No matching error code found.")
             self.action_result.setText("No corrective action available.")
             return
 
-        cause_value = target_row["Cause"] or "None"
-
-        # Найти все строки с тем же cause
-        matched_actions = set()
-        for row in self.df:
-            if row["Cause"] == cause_value and row["Action"]:
-                matched_actions.add(row["Action"])
-
-        actions_text = "\n".join(sorted(matched_actions))
+        cause_value, matched_actions, version = result
+        actions_text = "\n".join(matched_actions)
 
         self.cause_result.setText(cause_value)
         self.action_result.setText(actions_text if actions_text else "No corrective action available.")
+        if version == self.mapping.version:
+            self.version_label.setText(f"Mapping table v{version}")
+        else:
+            self.version_label.setText(f"Removed from the current mapping table v{self.mapping.version}, "
+                                       f"last in v{version}")
 
 
 
 class AboutWindow(BaseWindow):
+    header_section = "About"
+
     def __init__(self):
         super().__init__()
-        self.setWindowFlags(Qt.FramelessWindowHint)
-        self.setFixedSize(800, 600)
         self.setStyleSheet("background-color: #dcdcdc;")
 
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
 
-        # Custom header with highlight
-        self.header = CustomHeader(self, active="About")
-        layout.addWidget(self.header)
-
         # Central container
         center_container = QWidget()
         center_layout = QVBoxLayout(center_container)
@@ -521,32 +774,41 @@ class AboutWindow(BaseWindow):
             member_label.setStyleSheet("font-size: 13px; color: #111111; padding-left: 10px;")
             panel_layout.addWidget(member_label)
 
+        # Mapping table version, updated when a newer one is swapped in
+        self.mapping_label = QLabel()
+        self.mapping_label.setAlignment(Qt.AlignCenter)
+        self.mapping_label.setStyleSheet("font-size: 13px; color: #222222; margin-top: 10px;")
+        panel_layout.addWidget(self.mapping_label)
+
         center_layout.addWidget(panel)
         layout.addWidget(center_container, alignment=Qt.AlignCenter)
         self.setLayout(layout)
+        self.mapping_changed()
+
+    def mapping_changed(self):
+        state = BaseWindow.mapping_state
+        if state == "ready":
+            versions = ", ".join(f"v{version}" for version in self.mapping.versions)
+            self.mapping_label.setText(f"Mapping table: v{self.mapping.version} (loaded: {versions})")
+        else:
+            self.mapping_label.setText("Mapping table: loading..." if state == "loading" else "Mapping table: not loaded")
 
 class UserChoiceWindow(BaseWindow):
-    def __init__(self, selected_files):
+    def __init__(self):
         super().__init__()
-        self.selected_files = selected_files
-        self.setWindowFlags(Qt.FramelessWindowHint)
-        self.setFixedSize(800, 600)
         self.setStyleSheet("background-color: #dcdcdc;")
 
         main_layout = QVBoxLayout()
         main_layout.setContentsMargins(0, 0, 0, 0)
         main_layout.setSpacing(20)
 
-        self.header = CustomHeader(self, active="Search")
-        main_layout.addWidget(self.header)
-
         center_container = QWidget()
         center_layout = QVBoxLayout(center_container)
         center_layout.setAlignment(Qt.AlignCenter)
 
         panel = QFrame()
         panel.setStyleSheet("background-color: #bbbbbb; border: 2px solid gray;")
-        panel.setFixedSize(300, 250)
+        panel.setFixedSize(300, 470)
 
         panel_layout = QVBoxLayout(panel)
         panel_layout.setContentsMargins(20, 20, 20, 20)
@@ -563,6 +825,48 @@ class UserChoiceWindow(BaseWindow):
 
             panel_layout.addWidget(btn)
 
+        # Number of processes for scanning
+        workers_row = QHBoxLayout()
+        workers_label = QLabel("Workers")
+        workers_label.setStyleSheet("font-size: 14px; font-weight: bold; border: none;")
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, max(os.cpu_count() or 1, 1))
+        self.workers_spin.setValue(BaseWindow.scan_workers)
+        self.workers_spin.setFixedHeight(30)
+        self.workers_spin.setStyleSheet("background-color: white; font-size: 14px;")
+        self.workers_spin.valueChanged.connect(self.set_scan_workers)
+        workers_row.addWidget(workers_label)
+        workers_row.addWidget(self.workers_spin)
+        panel_layout.addLayout(workers_row)
+
+        self.index_check = QCheckBox("Save line index next to logs")
+        self.index_check.setStyleSheet("font-size: 13px; border: none;")
+        self.index_check.setChecked(BaseWindow.persist_line_index)
+        self.index_check.toggled.connect(self.set_persist_line_index)
+        panel_layout.addWidget(self.index_check)
+
+        self.search_index_check = QCheckBox("Use search index (repeat searches)")
+        self.search_index_check.setStyleSheet("font-size: 13px; border: none;")
+        self.search_index_check.setChecked(BaseWindow.use_search_index)
+        self.search_index_check.toggled.connect(self.set_use_search_index)
+        panel_layout.addWidget(self.search_index_check)
+
+        # Optional time window, only records inside it are scanned
+        self.time_inputs = []
+        for name, text in zip(("From", "To"), BaseWindow.time_range_text):
+            time_row = QHBoxLayout()
+            time_label = QLabel(name)
+            time_label.setFixedWidth(45)
+            time_label.setStyleSheet("font-size: 14px; font-weight: bold; border: none;")
+            time_input = QLineEdit(text)
+            time_input.setPlaceholderText("HH:MM or YYYY.MM.DD HH:MM")
+            time_input.setFixedHeight(30)
+            time_input.setStyleSheet("background-color: white; font-size: 13px;")
+            time_row.addWidget(time_label)
+            time_row.addWidget(time_input)
+            panel_layout.addLayout(time_row)
+            self.time_inputs.append(time_input)
+
         center_layout.addWidget(panel)
         main_layout.addWidget(center_container, alignment=Qt.AlignCenter)
 
@@ -573,38 +877,57 @@ class UserChoiceWindow(BaseWindow):
         self.auto_btn.clicked.connect(self.open_auto)
         self.home_btn.clicked.connect(self.back_to_main)
 
+    def set_files(self, selected_files):
+        self.selected_files = selected_files
+
+    def set_scan_workers(self, value):
+        BaseWindow.scan_workers = value
+
+    def set_persist_line_index(self, checked):
+        BaseWindow.persist_line_index = checked
+
+    def set_use_search_index(self, checked):
+        BaseWindow.use_search_index = checked
+
+    def apply_time_range(self):
+        """Store the time window for the next scan, False (after a warning) when it is invalid."""
+        text = tuple(time_input.text().strip() for time_input in self.time_inputs)
+        try:
+            time_range = TimeRange.parse(*text)
+        except ValueError as e:
+            QMessageBox.warning(self, "Invalid Time Range", str(e))
+            return False
+
+        BaseWindow.time_range_text = text
+        BaseWindow.time_range = time_range
+        return True
+
     def open_manual(self):
-        self.manual_window = ManualModeWindow(self.selected_files)
-        self.manual_window.show()
-        self.close()
+        if not self.apply_time_range():
+            return
+        self.shell.show_manual(self.selected_files)
 
     def open_auto(self):
-        self.analysis_window = AnalyzingWindow(self.selected_files, "ALARM")
-        self.analysis_window.show()
-        self.close()
+        from scan_engine import AUTO_SEARCH_TEXT
+
+        if not self.apply_time_range():
+            return
+        self.shell.start_analysis(self.selected_files, AUTO_SEARCH_TEXT)
 
 
     def back_to_main(self):
-        self.selected_files.clear()
-        self.close()
-        self.main_window = MainWindow()
-        self.main_window.show()
+        self.selected_files = []
+        self.shell.show_main()
 
 class ManualModeWindow(BaseWindow):
-    def __init__(self, selected_files):
+    def __init__(self):
         super().__init__()
-        self.selected_files = selected_files
-        self.setWindowFlags(Qt.FramelessWindowHint)
-        self.setFixedSize(800, 600)
         self.setStyleSheet("background-color: #dcdcdc;")
 
         main_layout = QVBoxLayout()
         main_layout.setContentsMargins(0, 0, 0, 0)
         main_layout.setSpacing(20)
 
-        self.header = CustomHeader(self, active="Search")
-        main_layout.addWidget(self.header)
-
         center_container = QWidget()
         center_layout = QVBoxLayout(center_container)
         center_layout.setAlignment(Qt.AlignCenter)
@@ -619,7 +942,7 @@ class ManualModeWindow(BaseWindow):
 
         # Input
         self.input_field = QLineEdit()
-        self.input_field.setPlaceholderText("Input Search Text") 
+        self.input_field.setPlaceholderText("Input Search Text (or fields: type=EALM; eqpid=...)")
         self.input_field.setStyleSheet("font-size: 16px; padding: 5px;")
         panel_layout.addWidget(self.input_field)
 
@@ -643,6 +966,11 @@ class ManualModeWindow(BaseWindow):
 
         self.setLayout(main_layout)
 
+    def set_files(self, selected_files):
+        # The search text is kept for the next search
+        self.selected_files = selected_files
+        self.input_field.setFocus()
+
     def start_search(self):
         search_text = self.input_field.text().strip()
 
@@ -650,39 +978,140 @@ class ManualModeWindow(BaseWindow):
             QMessageBox.warning(self, "Input Error", "Please enter an error code.")
             return
 
-        self.analysis_window = AnalyzingWindow(self.selected_files, search_text)
-        self.analysis_window.show()
-        self.close()
+        self.shell.start_analysis(self.selected_files, search_text)
 
 
     def go_back(self):
-        self.user_choice_window = UserChoiceWindow(self.selected_files)
-        self.user_choice_window.show()
-        self.close()
+        self.shell.show_user_choice(self.selected_files)
 
     def go_home(self):
-        self.selected_files.clear()
-        self.main_window = MainWindow()
-        self.main_window.show()
-        self.close()
+        self.selected_files = []
+        self.shell.show_main()
+
+def skipped_files_text(errors):
+    """One line per file the scan skipped, from LogScanner.errors."""
+    return "\n".join(f"Skipped {os.path.basename(path)}: {message}" for path, message in errors)
+
+
+class ScanWorker(QThread):
+    """Runs LogScanner outside of the GUI thread.
+
+    Progress and hits are reported at a throttled rate: hits are collected
+    into batches, the first one is sent right away so results show up early.
+    Every batch comes with a copy of the running HitSummary. Unreadable
+    files are skipped by the scanner, any other error ends the scan with
+    ``scan_failed`` instead of ``scan_finished``.
+    """
+
+    progress_changed = pyqtSignal(int)
+    hits_found = pyqtSignal(object)
+    summary_changed = pyqtSignal(object)
+    scan_finished = pyqtSignal(bool)  # True when the scan was stopped
+    scan_failed = pyqtSignal(str)  # error message
+
+    # Minimal delay between two progress updates / hit batches (in seconds)
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, selected_files, search_text, workers=1, persist_index=False, use_index=False,
+                 time_range=None):
+        from scan_engine import LogScanner, ResultStore
+
+        super().__init__()
+        self.selected_files = list(selected_files)
+        self.scanner = LogScanner(search_text, workers=workers, persist_index=persist_index,
+                                  use_index=use_index, time_range=time_range, extract_codes=True,
+                                  summarize=True)
+        self.scanner.report_terms = len(self.scanner.terms) > 1  # show which code matched
+        self.last_report = 0.0
+        self.pending = ResultStore()
+        self.hits_sent = False
+        self.last_hits = 0.0
+
+    def run(self):
+        try:
+            self.scanner.scan(self.selected_files, on_progress=self.report_progress, on_hits=self.report_hits)
+            self.flush_hits()
+        except Exception as e:  # an exception leaving QThread.run aborts the application
+            print(f"[ERROR] Scan failed: {e}")
+            self.scan_failed.emit(str(e) or type(e).__name__)
+            return
+        self.scan_finished.emit(self.scanner.stopped)
+
+    def report_progress(self, bytes_done, total_bytes):
+        now = time.monotonic()
+        if now - self.last_report < self.PROGRESS_INTERVAL or not total_bytes:
+            return
+        self.last_report = now
+        self.progress_changed.emit(int((bytes_done / total_bytes) * 100))
+
+    def report_hits(self, hits):
+        self.pending.extend(hits)
+        if not self.hits_sent or time.monotonic() - self.last_hits >= self.PROGRESS_INTERVAL:
+            self.flush_hits()
+
+    def flush_hits(self):
+        if not len(self.pending):
+            return
+        self.hits_found.emit(self.pending)
+        self.summary_changed.emit(self.scanner.summary.copy())
+        self.pending = type(self.pending)()
+        self.hits_sent = True
+        self.last_hits = time.monotonic()
+
+    def stop(self):
+        self.scanner.stop()
+
+
+class FollowWorker(QThread):
+    """Follows the logs of a finished scan from where it ended and reports the new hits."""
+
+    hits_found = pyqtSignal(object)
+    summary_changed = pyqtSignal(object)  # HitSummary of the followed hits only
+
+    def __init__(self, selected_files, scanner):
+        from log_follow import LogFollower
+
+        super().__init__()
+        self.selected_files = list(selected_files)
+        self.offsets = dict(scanner.scanned_sizes)
+        self.follower = LogFollower(scanner.search_text, scanner.report_terms, on_hits=self.report_hits,
+                                    extract_codes=scanner.extract_codes, summarize=scanner.summary is not None)
+
+    def run(self):
+        for path in self.selected_files:
+            try:
+                self.follower.add(path, self.offsets.get(path))
+            except OSError as e:
+                print(f"[ERROR] Cannot follow {path}: {e}")
+        try:
+            self.follower.run()
+        except Exception as e:  # an exception leaving QThread.run aborts the application
+            print(f"[ERROR] Following stopped: {e}")
+
+    def report_hits(self, hits):
+        self.hits_found.emit(hits)
+        if self.follower.summary is not None:
+            self.summary_changed.emit(self.follower.summary.copy())
+
+    def stop(self):
+        self.follower.stop()
+
 
 class AnalyzingWindow(BaseWindow):
-    def __init__(self, selected_files, search_text):
+    """Shown until the first hits arrive, the scan then continues in FoundResultWindow."""
+
+    def __init__(self):
         super().__init__()
-        self.selected_files = selected_files
-        self.search_text = search_text
+        self.search_text = ""
+        self.worker = None
+        self.result_window = None
 
-        self.setWindowFlags(Qt.FramelessWindowHint)
-        self.setFixedSize(800, 600)
         self.setStyleSheet("background-color: #dcdcdc;")
 
         self.layout = QVBoxLayout()
         self.layout.setContentsMargins(0, 0, 0, 0)
         self.layout.setSpacing(20)
 
-        self.header = CustomHeader(self, active="Search")
-        self.layout.addWidget(self.header)
-
         self.label = QLabel("Analyzing...")
         self.label.setAlignment(Qt.AlignCenter)
         self.label.setStyleSheet("font-size: 24px; font-weight: bold;")
@@ -699,116 +1128,88 @@ class AnalyzingWindow(BaseWindow):
         self.cancel_btn.clicked.connect(self.cancel_analysis)
         self.layout.addWidget(self.cancel_btn, alignment=Qt.AlignCenter)
 
-        self.setLayout(self.layout)
-
-        # Analyze the data
-        self.result_data = []
-        self.total_lines = sum(1 for f in selected_files for _ in open(f, encoding='utf-8', errors='ignore'))
-        self.current_line = 0
+        # Why a scan failed or which files it skipped
+        self.error_label = QLabel()
+        self.error_label.setAlignment(Qt.AlignCenter)
+        self.error_label.setWordWrap(True)
+        self.error_label.setStyleSheet("font-size: 14px; color: #a00000;")
+        self.error_label.setVisible(False)
+        self.layout.addWidget(self.error_label, alignment=Qt.AlignCenter)
 
-        self.file_iter = iter(self.selected_files)
-        self.current_file = None
-        self.lines_iter = iter([])
-        self.line_num = 0
-        self.skip_ahead = 0
+        self.setLayout(self.layout)
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.step_analysis)
-        self.timer.start(1)
+    def start(self, selected_files, search_text):
+        """Start a new scan; its result page replaces the one of the previous scan."""
+        from scan_engine import ResultStore
 
+        self.selected_files = selected_files
+        self.search_text = search_text
+        self.progress.setValue(0)
+        self.label.setText("Analyzing...")
+        self.cancel_btn.setText("Cancel")
+        self.error_label.setVisible(False)
+
+        # Analyze the data in a background thread, the result window is filled
+        # from the start and shown with the first hits
+        self.worker = ScanWorker(self.selected_files, self.search_text, self.scan_workers,
+                                 self.persist_line_index, self.use_search_index, self.time_range)
+        self.result_window = FoundResultWindow(ResultStore(), self.selected_files, worker=self.worker)
+        self.shell.set_result_window(self.result_window)
+        self.worker.progress_changed.connect(self.progress.setValue)
+        self.worker.hits_found.connect(self.open_result)
+        self.worker.scan_finished.connect(self.finish_analysis)
+        self.worker.scan_failed.connect(self.fail_analysis)
+        self.worker.start()
 
+    def open_result(self):
+        if self.sender() is not self.worker or self.result_window.has_been_shown:
+            return  # a previous scan, or the results are already there
+        # The user may have moved on to another page meanwhile, only follow along from here
+        if self.shell.is_current(self):
+            self.shell.show_results()
+        else:
+            self.shell.header.results_btn.setVisible(True)
 
-    def step_analysis(self):
-        """Step-by-step log file analysis with case-insensitive search based on user input."""
+    def finish_analysis(self, stopped):
+        if self.sender() is not self.worker or stopped or self.result_window.has_been_shown:
+            return
 
-        try:
-            # If no file is currently loaded, load the next one
-            if self.current_file is None:
-                file = next(self.file_iter)
-                self.current_file = file
-                with open(file, 'r', encoding='utf-8', errors='ignore') as f:
-                    self.lines = f.readlines()
-                self.lines_iter = iter(self.lines)
-                self.line_num = 0
-
-            # Read the next line from the current file
-            line = next(self.lines_iter)
-            self.line_num += 1
-            self.current_line += 1
-
-            # Normalize case for search
-            line_lower = line.lower()
-            search_input = self.search_text.strip().lower()
-
-            # Split into terms if separated by comma or semicolon
-            if ',' in search_input or ';' in search_input:
-                search_terms = [term.strip() for term in re.split(r'[;,]', search_input)]
-                matched = any(term in line_lower for term in search_terms)
-            else:
-                matched = search_input in line_lower
-
-            if matched:
-                self.result_data.append({
-                    "file": os.path.basename(self.current_file),
-                    "line": self.line_num,
-                    "text": line.strip(),
-                    "path": self.current_file
-                })
-
-            # Update progress bar
-            progress = int((self.current_line / self.total_lines) * 100)
-            self.progress.setValue(progress)
-
-        except StopIteration:
-            self.current_file = None
-            try:
-                next_file = next(self.file_iter)
-                self.current_file = next_file
-                with open(next_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    self.lines = f.readlines()
-                self.lines_iter = iter(self.lines)
-                self.line_num = 0
-                self.step_analysis()
-            except StopIteration:
-                self.timer.stop()
-                self.open_result()
+        self.progress.setValue(100)
+        if self.worker.scanner.errors:
+            # Nothing found in the files that could be read, say which could not
+            self.show_error("Nothing Found", skipped_files_text(self.worker.scanner.errors))
+            return
 
+        # No results found — open the "Nothing Found" window
+        if self.shell.is_current(self):
+            self.shell.show_nothing_found(self.selected_files)
 
-    def open_result(self):
-        if not self.result_data:
-            # No results found — open the "Nothing Found" window
-            self.nothing_window = NothingFoundWindow(self.selected_files)
-            self.nothing_window.show()
-        else:
-            # Results found — open the results window
-            self.result_window = FoundResultWindow(self.result_data, self.selected_files)
-            self.result_window.show()
-        self.close()
+    def fail_analysis(self, message):
+        if self.sender() is not self.worker:
+            return
+        self.show_error("Scan failed", message)
 
+    def show_error(self, title, message):
+        self.label.setText(title)
+        self.error_label.setText(message)
+        self.error_label.setVisible(True)
+        self.cancel_btn.setText("Back")
 
     def cancel_analysis(self):
-        self.timer.stop()
-        self.user_choice_window = UserChoiceWindow(self.selected_files)
-        self.user_choice_window.show()
-        self.close()
+        self.worker.stop()
+        self.worker.wait()
+        self.shell.show_user_choice(self.selected_files)
 
 
 class NothingFoundWindow(BaseWindow):
-    def __init__(self, selected_files):
+    def __init__(self):
         super().__init__()
-        self.selected_files = selected_files
-        self.setWindowFlags(Qt.FramelessWindowHint)
-        self.setFixedSize(800, 600)
         self.setStyleSheet("background-color: #dcdcdc;")
 
         # Main layout for the whole window
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
 
-        # Custom header at the top
-        self.header = CustomHeader(self, active="Search")
-        layout.addWidget(self.header)
-
         # Center container with fixed size
         center_widget = QWidget()
         center_layout = QVBoxLayout(center_widget)
@@ -847,54 +1248,229 @@ class NothingFoundWindow(BaseWindow):
         self.back_btn.clicked.connect(self.back_to_selection)
         self.home_btn.clicked.connect(self.back_to_home)
 
+    def set_files(self, selected_files):
+        self.selected_files = selected_files
+
     def back_to_selection(self):
-        self.user_choice_window = UserChoiceWindow(self.selected_files)
-        self.user_choice_window.show()
-        self.close()
+        self.shell.show_user_choice(self.selected_files)
 
     def back_to_home(self):
-        self.main_window = MainWindow()
-        self.main_window.show()
-        self.close()
+        self.shell.show_main()
+
+
+class ResultTableModel(QAbstractTableModel):
+    """Read-only table over the scan results, cells are only built for the rows Qt asks for.
+
+    With error codes in the results, Cause/Action columns come from the
+    mapping table. Codes are joined once per distinct code, not per row,
+    and again when a newer table version is swapped in.
+    """
+
+    HEADERS = {
+        "file": "File Name",
+        "location": "Location",
+        "text": "Text in a Row",
+        "term": "Matched Term",
+        "code": "Code",
+        "cause": "Cause",
+        "action": "Action",
+    }
+
+    def __init__(self, results, parent=None, show_terms=None, show_codes=None, mapping=None):
+        super().__init__(parent)
+        self.results = results
+        self.mapping = mapping
+        self.columns = ["file", "location", "text"]
+        if results.has_terms if show_terms is None else show_terms:
+            self.columns.append("term")
+        if results.has_codes if show_codes is None else show_codes:
+            self.columns.append("code")
+            if mapping is not None:
+                self.columns += ["cause", "action"]
+        self.headers = [self.HEADERS[column] for column in self.columns]
+
+        self.code_info = {}  # code -> (cause, actions, version) for the known codes
+        self.joined_codes = 0
+        self.join_codes()
+
+    def join_codes(self):
+        """Look up the codes added since the last call."""
+        new_codes = self.results.code_names[self.joined_codes:]
+        if new_codes and self.mapping is not None:
+            self.code_info.update(self.mapping.lookup_many(new_codes))
+        self.joined_codes = len(self.results.code_names)
+
+    def set_mapping(self, mapping):
+        """Add the Cause/Action columns when the mapping table arrives after the model was built,
+        or join the codes again when a newer version of it was swapped in."""
+        if mapping is None or "code" not in self.columns:
+            return
+        if "cause" in self.columns:
+            self.mapping = mapping
+            self.code_info = {}
+            self.joined_codes = 0
+            self.join_codes()
+            if len(self.results):
+                first = self.columns.index("cause")
+                self.dataChanged.emit(self.index(0, first), self.index(len(self.results) - 1, first + 1))
+            return
+        first = len(self.columns)
+        self.beginInsertColumns(QModelIndex(), first, first + 1)
+        self.mapping = mapping
+        self.columns += ["cause", "action"]
+        self.headers = [self.HEADERS[column] for column in self.columns]
+        self.joined_codes = 0
+        self.join_codes()
+        self.endInsertColumns()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.results)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ToolTipRole:
+            return self.version_tip(index)
+        if role != Qt.DisplayRole:
+            return None
+
+        row = index.row()
+        column = self.columns[index.column()]
+        if column == "file":
+            return self.results.file_name(row)
+        if column == "location":
+            return f"Line {self.results.line(row)}"
+        if column == "text":
+            return self.results.text(row)
+        if column == "term":
+            return self.results.term(row)
+
+        code = self.results.code(row)
+        if column == "code":
+            return code
+        # Hits without an ALID/CEID have no Cause/Action
+        info = self.code_info.get(code) if code else None
+        if info is None:
+            return ""
+        cause, actions, _ = info
+        return cause if column == "cause" else "; ".join(actions)
+
+    def version_tip(self, index):
+        """Which mapping table version a Cause/Action cell comes from."""
+        if self.columns[index.column()] not in ("cause", "action"):
+            return None
+        info = self.code_info.get(self.results.code(index.row()))
+        return None if info is None else f"Mapping table v{info[2]}"
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return section + 1
+
+    def append(self, hits):
+        """Add a batch of hits at the end, the view keeps its scroll position and selection."""
+        if not len(hits):
+            return
+        first = len(self.results)
+        self.beginInsertRows(QModelIndex(), first, first + len(hits) - 1)
+        self.results.extend(hits)
+        self.join_codes()
+        self.endInsertRows()
 
 
 class FoundResultWindow(BaseWindow):
-    def __init__(self, results, selected_files):
+    """Result table, filled while ``worker`` (a running ScanWorker, if any) finds more hits.
+
+    The page outlives navigation: the scan (and following) keeps running
+    while other pages are shown, until a new scan replaces the page.
+    """
+
+    header_section = "Results"
+
+    def __init__(self, results, selected_files, worker=None):
         super().__init__()
         self.results = results
         self.selected_files = selected_files
+        self.worker = worker
+        self.has_been_shown = False
 
-        self.setWindowFlags(Qt.FramelessWindowHint)
-        self.resize(800, 600)
         self.setStyleSheet("background-color: #dcdcdc;")
 
         layout = QVBoxLayout()
         layout.setContentsMargins(10, 10, 10, 10)
         layout.setSpacing(10)
 
-        self.header = CustomHeader(self, active="Search")
-        layout.addWidget(self.header)
-
         info = QLabel("Select «Text in a Row» to see log file")
         info.setAlignment(Qt.AlignCenter)
         info.setStyleSheet("font-weight: bold; font-size: 14px;")
         layout.addWidget(info)
 
+        # Live scan status
+        status_row = QHBoxLayout()
+        self.status_label = QLabel()
+        self.status_label.setStyleSheet("font-size: 14px;")
+        status_row.addWidget(self.status_label)
+
+        self.scan_progress = QProgressBar()
+        self.scan_progress.setFixedWidth(200)
+        status_row.addWidget(self.scan_progress)
+
+        self.stop_btn = QPushButton("Stop")
+        self.stop_btn.setFixedHeight(28)
+        self.stop_btn.setStyleSheet(self.button_style(font_size="14px", bold=True))
+        self.stop_btn.clicked.connect(self.stop_scan)
+        status_row.addWidget(self.stop_btn)
+
+        # After a complete scan: keep scanning what gets appended to the logs
+        self.follow_btn = QPushButton("Follow")
+        self.follow_btn.setCheckable(True)
+        self.follow_btn.setFixedHeight(28)
+        self.follow_btn.setStyleSheet(self.button_style(font_size="14px", bold=True) +
+                                      "QPushButton:checked { background-color: #a0d0a0; }")
+        self.follow_btn.toggled.connect(self.toggle_follow)
+        self.follow_btn.setVisible(False)
+        status_row.addWidget(self.follow_btn)
+        self.follow_worker = None
+
+        # Hit counts per code, EQPID, channel, type and time, updated while scanning
+        self.summary_btn = QPushButton("Summary")
+        self.summary_btn.setFixedHeight(28)
+        self.summary_btn.setStyleSheet(self.button_style(font_size="14px", bold=True))
+        self.summary_btn.clicked.connect(self.show_summary)
+        self.summary_btn.setVisible(worker is not None and worker.scanner.summary is not None)
+        status_row.addWidget(self.summary_btn)
+        self.scan_summary = HitSummary()
+        self.follow_summary = HitSummary()
+        self.summary_window = None
+        layout.addLayout(status_row)
+
         # Table of results
-        self.result_area = QTableWidget()
-        self.result_area.setColumnCount(3)
-        self.result_area.setHorizontalHeaderLabels(["File Name", "Location", "Text in a Row"])
-        self.result_area.setRowCount(len(self.results))
+        show_terms = worker.scanner.report_terms if worker else None
+        show_codes = worker.scanner.extract_codes if worker else None
+        self.model = ResultTableModel(self.results, show_terms=show_terms, show_codes=show_codes,
+                                      mapping=self.mapping)
+        self.result_area = QTableView()
+        self.result_area.setModel(self.model)
         self.result_area.setStyleSheet("background-color: white;")
-        self.result_area.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.result_area.setSelectionBehavior(QTableWidget.SelectRows)
+        self.result_area.setEditTriggers(QTableView.NoEditTriggers)
+        self.result_area.setSelectionBehavior(QTableView.SelectRows)
+        self.result_area.setWordWrap(False)
 
-        for row, res in enumerate(self.results):
-            self.result_area.setItem(row, 0, QTableWidgetItem(res["file"]))
-            self.result_area.setItem(row, 1, QTableWidgetItem(f"Line {res['line']}"))
-            self.result_area.setItem(row, 2, QTableWidgetItem(res["text"]))
+        # Fixed row heights and column widths, Qt then only touches the visible rows
+        self.result_area.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.result_area.verticalHeader().setDefaultSectionSize(24)
+        self.result_area.setColumnWidth(0, 150)
+        self.result_area.setColumnWidth(1, 100)
+        if "code" in self.model.columns:
+            self.result_area.setColumnWidth(2, 350)
+        self.result_area.horizontalHeader().setStretchLastSection(True)
 
-        self.result_area.cellClicked.connect(self.show_log_context)
+        self.result_area.clicked.connect(lambda index: self.show_log_context(index.row()))
 
         layout.addWidget(self.result_area)
 
@@ -925,29 +1501,118 @@ class FoundResultWindow(BaseWindow):
         layout.addLayout(btn_row)
         self.setLayout(layout)
 
-    def show_log_context(self, row):
-        line_str = self.result_area.item(row, 1).text()
-        try:
-            line_num = int(line_str.replace("Line", "").strip())
-        except ValueError:
-            self.log_output.setText("Invalid line number format.")
-            return
+        if self.worker is not None:
+            self.worker.progress_changed.connect(self.scan_progress.setValue)
+            self.worker.hits_found.connect(self.add_hits)
+            self.worker.summary_changed.connect(self.set_scan_summary)
+            self.worker.scan_finished.connect(self.finish_scan)
+            self.worker.scan_failed.connect(self.fail_scan)
+            self.status_label.setText(f"Scanning... {len(self.results)} hits")
+        else:
+            self.finish_scan(False)
+
+    def add_hits(self, hits):
+        self.model.append(hits)
+        self.status_label.setText(f"Scanning... {len(self.results)} hits")
+
+    def finish_scan(self, stopped):
+        state = "Stopped" if stopped else "Done"
+        self.status_label.setText(f"{state}: {len(self.results)} hits")
+        if self.worker is not None and self.worker.scanner.errors:
+            skipped = len(self.worker.scanner.errors)
+            self.status_label.setText(f"{state}: {len(self.results)} hits, "
+                                      f"{skipped} {'file' if skipped == 1 else 'files'} skipped")
+            self.status_label.setToolTip(skipped_files_text(self.worker.scanner.errors))
+        self.scan_progress.setVisible(False)
+        self.stop_btn.setVisible(False)
+        # Following continues after the end of the files, which a time window may exclude
+        self.follow_btn.setVisible(self.worker is not None and not stopped and self.worker.scanner.time_range is None)
+
+    def fail_scan(self, message):
+        self.status_label.setText(f"Scan failed after {len(self.results)} hits: {message}")
+        self.scan_progress.setVisible(False)
+        self.stop_btn.setVisible(False)
+
+    def toggle_follow(self, checked):
+        if checked:
+            self.follow_worker = FollowWorker(self.selected_files, self.worker.scanner)
+            self.follow_worker.hits_found.connect(self.add_follow_hits)
+            self.follow_worker.summary_changed.connect(self.set_follow_summary)
+            self.follow_worker.start()
+            self.status_label.setText(f"Following... {len(self.results)} hits")
+        else:
+            self.stop_follow()
+            self.status_label.setText(f"Done: {len(self.results)} hits")
+
+    def add_follow_hits(self, hits):
+        self.model.append(hits)
+        self.status_label.setText(f"Following... {len(self.results)} hits")
+
+    def stop_follow(self):
+        if self.follow_worker is not None:
+            self.follow_worker.stop()
+            self.follow_worker.wait()
+            self.follow_worker = None
+
+    def set_scan_summary(self, summary):
+        self.scan_summary = summary
+        self.update_summary()
+
+    def set_follow_summary(self, summary):
+        self.follow_summary = summary
+        self.update_summary()
+
+    def summary(self):
+        """Summary of all hits in the table: the scan plus what following found since."""
+        summary = self.scan_summary.copy()
+        summary.update(self.follow_summary)
+        return summary
+
+    def show_summary(self):
+        if self.summary_window is None:
+            self.summary_window = SummaryWindow(self)
+        self.summary_window.show()
+        self.summary_window.raise_()
+        self.update_summary()
+
+    def update_summary(self):
+        if self.summary_window is not None and self.summary_window.isVisible():
+            self.summary_window.set_summary(self.summary())
+
+    def stop_scan(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.stop_btn.setEnabled(False)
+
+    def stop_worker(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.stop()
+            self.worker.wait()
+
+    def closeEvent(self, event):
+        self.stop_worker()
+        self.stop_follow()
+        if self.summary_window is not None:
+            self.summary_window.close()
+        self.results.close()  # open log files would block their rotation or deletion on Windows
+        super().closeEvent(event)
 
-        file_path = self.results[row].get("path")
+    def show_log_context(self, row):
+        line_num = self.results.line(row)
+        file_path = self.results.path(row)
         if not file_path or not os.path.exists(file_path):
             self.log_output.setText("File not found.")
             return
 
         try:
-            with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                lines = f.readlines()
-
-            start = max(0, line_num - 6)
-            end = min(len(lines), line_num + 5)
-            context = lines[start:end]
+            # The index kept by the scan covers the hit lines even when data was appended since
+            scanned_size = self.worker.scanner.scanned_sizes.get(file_path) if self.worker is not None else None
+            with open_log(file_path) as reader:
+                index = line_index_for(file_path, reader, scanned_size)
+                context = reader.read_context(line_num, before=5, after=5, index=index)
 
             highlighted = []
-            for idx, line in enumerate(context, start=start + 1):
+            for idx, line in context:
                 if idx == line_num:
                     highlighted.append(f">>> Line {idx}: {line.strip()}")
                 else:
@@ -958,18 +1623,55 @@ class FoundResultWindow(BaseWindow):
         except Exception as e:
             self.log_output.setText(f"Error reading file: {e}")
 
+    def mapping_changed(self):
+        self.model.set_mapping(self.mapping)
+
+    def showEvent(self, event):
+        self.has_been_shown = True
+        super().showEvent(event)
+
     def back(self):
-        self.user_choice_window = UserChoiceWindow(self.selected_files)
-        self.user_choice_window.show()
-        self.close()
+        self.shell.show_user_choice(self.selected_files)
 
     def go_home(self):
-        self.main_window = MainWindow()
-        self.main_window.show()
-        self.close()
+        self.shell.show_main()
+
+class SummaryWindow(QDialog):
+    """Text tables of a HitSummary, refreshed by FoundResultWindow while the scan runs."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Summary")
+        self.resize(600, 500)
+        self.setStyleSheet("background-color: #dcdcdc;")
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 10)
+
+        self.text = QLabel()
+        self.text.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        self.text.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.text.setStyleSheet("background-color: #eeeeee; padding: 12px; font-family: monospace;")
+
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(self.text)
+        layout.addWidget(scroll)
+
+        close_btn = QPushButton("Close")
+        close_btn.setFixedHeight(35)
+        close_btn.setStyleSheet(BaseWindow.button_style(font_size="14px", bold=True))
+        close_btn.clicked.connect(self.close)
+        layout.addWidget(close_btn)
+
+    def set_summary(self, summary):
+        self.text.setText(summary_text(summary))
 
 if __name__ == "__main__":
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()  # needed for the scan process pool in frozen builds
     app = QApplication(sys.argv)
-    window = MainWindow()
+    window = AppWindow()
     window.show()
     sys.exit(app.exec_())
@@ -0,0 +1,346 @@
+"""Benchmarks of the headless core on synthetic logs (see log_generator.py).
+
+    python benchmark.py                                  # 10 MB
+    python benchmark.py --sizes 10MB,1GB,10GB --dir /data/bench -o bench.json
+
+Measures scan throughput (MB/s), time to the first hit, peak RSS, the
+latency of the context view (what a click in the result table does) and of
+mapping table loads and lookups, and the time until the GUI first paints
+(skipped when PyQt5 is not installed). Every case runs in its own process
+so peak RSS belongs to that case only. Generated logs are kept in --dir and
+reused.
+
+The result is one JSON object on stdout (or in --output):
+{"format": 2, "meta": {...}, "results": [{"case": "scan", ...}, ...]}
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from log_generator import LOG_FORMAT, generate_log, parse_size
+
+
+# Bump when the layout of the result JSON changes
+RESULT_FORMAT = 2
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MAPPING = os.path.join(BASE_DIR, "data", "mapping_table.xlsx")
+
+# Search texts of the scan cases, like the manual mode, the automatic mode and a record query
+SEARCHES = {
+    "keyword": "EALM; 15031",
+    "auto": None,  # AUTO_SEARCH_TEXT
+    "record": "type=EALM",
+}
+
+# Lines shown by the context case, like clicks in the result table
+CONTEXT_SAMPLES = 200
+
+# Lookups timed by the mapping case, and rows of its synthetic table
+LOOKUP_SAMPLES = 100000
+SYNTHETIC_MAPPING_ROWS = 10000
+SEARCH_SAMPLES = 2000  # keystrokes replayed against the search index
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and of its largest child (scan workers), in MB."""
+    if resource is None:
+        return None, None
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
+
+
+def latency_stats(seconds):
+    """p50/p95/max of a list of durations, in milliseconds."""
+    ordered = sorted(seconds)
+    return {
+        "count": len(ordered),
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def run_scan(path, search, workers):
+    """Scan like the GUI does (codes and summary on), returns the measurements."""
+    from scan_engine import AUTO_SEARCH_TEXT, LogScanner
+
+    search_text = SEARCHES[search] or AUTO_SEARCH_TEXT
+    scanner = LogScanner(search_text, workers=workers, extract_codes=True, summarize=True)
+    scanner.report_terms = len(scanner.terms) > 1
+    first_hit = None
+    hit_count = 0
+
+    def on_hits(hits):
+        nonlocal first_hit, hit_count
+        if first_hit is None:
+            first_hit = time.perf_counter() - started
+        hit_count += len(hits)
+        hits.close()
+
+    started = time.perf_counter()
+    scanner.scan([path], on_hits=on_hits)
+    seconds = time.perf_counter() - started
+
+    size = os.path.getsize(path)
+    return {
+        "search": search,
+        "search_text": search_text,
+        "workers": workers,
+        "seconds": round(seconds, 4),
+        "mb_per_s": round(size / (1024 * 1024) / seconds, 2) if seconds else None,
+        "time_to_first_hit_s": round(first_hit, 4) if first_hit is not None else None,
+        "hits": hit_count,
+    }
+
+
+def run_context(path, samples=CONTEXT_SAMPLES, seed=0):
+    """Open the log and show the lines around random hits, like show_log_context."""
+    from log_reader import line_index_for, open_log
+
+    started = time.perf_counter()
+    with open_log(path) as reader:
+        index = line_index_for(path, reader)
+    first_open = time.perf_counter() - started
+
+    rng = random.Random(seed)
+    line_count = index.lines[-1]
+    durations = []
+    for _ in range(samples):
+        line_num = rng.randint(1, line_count)
+        started = time.perf_counter()
+        with open_log(path) as reader:
+            reader.read_context(line_num, before=5, after=5, index=line_index_for(path, reader))
+        durations.append(time.perf_counter() - started)
+
+    return {"index_build_s": round(first_open, 4), "latency": latency_stats(durations)}
+
+
+def run_mapping(workbook, samples=LOOKUP_SAMPLES, seed=0):
+    """Workbook load (cold and through the cache), lookup and search latency of the mapping table."""
+    import mapping_table
+    from mapping_table import MappingTable, load_cached
+
+    result = {"workbook": os.path.basename(workbook) if workbook else None}
+    tables = []
+    if workbook and os.path.exists(workbook):
+        # An empty cache directory, so the first load really reads the workbook
+        with tempfile.TemporaryDirectory() as cache_dir:
+            mapping_table.CACHE_DIR = cache_dir
+            started = time.perf_counter()
+            table = load_cached(workbook)
+            result["cold_load_s"] = round(time.perf_counter() - started, 4)
+            started = time.perf_counter()
+            load_cached(workbook)
+            result["cached_load_s"] = round(time.perf_counter() - started, 4)
+        result["rows"] = len(table)
+        tables.append(("workbook", table))
+
+    rows = [{"Err Code": str(code), "Cause": f"Cause {code % 500}", "Action": f"Action {code % 37}"}
+            for code in range(SYNTHETIC_MAPPING_ROWS)]
+    started = time.perf_counter()
+    synthetic = MappingTable(rows)
+    result["synthetic_rows"] = len(rows)
+    result["synthetic_build_s"] = round(time.perf_counter() - started, 4)
+    tables.append(("synthetic", synthetic))
+
+    rng = random.Random(seed)
+    for name, table in tables:
+        known = list(table.by_code) or ["0"]
+        # Half known codes, half unknown ones
+        codes = [rng.choice(known) if i % 2 else str(rng.randrange(10 ** 6, 10 ** 7)) for i in range(samples)]
+        started = time.perf_counter()
+        for code in codes:
+            table.lookup(code)
+        seconds = time.perf_counter() - started
+        result[f"{name}_lookup_ns"] = round(seconds / samples * 1e9, 1)
+
+        started = time.perf_counter()
+        table.lookup_many(codes[:1000])
+        result[f"{name}_lookup_many_1000_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+        # What the Help page searches per keystroke: growing prefixes of a code, then the code
+        # with two digits swapped (a typo) and words of a cause with a letter dropped
+        keystrokes = []
+        while len(keystrokes) < SEARCH_SAMPLES:
+            code = rng.choice(known)
+            keystrokes += [code[:length] for length in range(1, len(code) + 1)]
+            keystrokes.append(code[1] + code[0] + code[2:] if len(code) > 1 else code)
+            cause = str(table.by_code[code]["Cause"] or "") if code in table.by_code else ""
+            keystrokes.append(" ".join(word[:-1] or word for word in cause.split()))
+        durations = []
+        for text in keystrokes[:SEARCH_SAMPLES]:
+            started = time.perf_counter()
+            table.search(text)
+            durations.append(time.perf_counter() - started)
+        result[f"{name}_search"] = latency_stats(durations)
+    return result
+
+
+def run_startup(timeout=10.0):
+    """Import the GUI and show the main window, like a user launching the tool."""
+    if not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    started = time.perf_counter()
+    from PyQt5.QtWidgets import QApplication
+    import TestApp
+    imported = time.perf_counter() - started
+
+    app = QApplication([sys.argv[0]])
+    window = TestApp.AppWindow()
+    window.show()
+    deadline = time.perf_counter() + timeout
+    while window.first_paint is None and time.perf_counter() < deadline:
+        app.processEvents()
+    first_paint = time.perf_counter() - started if window.first_paint is not None else None
+
+    # The mapping table loads in the background after the first paint
+    while TestApp.BaseWindow.mapping_state == "loading" and time.perf_counter() < deadline:
+        app.processEvents()
+    mapping_ready = time.perf_counter() - started
+    window.close()
+
+    return {
+        "import_s": round(imported, 4),
+        "first_paint_s": round(first_paint, 4) if first_paint is not None else None,
+        "first_paint_target_s": TestApp.FIRST_PAINT_TARGET,
+        "within_target": first_paint is not None and first_paint <= TestApp.FIRST_PAINT_TARGET,
+        "mapping_state": TestApp.BaseWindow.mapping_state,
+        "mapping_ready_s": round(mapping_ready, 4),
+    }
+
+
+CASES = {"scan": run_scan, "context": run_context, "mapping": run_mapping, "startup": run_startup}
+
+
+def run_case(case):
+    """Run one case in this process and add its peak memory."""
+    arguments = {key: value for key, value in case.items() if key not in ("case", "size")}
+    result = CASES[case["case"]](**arguments)
+    result["peak_rss_mb"], result["peak_child_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def run_isolated(case):
+    """Run a case in a fresh interpreter, so caches and peak RSS start from zero."""
+    command = [sys.executable, os.path.abspath(__file__), "--run-case", json.dumps(case)]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=BASE_DIR)
+    if completed.returncode != 0:
+        return dict(case, error=completed.stderr.strip().splitlines()[-1:] or ["failed"])
+    return dict(case, **json.loads(completed.stdout.splitlines()[-1]))
+
+
+def prepare_log(directory, size_text, seed):
+    """Path of the synthetic log for a size, generated on first use."""
+    size = parse_size(size_text)
+    path = os.path.join(directory, f"synthetic-{size_text.upper()}-seed{seed}-v{LOG_FORMAT}.log")
+    if not os.path.exists(path) or os.path.getsize(path) < size:
+        print(f"[INFO] Generating {path}", file=sys.stderr)
+        started = time.perf_counter()
+        generate_log(path, size, seed)
+        print(f"[INFO] Generated in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return path
+
+
+def git_revision():
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                   cwd=BASE_DIR, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scanning, the context view and mapping lookups.")
+    parser.add_argument("--sizes", default="10MB", help="comma separated log sizes, e.g. 10MB,1GB,10GB")
+    parser.add_argument("--dir", default=os.path.join(tempfile.gettempdir(), "log_analyzer_bench"),
+                        help="where generated logs are kept")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated logs")
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}",
+                        help="comma separated scan process counts")
+    parser.add_argument("--searches", default=",".join(SEARCHES), help="comma separated scan cases")
+    parser.add_argument("--mapping", default=DEFAULT_MAPPING, help="mapping workbook for the load benchmark")
+    parser.add_argument("-o", "--output", help="write the JSON here instead of stdout")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.run_case:
+        print(json.dumps(run_case(json.loads(args.run_case))))
+        return 0
+
+    try:
+        sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+        for size in sizes:
+            parse_size(size)
+        workers = sorted({max(1, int(count)) for count in args.workers.split(",")})
+    except ValueError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+    searches = [search.strip() for search in args.searches.split(",") if search.strip()]
+    unknown = [search for search in searches if search not in SEARCHES]
+    if unknown:
+        print(f"[ERROR] Unknown search case: {', '.join(unknown)} (known: {', '.join(SEARCHES)})", file=sys.stderr)
+        return 2
+
+    os.makedirs(args.dir, exist_ok=True)
+    cases = []
+    for size in sizes:
+        path = prepare_log(args.dir, size, args.seed)
+        for search in searches:
+            for count in workers:
+                cases.append({"case": "scan", "size": size, "path": path, "search": search, "workers": count})
+        cases.append({"case": "context", "size": size, "path": path})
+    cases.append({"case": "mapping", "workbook": args.mapping})
+    if importlib.util.find_spec("PyQt5") is not None:
+        cases.append({"case": "startup"})
+
+    results = []
+    for case in cases:
+        print(f"[INFO] {json.dumps({k: v for k, v in case.items() if k != 'path'})}", file=sys.stderr)
+        results.append(run_isolated(case))
+
+    report = {
+        "format": RESULT_FORMAT,
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"[INFO] Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return 0 if all("error" not in result for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
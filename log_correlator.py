@@ -0,0 +1,267 @@
+import re
+from collections import Counter, OrderedDict
+from datetime import date
+
+from log_reader import line_number_at, open_log
+from log_records import INFO_RE, find_time_range, iter_records
+
+
+# Seconds a request waits for its reply before it counts as orphaned
+REPLY_WINDOW = 300
+
+# Seconds a reply logged before its request (same timestamp, e.g. EDNT_R) waits for it
+EARLY_REPLY_WINDOW = 5
+
+# Most requests waiting at the same time, the oldest is given up beyond that
+MAX_PENDING = 100000
+
+# Orphaned requests kept as examples (all of them are counted)
+MAX_ORPHAN_SAMPLES = 1000
+
+REPLY_SUFFIX = "_R"
+
+ACK_RE = re.compile(rb'"ACK"\s*:\s*"([^"]*)"')
+
+# Percentiles reported per channel
+PERCENTILES = (50, 90, 95, 99)
+
+
+class LatencyStats:
+    """Reply latencies of one channel as a histogram of whole seconds.
+
+    Log timestamps have a resolution of one second, so the histogram is
+    exact and its size is bounded by the reply window.
+    """
+
+    def __init__(self):
+        self.histogram = Counter()
+        self.count = 0
+        self.total = 0
+        self.naks = 0  # replies with an ACK other than "0"
+
+    def add(self, seconds, ack=None):
+        self.histogram[seconds] += 1
+        self.count += 1
+        self.total += seconds
+        if ack not in (None, "0"):
+            self.naks += 1
+
+    def update(self, other):
+        self.histogram.update(other.histogram)
+        self.count += other.count
+        self.total += other.total
+        self.naks += other.naks
+
+    def percentile(self, percent):
+        """Smallest latency that ``percent`` % of the replies do not exceed."""
+        if not self.count:
+            return None
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for seconds, count in sorted(self.histogram.items()):
+            seen += count
+            if seen >= rank:
+                return seconds
+        return max(self.histogram)
+
+    def to_dict(self):
+        result = {"replies": self.count, "naks": self.naks}
+        if self.count:
+            result["mean_s"] = round(self.total / self.count, 3)
+            result["min_s"] = min(self.histogram)
+            result["max_s"] = max(self.histogram)
+            for percent in PERCENTILES:
+                result[f"p{percent}_s"] = self.percentile(percent)
+        return result
+
+
+class Correlator:
+    """Joins requests with their replies (EERR -> EERR_R, EEER -> EEER_R, ...) in one pass.
+
+    Records are fed in time order with ``add``. A request waits in a hash map
+    keyed by (type, equipment, transaction number) until its reply arrives,
+    or until it is older than ``window`` seconds and counts as orphaned, so
+    memory stays bounded by the requests of one window (at most
+    ``max_pending``) no matter how long the logs are. Some replies carry a
+    transaction number of their own (ECMD_R, EDNT_R), they answer the oldest
+    waiting request of their type and equipment. A reply written just before
+    its request (EDNT_R) waits ``EARLY_REPLY_WINDOW`` seconds for it.
+
+    The equipment is taken from the header ("HU1FJGF06302-002-003" without
+    the H/E sender letter) since the body EQPID of a request and its reply
+    may differ.
+    """
+
+    def __init__(self, window=REPLY_WINDOW, max_pending=MAX_PENDING):
+        self.window = window
+        self.max_pending = max_pending
+        self.pending = OrderedDict()  # key -> (seconds, timestamp, channel, path, line), oldest first
+        self.by_equipment = {}  # (type, equipment) -> OrderedDict of its pending keys, oldest first
+        self.latencies = {}  # (request channel, type) -> LatencyStats
+        self.orphans = Counter()  # (request channel, type) -> requests without reply
+        self.orphan_samples = []
+        self.unmatched_replies = Counter()  # (reply channel, type) -> replies without a waiting request
+        self.early_replies = OrderedDict()  # key -> (seconds, channel, ack) of replies without request yet
+        self.records = 0
+        self.clock = 0  # latest record time seen, in seconds
+        self._day = None
+        self._day_seconds = 0
+
+    def add(self, record):
+        self.records += 1
+        seconds = self._seconds(record.timestamp)
+        if seconds > self.clock:
+            self.clock = seconds
+            self._expire(seconds - self.window)
+
+        info = INFO_RE.match(record.info)
+        if info is None:
+            return  # no transaction number, nothing to join on
+        equipment, transaction = info.group(1), info.group(4)
+        if len(equipment) > 1 and equipment[0] in "HE":
+            equipment = equipment[1:]
+
+        msg_type = record.msg_type
+        if msg_type.endswith(REPLY_SUFFIX):
+            request_type = msg_type[:-len(REPLY_SUFFIX)]
+            key = (request_type, equipment, transaction)
+            ack = ACK_RE.search(record.raw)
+            ack = ack.group(1).decode('ascii', errors='ignore') if ack else None
+            request = self._take(key)
+            if request is not None:
+                self._add_latency(request[2], request_type, seconds - request[0], ack)
+            else:
+                self.early_replies.pop(key, None)
+                self.early_replies[key] = (seconds, record.channel, ack)
+                if len(self.early_replies) > self.max_pending:
+                    self._unmatched(*self.early_replies.popitem(last=False))
+            return
+
+        key = (msg_type, equipment, transaction)
+        early = self.early_replies.pop(key, None)
+        if early is not None:
+            self._add_latency(record.channel, msg_type, seconds - early[0], early[2])
+            return
+        previous = self._remove(key)
+        if previous is not None:
+            self._orphan(key, previous)  # sent again before any reply
+        self.pending[key] = (seconds, record.timestamp, record.channel, record.path, record.line)
+        self.by_equipment.setdefault(key[:2], OrderedDict())[key] = None
+        if len(self.pending) > self.max_pending:
+            oldest = next(iter(self.pending))
+            self._orphan(oldest, self._remove(oldest))
+
+    def finish(self):
+        """Requests still waiting at the end of the logs, as [(key, request)]; they are not orphans yet."""
+        while self.early_replies:
+            self._unmatched(*self.early_replies.popitem(last=False))
+        waiting = list(self.pending.items())
+        self.pending.clear()
+        self.by_equipment.clear()
+        return waiting
+
+    def _add_latency(self, channel, msg_type, seconds, ack):
+        stats = self.latencies.get((channel, msg_type))
+        if stats is None:
+            stats = self.latencies[(channel, msg_type)] = LatencyStats()
+        stats.add(max(0, seconds), ack)
+
+    def _unmatched(self, key, reply):
+        self.unmatched_replies[(reply[1], key[0])] += 1
+
+    def _take(self, key):
+        """Remove and return the request a reply answers: same transaction, else the oldest of its kind."""
+        if key not in self.pending:
+            keys = self.by_equipment.get(key[:2])
+            if not keys:
+                return None
+            key = next(iter(keys))
+        return self._remove(key)
+
+    def _remove(self, key):
+        request = self.pending.pop(key, None)
+        if request is not None:
+            keys = self.by_equipment[key[:2]]
+            del keys[key]
+            if not keys:
+                del self.by_equipment[key[:2]]
+        return request
+
+    def _expire(self, oldest):
+        while self.early_replies:
+            key, reply = next(iter(self.early_replies.items()))
+            if reply[0] >= self.clock - EARLY_REPLY_WINDOW:
+                break
+            del self.early_replies[key]
+            self._unmatched(key, reply)
+
+        while self.pending:
+            key, request = next(iter(self.pending.items()))
+            if request[0] >= oldest:
+                break
+            self._remove(key)
+            self._orphan(key, request)
+
+    def _orphan(self, key, request):
+        msg_type = key[0]
+        self.orphans[(request[2], msg_type)] += 1
+        if len(self.orphan_samples) < MAX_ORPHAN_SAMPLES:
+            self.orphan_samples.append(_request_dict(key, request))
+
+    def _seconds(self, timestamp):
+        # "YYYY.MM.DD HH:MM:SS", the day is converted once per day
+        day = timestamp[:10]
+        if day != self._day:
+            self._day = day
+            self._day_seconds = date(int(day[:4]), int(day[5:7]), int(day[8:10])).toordinal() * 86400
+        return self._day_seconds + int(timestamp[11:13]) * 3600 + int(timestamp[14:16]) * 60 + int(timestamp[17:19])
+
+    def report(self, waiting=()):
+        """Plain dict (e.g. for JSON) of the latencies and orphans per channel and message type."""
+        channels = {}
+        for (channel, _), stats in self.latencies.items():
+            channels.setdefault(channel, LatencyStats()).update(stats)
+
+        keys = sorted(set(self.latencies) | set(self.orphans))
+        return {
+            "records": self.records,
+            "window_s": self.window,
+            "channels": [dict(channel=channel, orphans=sum(count for (orphan_channel, _), count
+                                                             in self.orphans.items() if orphan_channel == channel),
+                              **stats.to_dict())
+                         for channel, stats in sorted(channels.items())],
+            "types": [dict(channel=channel, type=msg_type, orphans=self.orphans.get((channel, msg_type), 0),
+                           **self.latencies.get((channel, msg_type), LatencyStats()).to_dict())
+                      for channel, msg_type in keys],
+            "orphans": sum(self.orphans.values()),
+            "orphan_samples": self.orphan_samples,
+            "unmatched_replies": [{"channel": channel, "type": msg_type, "count": count}
+                                  for (channel, msg_type), count in sorted(self.unmatched_replies.items())],
+            "waiting_at_end": [_request_dict(key, request) for key, request in waiting],
+        }
+
+
+def _request_dict(key, request):
+    msg_type, equipment, transaction = key
+    _, timestamp, channel, path, line = request
+    return {"type": msg_type, "equipment": equipment, "transaction": transaction, "channel": channel,
+            "timestamp": timestamp, "path": path, "line": line}
+
+
+def correlate(paths, window=REPLY_WINDOW, max_pending=MAX_PENDING, time_range=None, stopped=None):
+    """Correlate the records of the logs (in the given order) and return the report dict.
+
+    ``stopped`` is an optional callable checked between records to cancel.
+    """
+    correlator = Correlator(window, max_pending)
+    for path in paths:
+        with open_log(path) as reader:
+            start, end, first_line = 0, None, 1
+            if time_range is not None:
+                start, end = find_time_range(reader, time_range)
+                first_line = line_number_at(path, reader, start)
+            for record in iter_records(reader, start, end, first_line):
+                correlator.add(record)
+                if stopped is not None and stopped():
+                    return correlator.report(correlator.finish())
+    return correlator.report(correlator.finish())
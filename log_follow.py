@@ -0,0 +1,309 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+
+from log_reader import LogReader, is_compressed, line_index_for
+from log_records import RECORD_START_RE, record_around, record_code
+from log_summary import record_fields
+from scan_engine import LogScanner, ResultStore
+
+
+# Longest wait between two checks of the followed files (in seconds)
+POLL_INTERVAL = 1.0
+
+# Bytes read at a time when looking back for the end of the complete data
+TAIL_WINDOW = 1024 * 1024
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")  # watch descriptor, mask, cookie, name length
+
+
+class FileState:
+    """Where following a file resumes: byte offset and line count of the scanned part."""
+
+    def __init__(self, path, offset=0, line_count=0, reported=()):
+        self.path = path
+        self.offset = offset
+        self.line_count = line_count
+        # Offsets of hits after ``offset`` that were already reported: True when they were counted
+        # elsewhere (the scan before following) and must not be counted again
+        self.reported = dict.fromkeys(reported, True)
+        self.file_id = file_id(path)
+
+
+class LogFollower:
+    """Scans only what is appended to the followed logs, like ``tail -f``.
+
+    Every file keeps its offset and line count, ``poll()`` scans the new
+    complete lines with the same scanner as a normal search and streams the
+    hits to ``on_hits(store)``. A file replaced by a new one (rotation) or
+    truncated is followed again from its start. A file that cannot be read
+    for the moment (e.g. between a rotation and the new file appearing) is
+    tried again on the next poll.
+
+    Record queries ("type=EALM") only scan up to the last record header, so
+    a record is reported once the next one has started. With ``summarize``
+    the reported hits are also counted into ``summary``.
+    """
+
+    def __init__(self, search_text, report_terms=False, on_hits=None, extract_codes=False, summarize=False):
+        self.scanner = LogScanner(search_text, report_terms=report_terms, extract_codes=extract_codes,
+                                  summarize=summarize)
+        self.on_hits = on_hits
+        self.files = {}
+        self.watcher = None
+
+    @property
+    def stopped(self):
+        return self.scanner.stopped
+
+    @property
+    def summary(self):
+        return self.scanner.summary
+
+    def add(self, path, offset=None):
+        """Follow a file from ``offset`` (default: its current end), e.g. the size seen by a full scan.
+
+        Following resumes at the end of the complete data before ``offset``
+        (the start of an unfinished last line or record), which is scanned
+        again once complete. The hits a scan up to ``offset`` reported there
+        are not reported twice. Compressed logs are archives and not followed.
+        """
+        if is_compressed(path):
+            return
+        with LogReader(path) as reader:
+            offset = reader.size if offset is None else min(offset, reader.size)
+            resume = self._complete_end(reader, 0, offset)
+            # The line index of the full scan (if any) is reused, only the lines after a checkpoint are counted
+            line_count = line_index_for(path, reader, offset).line_at(reader, resume) - 1
+        reported = ()
+        if resume < offset:
+            # Same search over the same bytes, so the same hits as the scan that ended at offset
+            hits, _, _ = LogScanner(self.scanner.search_text).scan_segment(path, resume, offset)
+            reported = [hits.offset(row) for row in range(len(hits))]
+        self.files[path] = FileState(path, resume, line_count, reported)
+
+    def run(self, poll_interval=POLL_INTERVAL):
+        """Poll until stopped, waking up early when the watcher reports changes."""
+        self.watcher = FileWatcher(list(self.files))
+        try:
+            while not self.stopped:
+                self.poll()
+                self.watcher.wait(poll_interval)
+        finally:
+            self.watcher.close()
+
+    def stop(self):
+        self.scanner.stop()
+        if self.watcher is not None:
+            self.watcher.wake()
+
+    def poll(self):
+        """Scan the data appended since the last poll, returns the number of new hits."""
+        hit_count = 0
+        for state in self.files.values():
+            if self.stopped:
+                break
+            hit_count += self._poll_file(state)
+        return hit_count
+
+    def _poll_file(self, state):
+        try:
+            stat = os.stat(state.path)
+            if (stat.st_dev, stat.st_ino) != state.file_id or stat.st_size < state.offset:
+                # Rotated or truncated: the new content starts at line 1
+                state.offset = 0
+                state.line_count = 0
+                state.reported = {}
+                state.file_id = (stat.st_dev, stat.st_ino)
+
+            if stat.st_size <= state.offset:
+                return 0
+
+            with LogReader(state.path) as reader:
+                end = self._complete_end(reader, state.offset, reader.size)
+        except OSError:
+            return 0  # rotated away and the new file is not there yet, or not readable for now
+        if end <= state.offset:
+            return 0
+
+        delivered = []
+        counted_elsewhere = []
+        summary = self.summary.copy() if self.summary is not None else None
+
+        def on_hits(hits):
+            # Line numbers of a segment start at its first line
+            new_hits = ResultStore()
+            for row in range(len(hits)):
+                counted = state.reported.get(hits.offset(row))
+                if counted is None:
+                    new_hits.append(hits.path(row), state.line_count + hits.line(row), hits.offset(row),
+                                    hits.term(row), hits.code(row))
+                elif counted:
+                    counted_elsewhere.append(hits.offset(row))
+            if len(new_hits):
+                delivered.extend(new_hits.offset(row) for row in range(len(new_hits)))
+                self.on_hits(new_hits)
+
+        try:
+            _, line_count, _ = self.scanner.scan_segment(state.path, state.offset, end, on_hits=on_hits)
+            if counted_elsewhere and self.summary is not None:
+                self._unsummarize(state.path, counted_elsewhere)
+        except OSError:
+            # Gone meanwhile: the next poll starts over from the same state with the counts of
+            # before, the hits passed on so far are not reported again but will be counted then
+            state.reported.update(dict.fromkeys(delivered, False))
+            if summary is not None:
+                self.scanner.summary = summary
+            return len(delivered)
+
+        if not self.stopped:
+            state.offset = end
+            state.line_count += line_count
+            state.reported = {}  # all behind the new offset now
+        return len(delivered)
+
+    def _unsummarize(self, path, offsets):
+        """Take the hits that the full scan already reported (and counted) back out of the summary."""
+        with LogReader(path) as reader:
+            for offset in offsets:
+                data = record_around(reader, offset)
+                code = (record_code(data) or "") if self.scanner.extract_codes else None
+                self.summary.remove(record_fields(data), code)
+
+    def _complete_end(self, reader, start, end):
+        """End of the complete data in [start, end): past the last newline, or at the last record header."""
+        position = end
+        while position > start:
+            window_start = max(start, position - TAIL_WINDOW)
+            data = reader.read(window_start, position)
+
+            if self.scanner.record_query:
+                headers = [match.start() for match in RECORD_START_RE.finditer(data)]
+                # A match at the window start only counts when it is a real line start
+                if headers and headers[0] == 0 and window_start > start \
+                        and reader.read(window_start - 1, window_start) != b'\n':
+                    headers.pop(0)
+                if headers:
+                    return window_start + headers[-1]
+            else:
+                newline = data.rfind(b'\n')
+                if newline >= 0:
+                    return window_start + newline + 1
+
+            position = window_start
+        return start
+
+
+class FileWatcher:
+    """Waits for changes of the followed files.
+
+    Uses inotify on the parent directories on Linux (so rotated and newly
+    created files are noticed too), otherwise simply sleeps for the poll
+    interval. ``wake()`` ends a running ``wait()`` early.
+    """
+
+    def __init__(self, paths):
+        self.names = {}
+        for path in paths:
+            directory, name = os.path.split(os.path.abspath(path))
+            self.names.setdefault(directory, set()).add(os.fsencode(name))
+
+        self._wake = threading.Event()
+        self._fd = None
+        self._directories = {}
+        self._wake_pipe = None
+        if sys.platform.startswith("linux"):
+            try:
+                self._open_inotify()
+            except (OSError, AttributeError) as e:
+                print(f"[INFO] inotify not available, polling instead: {e}")
+                self.close()
+
+    def _open_inotify(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+
+        for directory in self.names:
+            wd = libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+            self._directories[wd] = directory
+        self._wake_pipe = os.pipe()
+
+    @property
+    def uses_inotify(self):
+        return self._fd is not None
+
+    def wait(self, timeout=POLL_INTERVAL):
+        """Return True when a followed file may have changed, False on timeout."""
+        if self._fd is None:
+            self._wake.wait(timeout)
+            return True  # polling: always check again
+
+        ready, _, _ = select.select([self._fd, self._wake_pipe[0]], [], [], timeout)
+        if self._wake_pipe[0] in ready:
+            os.read(self._wake_pipe[0], 64)
+            return True
+        if self._fd not in ready:
+            return False
+        return self._read_events()
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+
+        changed = False
+        position = 0
+        while position + EVENT_HEADER.size <= len(data):
+            wd, _, _, name_length = EVENT_HEADER.unpack_from(data, position)
+            position += EVENT_HEADER.size
+            name = data[position:position + name_length].rstrip(b'\0')
+            position += name_length
+            directory = self._directories.get(wd)
+            if directory is not None and name in self.names[directory]:
+                changed = True
+        return changed
+
+    def wake(self):
+        self._wake.set()
+        if self._wake_pipe is not None:
+            try:
+                os.write(self._wake_pipe[1], b'x')
+            except OSError:
+                pass  # closed meanwhile, the wait is over anyway
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self._wake_pipe is not None:
+            for fd in self._wake_pipe:
+                os.close(fd)
+            self._wake_pipe = None
+
+
+def file_id(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
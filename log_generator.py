@@ -0,0 +1,240 @@
+"""Synthetic ECP/B_xx logs for benchmarks, modeled on data/log_file_1.log.
+
+    python log_generator.py 100MB synthetic.log
+    python log_generator.py 1GB synthetic.log --seed 7 --start "2024.10.21 00:00:00"
+
+Records are framed like the real logs: the message starts with STX
+(\x02) after the header, the checksum is followed by ETX (\x03) and lines
+end with CRLF.
+
+Every request is followed by its reply, mostly right away, sometimes a few
+records later and rarely never (like a lost reply). Message types appear
+about as often as in the sample, so scans hit as often as on real logs.
+Output is deterministic for a given seed.
+"""
+import argparse
+import random
+import re
+import sys
+from datetime import datetime, timedelta
+
+from log_records import TIMESTAMP_FORMAT
+
+
+# Bump when the written records change, benchmark.py then generates its logs again
+LOG_FORMAT = 2
+
+# Framing of the real logs
+STX = "\x02"
+ETX = "\x03"
+NEWLINE = "\r\n"
+
+# Bytes collected before a write
+WRITE_BUFFER = 1024 * 1024
+
+# Reply delivery: right after the request, some records later, or never
+REPLY_DELAYED = 0.08
+REPLY_LOST = 0.02
+MAX_REPLY_DELAY = 20  # records
+
+SIZE_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*([KMG]?)B?$', re.I)
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+EQPID = "U1FJGF06302-002-003"
+HOST_EQPID = "UCJIGF0603"
+EVENT_IDS = ["651"] * 8 + ["611", "621", "601"]
+ALARMS = [("15031", "IT data error"), ("15032", "IT data timeout"), ("83", "Tray not found"),
+          ("84", "Jig temperature high"), ("85", "Pressure low"), ("86", "Door open"), ("87", "Power fault")]
+
+
+def _carrier(rng):
+    return f"LJIG0603{rng.randrange(100):02d}"
+
+
+def _temp_info(rng):
+    temps = {f"TEMP_JIG_{i:02d}": str(rng.randint(630, 645)) for i in range(1, 38)}
+    temps["TEMP_JIG_AVG"] = "637"
+    temps.update({f"TEMP_POW_{i:02d}": "0" for i in range(1, 11)})
+    temps["TEMP_POW_AVG"] = "0"
+    return {"CHANNELTYPE": "36", "EQPSTATE": "I", "OPERMODE": "C", "OPERTYPE": "", "TEMPLIST": temps,
+            "TRAYEXIST": "1", "TRAYSTATE": "N"}
+
+
+def _lot(rng, **extra):
+    carrier = _carrier(rng)
+    return dict({"CARRIERID": [carrier], "EQPID": EQPID, "LOTID": [carrier + "FZDJJA"], "OPERGROUPID": "PP"},
+                **extra)
+
+
+def _alarm(rng):
+    code, text = rng.choice(ALARMS)
+    return {"ALID": code, "ALTX": text, "EQPID": EQPID, "LEVEL": "B", "STATUS": "1", "TRAYEXIST": "1"}
+
+
+# type: (weight, request sent by the host (ECP), request body, reply body)
+MESSAGES = {
+    "EEER": (650, False, lambda rng, event: {"CEID": event, "EQPID": EQPID, "RPTID": "51",
+                                             "TEMP_INFO": rng.choice(_TEMP_INFOS)},
+             lambda rng, event: {"EQPID": EQPID, "CEID": event, "ACK": "0", "RINFO": "", "HOSTMSG": ""}),
+    "EERR": (545, True, lambda rng, event: {"EQPID": HOST_EQPID, "CEID": "651"},
+             lambda rng, event: {"ACK": "0", "EQPID": EQPID}),
+    "EAPD": (50, False, lambda rng, event: _lot(rng),
+             lambda rng, event: {"EQPID": EQPID, "ACK": "0", "HOSTMSG": ""}),
+    "ELSR": (46, False, lambda rng, event: _lot(rng, BOXTEMPLIST=None, LOTSTATE="S"),
+             lambda rng, event: {"EQPID": EQPID, "ACK": "0", "NEXTPROCESS": "N", "LSD": None}),
+    "ERSR": (23, False, lambda rng, event: _lot(rng),
+             lambda rng, event: {"EQPID": EQPID, "ACK": "0"}),
+    "ELIR": (23, False, lambda rng, event: _lot(rng, EQPTYPE="BOX"),
+             lambda rng, event: {"EQPID": EQPID, "ACK": "0", "HOSTMSG": ""}),
+    "ECMD": (7, True, lambda rng, event: {"EQPID": EQPID, "RCMD": "R"},
+             lambda rng, event: {"ACK": "0", "EQPID": EQPID, "RCMD": "R"}),
+    "EALM": (3, False, lambda rng, event: _alarm(rng),
+             lambda rng, event: {"EQPID": EQPID, "ACK": "0"}),
+    "ELNK": (2, False, lambda rng, event: {"EQPID": EQPID, "LINK": "1"},
+             lambda rng, event: {"EQPID": EQPID, "ACK": "0"}),
+    "EDNT": (2, True, lambda rng, event: {"EQPID": EQPID, "DATETIME": "20241020000000"},
+             lambda rng, event: {"ACK": "0", "EQPID": EQPID}),
+}
+
+# A few temperature blocks are reused, rendering one per record is the slowest part
+_TEMP_INFOS = [_temp_info(random.Random(seed)) for seed in range(32)]
+
+
+def parse_size(text):
+    """Bytes of a size like "10MB", "1GB" or "512K"."""
+    match = SIZE_RE.match(text.strip())
+    if match is None:
+        raise ValueError(f"Invalid size: {text!r} (expected e.g. 10MB or 1GB)")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def _equipment_body(msg_type, fields):
+    """Body as written by the equipment: tab indented, trailer on its own line."""
+    lines = [f'\t"{msg_type}" : ', "\t{"]
+    _equipment_fields(lines, fields, 2)
+    lines += ["\t}", "}"]
+    return NEWLINE.join(lines)
+
+
+def _equipment_fields(lines, fields, depth):
+    indent = "\t" * depth
+    items = list(fields.items())
+    for i, (key, value) in enumerate(items):
+        comma = "," if i + 1 < len(items) else ""
+        if isinstance(value, dict):
+            lines += [f'{indent}"{key}" : ', f"{indent}{{"]
+            _equipment_fields(lines, value, depth + 1)
+            lines.append(f"{indent}}}{comma}")
+        elif isinstance(value, list):
+            lines += [f'{indent}"{key}" : ', f"{indent}["]
+            lines += [f'{indent}\t"{item}"' + ("," if j + 1 < len(value) else "") for j, item in enumerate(value)]
+            lines.append(f"{indent}]{comma}")
+        elif value is None:
+            lines.append(f'{indent}"{key}" : null{comma}')
+        else:
+            lines.append(f'{indent}"{key}" : "{value}"{comma}')
+
+
+def _host_body(msg_type, fields):
+    """Body as written by the host: blank line between lines, trailer right after the brace."""
+    lines = ["", f'  "{msg_type}": {{']
+    items = list(fields.items())
+    for i, (key, value) in enumerate(items):
+        comma = "," if i + 1 < len(items) else ""
+        text = "null" if value is None else f'"{value}"'
+        lines += ["", f'    "{key}": {text}{comma}']
+    lines += ["", "  }", "", "}"]
+    return NEWLINE.join(lines)
+
+
+def format_record(timestamp, msg_type, from_host, transaction, fields, checksum, reply=False):
+    """One record as written to the log, ending with ETX and a newline."""
+    source, destination = ("ECP", "B_19") if from_host else ("B_19", "ECP")
+    prefix = "H" if from_host else "E"
+    kind = "RN" if reply else "SR"
+    header = (f"{timestamp} : {source} -> {destination} ( {msg_type:<6} ) : "
+              f"{STX}{prefix}{EQPID} {kind}{msg_type:<6}{transaction:04d}{{{NEWLINE}")
+    if from_host:
+        return f"{header}{_host_body(msg_type, fields)}{checksum:02d}{ETX}{NEWLINE}"
+    return f"{header}{_equipment_body(msg_type, fields)}{NEWLINE}{checksum:02d}{ETX}{NEWLINE}"
+
+
+def iter_records(seed=0, start=None):
+    """Yield records (str) forever, in time order."""
+    rng = random.Random(seed)
+    now = start or datetime(2024, 10, 20)
+    types = list(MESSAGES)
+    weights = [MESSAGES[msg_type][0] for msg_type in types]
+    transaction = rng.randrange(10000)
+    delayed = []  # [records left, msg_type, from_host, transaction, event]
+
+    while True:
+        # Most messages come in bursts within the same second
+        if rng.random() < 0.4:
+            now += timedelta(seconds=rng.randint(1, 30))
+        timestamp = now.strftime(TIMESTAMP_FORMAT)
+
+        msg_type = rng.choices(types, weights)[0]
+        _, from_host, request_body, reply_body = MESSAGES[msg_type]
+        event = rng.choice(EVENT_IDS)
+        transaction = (transaction + 1) % 10000
+        yield format_record(timestamp, msg_type, from_host, transaction, request_body(rng, event),
+                            rng.randrange(100))
+
+        chance = rng.random()
+        if chance >= REPLY_DELAYED + REPLY_LOST:
+            yield format_record(timestamp, msg_type + "_R", not from_host, transaction, reply_body(rng, event),
+                                rng.randrange(100), reply=True)
+        elif chance < REPLY_DELAYED:
+            delayed.append([rng.randint(1, MAX_REPLY_DELAY), msg_type, from_host, transaction, event])
+
+        for pending in list(delayed):
+            pending[0] -= 1
+            if pending[0] <= 0:
+                delayed.remove(pending)
+                _, pending_type, pending_host, pending_transaction, pending_event = pending
+                yield format_record(timestamp, pending_type + "_R", not pending_host, pending_transaction,
+                                    MESSAGES[pending_type][3](rng, pending_event), rng.randrange(100), reply=True)
+
+
+def generate_log(path, size, seed=0, start=None):
+    """Write whole records to ``path`` until it holds at least ``size`` bytes, returns the size."""
+    written = 0
+    buffer = []
+    buffered = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for record in iter_records(seed, start):
+            buffer.append(record)
+            buffered += len(record)
+            if buffered >= WRITE_BUFFER or written + buffered >= size:
+                f.write("".join(buffer))
+                written += buffered
+                buffer = []
+                buffered = 0
+                if written >= size:
+                    break
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic ECP/B_xx log.")
+    parser.add_argument("size", help="target size, e.g. 10MB, 1GB, 10GB")
+    parser.add_argument("path", help="output file")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (same seed, same log)")
+    parser.add_argument("--start", help="first timestamp, YYYY.MM.DD HH:MM:SS")
+    args = parser.parse_args(argv)
+
+    try:
+        size = parse_size(args.size)
+        start = datetime.strptime(args.start, TIMESTAMP_FORMAT) if args.start else None
+    except ValueError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+
+    written = generate_log(args.path, size, args.seed, start)
+    print(f"[INFO] Wrote {written} bytes to {args.path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+import hashlib
+import os
+import pickle
+import re
+from array import array
+from collections import OrderedDict
+
+from log_reader import CHUNK_SIZE, LogReader, count_lines
+from mapping_table import CACHE_DIR
+
+
+# Inverted indexes live here, one file per indexed log
+INDEX_DIR = os.path.join(CACHE_DIR, "index")
+
+# Bump when the layout changes, old index files are then rebuilt
+INDEX_FORMAT = 2
+
+# Postings point to line-aligned blocks of about this size (in bytes)
+BLOCK_SIZE = 4 * 1024
+
+# Bytes hashed at the start and at the end of the indexed data to notice
+# that a log was rotated or rewritten
+HEAD_SIZE = 4 * 1024
+
+# Length of the n-grams that find the indexed tokens containing a search token
+TOKEN_NGRAM_SIZE = 3
+
+# Share of the blocks beyond which reading the candidates one by one is
+# slower than scanning the whole file
+MAX_CANDIDATE_SHARE = 0.5
+
+TOKEN_RE = re.compile(rb'[A-Za-z0-9_]+')
+
+# Indexes loaded in this process, by path: the most recently searched ones
+# stay in memory, so a repeated search neither loads its index nor builds
+# the n-gram table again
+OPEN_INDEXES = 4
+_open_indexes = OrderedDict()
+
+
+class LogIndex:
+    """Persistent inverted index of one log file: token -> blocks containing it.
+
+    A block is ~4 KB of whole lines. Searching only reads the candidate blocks
+    and runs the real matcher on them, so results are exactly those of a full
+    scan. Appended data is indexed incrementally, a shrunk or rewritten file
+    is indexed again from scratch.
+
+    A search token may sit inside a longer indexed token, the indexed tokens
+    containing it are found through an n-gram table of the vocabulary that
+    is built on the first search and not stored. ``open`` keeps the
+    indexes of the last searched logs loaded.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.clear()
+
+    def clear(self):
+        self.size = 0
+        self.mtime = 0
+        self.head = b''
+        self.tail = b''
+        self.indexed_size = 0
+        self.line_count = 0
+        self.block_offsets = array('Q')
+        self.block_lines = array('Q')
+        self.postings = {}
+        self.token_grams = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["token_grams"] = None  # cheap to rebuild, large to store
+        return state
+
+    @classmethod
+    def open(cls, path):
+        """Return the index of a log brought up to date: kept in memory, stored, or new."""
+        key = os.path.abspath(path)
+        index = _open_indexes.pop(key, None)
+        if index is None:
+            index = cls._load(path)
+
+        index.path = path
+        if index.update():
+            index.save()
+        _open_indexes[key] = index
+        if len(_open_indexes) > OPEN_INDEXES:
+            _open_indexes.popitem(last=False)
+        return index
+
+    @classmethod
+    def _load(cls, path):
+        try:
+            with open(index_path(path), 'rb') as f:
+                index_format, index = pickle.load(f)
+            if index_format == INDEX_FORMAT and os.path.abspath(index.path) == os.path.abspath(path):
+                return index
+        except Exception:
+            pass  # missing or unreadable index
+        return cls(path)
+
+    def is_current(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime
+
+    def update(self):
+        """Index new data, returns True when the index changed."""
+        if self.is_current():
+            return False
+
+        stat = os.stat(self.path)
+        with LogReader(self.path) as reader:
+            head = hashlib.sha1(reader.read(0, HEAD_SIZE)).digest()
+            # Only a grown file whose indexed data still starts and ends the same is an append,
+            # a changed file of the same size was rewritten in place
+            appended = (self.indexed_size and reader.size > self.size and head == self.head
+                        and self._tail(reader) == self.tail)
+            if not appended:
+                self.clear()
+            self.head = head
+
+            self._index_range(reader, self.indexed_size, reader.size)
+            self.tail = self._tail(reader)
+
+        self.size = reader.size
+        self.mtime = stat.st_mtime_ns
+        self.token_grams = None
+        return True
+
+    def _tail(self, reader):
+        return hashlib.sha1(reader.read(max(0, self.indexed_size - HEAD_SIZE), self.indexed_size)).digest()
+
+    def _index_range(self, reader, start, end):
+        line_number = self.line_count + 1
+        for offset, chunk in reader.iter_chunks(start, end):
+            # A trailing line without newline may still be growing, keep it for later
+            if offset + len(chunk) == end and not chunk.endswith(b'\n'):
+                chunk = chunk[:chunk.rfind(b'\n') + 1]
+                if not chunk:
+                    break
+
+            position = 0
+            while position < len(chunk):
+                stop = chunk.find(b'\n', position + BLOCK_SIZE - 1)
+                stop = len(chunk) if stop < 0 else stop + 1
+                block = chunk[position:stop]
+
+                block_id = len(self.block_offsets)
+                self.block_offsets.append(offset + position)
+                self.block_lines.append(line_number)
+                for token in set(TOKEN_RE.findall(block.lower())):
+                    postings = self.postings.get(token)
+                    if postings is None:
+                        postings = self.postings[token] = array('I')
+                    postings.append(block_id)
+
+                line_number += count_lines(block)
+                position = stop
+
+            self.indexed_size = offset + len(chunk)
+
+        self.line_count = line_number - 1
+
+    def save(self):
+        try:
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            target = index_path(self.path)
+            tmp_file = f"{target}.{os.getpid()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                pickle.dump((INDEX_FORMAT, self), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, target)
+        except OSError as e:
+            print(f"[ERROR] Failed to save search index for {self.path}: {e}")
+
+    def candidate_blocks(self, terms):
+        """Sorted ids of the blocks that may contain one of the terms.
+
+        None when the index does not narrow the search down enough, the file
+        is then faster scanned as a whole.
+        """
+        limit = MAX_CANDIDATE_SHARE * len(self.block_offsets)
+        candidates = set()
+        for term in terms:
+            blocks = self._term_blocks(term.encode('utf-8').lower())
+            if blocks is None:
+                return None
+            candidates |= blocks
+            if len(candidates) > limit:
+                return None
+        return sorted(candidates)
+
+    def _term_blocks(self, term):
+        tokens = set(TOKEN_RE.findall(term))
+        if not tokens:
+            return None  # nothing indexable in the term, every block is a candidate
+
+        result = None
+        for token in tokens:
+            blocks = set()
+            for indexed_token in self._tokens_containing(token):
+                blocks.update(self.postings[indexed_token])
+            result = blocks if result is None else result & blocks
+            if not result:
+                break
+        return result
+
+    def _tokens_containing(self, token):
+        """Indexed tokens that contain ``token`` (terms are substrings, not whole tokens)."""
+        if len(token) < TOKEN_NGRAM_SIZE:
+            return [indexed_token for indexed_token in self.postings if token in indexed_token]
+
+        if self.token_grams is None:
+            self.token_grams = {}
+            for indexed_token in self.postings:
+                for gram in {indexed_token[i:i + TOKEN_NGRAM_SIZE]
+                             for i in range(len(indexed_token) - TOKEN_NGRAM_SIZE + 1)}:
+                    self.token_grams.setdefault(gram, []).append(indexed_token)
+
+        # Every token containing it has all of its n-grams, the rarest one gives the fewest to check
+        rarest = None
+        for i in range(len(token) - TOKEN_NGRAM_SIZE + 1):
+            with_gram = self.token_grams.get(token[i:i + TOKEN_NGRAM_SIZE])
+            if with_gram is None:
+                return []
+            if rarest is None or len(with_gram) < len(rarest):
+                rarest = with_gram
+        return [indexed_token for indexed_token in rarest if token in indexed_token]
+
+    def iter_blocks(self, reader, block_ids):
+        """Yield (offset, first line number, bytes) for the given sorted blocks.
+
+        Adjacent blocks are read together, up to CHUNK_SIZE bytes at a time.
+        """
+        position = 0
+        while position < len(block_ids):
+            first = last = block_ids[position]
+            start = self.block_offsets[first]
+            position += 1
+            while (position < len(block_ids) and block_ids[position] == last + 1
+                   and self.block_offsets[last + 1] - start < CHUNK_SIZE):
+                last = block_ids[position]
+                position += 1
+            end = self.block_offsets[last + 1] if last + 1 < len(self.block_offsets) else self.indexed_size
+            yield start, self.block_lines[first], reader.read(start, end)
+
+
+def index_path(path):
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+    return os.path.join(INDEX_DIR, f"{digest}.idx")
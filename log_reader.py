@@ -0,0 +1,639 @@
+import bz2
+import importlib.util
+import lzma
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+
+# Default size of a chunk handed to the scanner (in bytes)
+CHUNK_SIZE = 4 * 1024 * 1024
+
+# Distance between two checkpoints of a line index (in bytes)
+INDEX_STEP = 64 * 1024
+
+# Sidecar file written next to a log: "<log>.lidx"
+INDEX_SUFFIX = ".lidx"
+INDEX_MAGIC = b"LIDX1"
+INDEX_HEADER = struct.Struct("<5sQQQ")  # magic, file size, mtime (ns), checkpoints
+
+# Line indexes built in this process, by path
+_index_cache = {}
+
+# Compressed logs: uncompressed data is handled in blocks of this size,
+# the most recently used ones are kept in memory
+BLOCK_SIZE = 1024 * 1024
+BLOCK_CACHE = 16
+
+# Distance between two decompressor snapshots of a gzip log (uncompressed bytes)
+CHECKPOINT_STEP = 4 * 1024 * 1024
+
+# Compressed data handed to a decompressor at a time
+INPUT_SIZE = 64 * 1024
+
+# Checkpoint indexes built in this process, by path
+_checkpoint_cache = {}
+
+
+class LogReader:
+    """Read-only, memory-mapped view of a log file.
+
+    Shared by the scanner and the result viewer. Data is only ever copied
+    out in line-aligned chunks, so memory use stays flat for any file size.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self.file_size = self.size  # on disk, differs for compressed logs
+
+        # mmap refuses empty files
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    compressed = False
+
+    def read(self, start, end):
+        if self._map is None:
+            return b''
+        return self._map[start:min(end, self.size)]
+
+    def disk_offset(self, offset):
+        """Bytes of the file on disk read to get up to ``offset``."""
+        return offset
+
+    def read_line(self, offset):
+        """The line starting at ``offset``, without its newline."""
+        if self._map is None or offset >= self.size:
+            return b''
+        end = self._map.find(b'\n', offset)
+        return self._map[offset:end if end >= 0 else self.size]
+
+    def iter_chunks(self, start=0, end=None, chunk_size=CHUNK_SIZE):
+        """Yield (offset, data) chunks of bytes [start, end) that end on a line boundary."""
+        end = self.size if end is None else min(end, self.size)
+        position = start
+
+        while position < end:
+            stop = position + chunk_size
+            if stop >= end:
+                stop = end
+            else:
+                newline = self._map.find(b'\n', stop - 1, end)
+                stop = end if newline < 0 else newline + 1
+
+            yield position, self._map[position:stop]
+            position = stop
+
+    def read_context(self, line_num, before=5, after=5, index=None):
+        """Return [(number, text)] for the lines around ``line_num`` (1-based).
+
+        With a LineIndex only the bytes between the nearest checkpoint and
+        the wanted lines are read.
+        """
+        first = max(1, line_num - before)
+        last = line_num + after
+
+        if index is None:
+            index = self.build_index()
+        line_start, offset = index.locate(first)
+
+        # Walk forward from the checkpoint to the first wanted line
+        for chunk_offset, chunk in self.iter_chunks(offset, chunk_size=INDEX_STEP):
+            chunk_lines = count_lines(chunk)
+            if first >= line_start + chunk_lines:
+                line_start += chunk_lines
+                continue
+
+            position = 0
+            for _ in range(first - line_start):
+                position = chunk.find(b'\n', position) + 1
+            return self._read_lines(chunk_offset + position, first, last - first + 1)
+
+        return []
+
+    def build_index(self):
+        index = LineIndex(self.file_size, file_mtime(self.path))
+        line_number = 1
+        for offset, chunk in self.iter_chunks():
+            index.add_chunk(offset, line_number, chunk)
+            line_number += count_lines(chunk)
+        return index
+
+    def _read_lines(self, offset, first, count):
+        context = []
+        for _, chunk in self.iter_chunks(offset, chunk_size=64 * 1024):
+            for line in split_lines(chunk):
+                context.append((first + len(context), line.decode('utf-8', errors='ignore')))
+                if len(context) == count:
+                    return context
+        return context
+
+
+class CorruptLogError(OSError):
+    """Compressed data of a log that cannot be decompressed (corrupt or cut off)."""
+
+
+class Compression:
+    """A compressed log format: file suffix and a factory for stream decompressors."""
+
+    def __init__(self, suffix, new_decompressor, limited=False, snapshots=False):
+        self.suffix = suffix
+        self.new_decompressor = new_decompressor
+        self.limited = limited  # decompress() takes max_length and keeps the rest as unconsumed_tail
+        self.snapshots = snapshots  # decompressors can be copied, so decompression can resume anywhere
+
+
+def _zstd_decompressor():
+    import zstandard  # optional, only needed for .zst logs
+
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+COMPRESSIONS = [
+    Compression(".gz", lambda: zlib.decompressobj(16 + zlib.MAX_WBITS), limited=True, snapshots=True),
+    Compression(".bz2", bz2.BZ2Decompressor),
+    Compression(".xz", lzma.LZMADecompressor),
+]
+if importlib.util.find_spec("zstandard") is not None:
+    COMPRESSIONS.append(Compression(".zst", _zstd_decompressor))
+
+# Suffixes of the log files that can be opened, e.g. for a file dialog filter
+LOG_SUFFIXES = [".log"] + [".log" + compression.suffix for compression in COMPRESSIONS]
+
+
+def compression_for(path):
+    """The Compression of a log file, None for a plain log."""
+    name = path.lower()
+    for compression in COMPRESSIONS:
+        if name.endswith(compression.suffix):
+            return compression
+    return None
+
+
+def is_compressed(path):
+    return compression_for(path) is not None
+
+
+def is_log_file(path):
+    return path.lower().endswith(tuple(LOG_SUFFIXES))
+
+
+def open_log(path):
+    """LogReader for a plain log, CompressedLogReader for a compressed one."""
+    compression = compression_for(path)
+    if compression is None:
+        return LogReader(path)
+    return CompressedLogReader(path, compression)
+
+
+class CheckpointIndex:
+    """Where decompression of a compressed log can resume.
+
+    A checkpoint is (uncompressed offset, compressed offset, decompressor).
+    gzip gets one every CHECKPOINT_STEP bytes (a copy of the zlib state,
+    ~40 KB each). Every format gets one at the start of each concatenated
+    stream (gzip members, pbzip2/pxz/pzstd output), where a new decompressor
+    can start.
+    """
+
+    def __init__(self, file_size=0, mtime=0):
+        self.file_size = file_size
+        self.mtime = mtime
+        self.offsets = [0]
+        self.states = [(0, None)]
+        self.end = None  # uncompressed size, once the end was reached
+
+    def add(self, offset, compressed_offset, decompressor):
+        if offset > self.offsets[-1]:
+            self.offsets.append(offset)
+            self.states.append((compressed_offset, decompressor.copy() if decompressor else None))
+
+    def locate(self, offset):
+        """Nearest checkpoint (offset, compressed offset, decompressor or None) at or before ``offset``."""
+        i = bisect_right(self.offsets, offset) - 1
+        compressed_offset, decompressor = self.states[i]
+        return self.offsets[i], compressed_offset, decompressor.copy() if decompressor else None
+
+
+class _DecompressStream:
+    """Sequential decompression of a file from a checkpoint, handed out in bounded pieces."""
+
+    def __init__(self, file, compression, checkpoints, offset=0, compressed_offset=0, decompressor=None):
+        self._file = file
+        self._compression = compression
+        self._checkpoints = checkpoints
+        self._decompressor = decompressor or compression.new_decompressor()
+        self._in_stream = decompressor is not None  # inside a compressed stream, so its end must follow
+        self._read_pos = compressed_offset
+        self._input = b''  # read from the file, not consumed by the decompressor yet
+        self._output = b''  # decompressed, not handed out yet
+        self.offset = offset  # uncompressed offset of the next byte handed out
+
+    @property
+    def compressed_offset(self):
+        return self._read_pos - len(self._input)
+
+    @property
+    def decompressor(self):
+        return self._decompressor
+
+    def read(self, limit):
+        """Up to ``limit`` next bytes, b'' at the end of the file."""
+        while True:
+            if self._output:
+                piece, self._output = self._output[:limit], self._output[limit:]
+                self.offset += len(piece)
+                return piece
+
+            if not self._input:
+                self._file.seek(self._read_pos)
+                self._input = self._file.read(INPUT_SIZE)
+                self._read_pos += len(self._input)
+                if not self._input:
+                    if self._in_stream and getattr(self._decompressor, "eof", True) is False:
+                        raise CorruptLogError("compressed data ends unexpectedly")
+                    return b''
+
+            decompressor = self._decompressor
+            self._in_stream = True
+            try:
+                if self._compression.limited:
+                    self._output = decompressor.decompress(self._input, limit)
+                    self._input = decompressor.unconsumed_tail
+                else:
+                    self._output = decompressor.decompress(self._input)
+                    self._input = b''
+            except Exception as e:  # zlib.error, lzma.LZMAError, OSError of bz2, zstandard.ZstdError, ...
+                raise CorruptLogError(f"corrupt compressed data ({e})") from e
+
+            if getattr(decompressor, "eof", False):
+                # Concatenated streams (gzip members, bz2/xz streams) follow each other
+                # (zlib also leaves the same bytes in unconsumed_tail)
+                self._input = decompressor.unused_data
+                self._decompressor = self._compression.new_decompressor()
+                self._in_stream = False
+                self._checkpoints.add(self.offset + len(self._output), self.compressed_offset, None)
+
+
+class CompressedLogReader(LogReader):
+    """Read-only view of a gzip/bz2/xz/zstd log, addressed by uncompressed offsets.
+
+    Data is decompressed as a stream in blocks, the recently used blocks are
+    cached. Reading forward continues the running stream, seeking back
+    resumes from the nearest checkpoint (see CheckpointIndex), which is
+    shared by every reader of the file in this process.
+    """
+
+    compressed = True
+
+    def __init__(self, path, compression=None):
+        self.path = path
+        self.compression = compression or compression_for(path)
+        self._file = open(path, 'rb')
+        stat = os.fstat(self._file.fileno())
+        self.file_size = stat.st_size
+        self._map = None
+
+        self.checkpoints = _checkpoint_cache.get(path)
+        if self.checkpoints is None or (self.checkpoints.file_size, self.checkpoints.mtime) != \
+                (stat.st_size, stat.st_mtime_ns):
+            self.checkpoints = _checkpoint_cache[path] = CheckpointIndex(stat.st_size, stat.st_mtime_ns)
+
+        self._stream = None
+        self._blocks = OrderedDict()
+
+    @property
+    def size(self):
+        """Uncompressed size, decompresses the whole file the first time."""
+        if self.checkpoints.end is None:
+            block = max(self.checkpoints.offsets[-1] // BLOCK_SIZE, 0)
+            while self._block(block):
+                block += 1
+        return self.checkpoints.end
+
+    def close(self):
+        self._stream = None
+        self._blocks.clear()
+        self._file.close()
+
+    def disk_offset(self, offset):
+        return self._stream.compressed_offset if self._stream else 0
+
+    def read(self, start, end=None):
+        pieces = []
+        block = start // BLOCK_SIZE
+        position = start
+        while end is None or position < end:
+            data = self._block(block)
+            block_start = block * BLOCK_SIZE
+            piece = data[position - block_start:None if end is None else end - block_start]
+            if piece:
+                pieces.append(piece)
+                position += len(piece)
+            if len(data) < BLOCK_SIZE:
+                break
+            block += 1
+        return b''.join(pieces)
+
+    def read_line(self, offset):
+        line = []
+        block = offset // BLOCK_SIZE
+        start = offset - block * BLOCK_SIZE
+        while True:
+            data = self._block(block)
+            newline = data.find(b'\n', start)
+            if newline >= 0:
+                line.append(data[start:newline])
+                break
+            line.append(data[start:])
+            if len(data) < BLOCK_SIZE:
+                break
+            block += 1
+            start = 0
+        return b''.join(line)
+
+    def iter_chunks(self, start=0, end=None, chunk_size=CHUNK_SIZE):
+        position = start
+        while end is None or position < end:
+            stop = position + chunk_size if end is None else min(position + chunk_size, end)
+            data = self.read(position, stop)
+            if not data:
+                break
+
+            if len(data) == stop - position and stop != end and not data.endswith(b'\n'):
+                # Complete the last line
+                rest = self.read_line(stop)
+                data += rest
+                if stop + len(rest) < (self.checkpoints.end or sys.maxsize):
+                    data += b'\n'
+                if end is not None:
+                    data = data[:end - position]
+
+            yield position, data
+            position += len(data)
+
+    def _block(self, number):
+        """Uncompressed bytes [number * BLOCK_SIZE, (number + 1) * BLOCK_SIZE), shorter at the end."""
+        data = self._blocks.get(number)
+        if data is not None:
+            self._blocks.move_to_end(number)
+            return data
+
+        start = number * BLOCK_SIZE
+        end = self.checkpoints.end
+        if end is not None and start >= end:
+            return b''
+
+        checkpoint = self.checkpoints.locate(start)
+        stream = self._stream
+        if stream is None or stream.offset > start or checkpoint[0] > stream.offset:
+            stream = self._stream = _DecompressStream(self._file, self.compression, self.checkpoints, *checkpoint)
+            # Stream starts are not block aligned, skip to the next block
+            while stream.offset % BLOCK_SIZE:
+                if not stream.read(BLOCK_SIZE - stream.offset % BLOCK_SIZE):
+                    break
+
+        while True:
+            block_start = stream.offset
+            pieces = []
+            size = 0
+            while size < BLOCK_SIZE:
+                piece = stream.read(BLOCK_SIZE - size)
+                if not piece:
+                    break
+                pieces.append(piece)
+                size += len(piece)
+            data = b''.join(pieces)
+
+            self._blocks[block_start // BLOCK_SIZE] = data
+            if len(self._blocks) > BLOCK_CACHE:
+                self._blocks.popitem(last=False)
+
+            if size < BLOCK_SIZE:
+                self.checkpoints.end = block_start + size
+            elif self.compression.snapshots and stream.offset % CHECKPOINT_STEP == 0:
+                self.checkpoints.add(stream.offset, stream.compressed_offset, stream.decompressor)
+
+            if block_start >= start or size < BLOCK_SIZE:
+                return data if block_start == start else b''
+
+
+def split_lines(chunk):
+    """Split a line-aligned chunk into lines without their trailing newline."""
+    lines = chunk.split(b'\n')
+    if lines[-1] == b'':
+        lines.pop()
+    return lines
+
+
+def count_lines(chunk):
+    """Number of lines in a line-aligned chunk (a last line without newline counts too)."""
+    if not chunk:
+        return 0
+    return chunk.count(b'\n') + (0 if chunk.endswith(b'\n') else 1)
+
+
+class LineIndex:
+    """Sparse line number -> byte offset index of a log file.
+
+    Keeps one checkpoint (first line after every ~64 KB) in two arrays, a few
+    hundred KB for a multi-GB log, so the viewer can seek straight to a line.
+    """
+
+    def __init__(self, size=0, mtime=0, start_offset=0):
+        self.size = size
+        self.mtime = mtime
+        self.lines = array('Q', [1])
+        self.offsets = array('Q', [start_offset])
+        self._next_offset = start_offset + INDEX_STEP
+
+    def add_chunk(self, offset, first_line, chunk):
+        """Add the checkpoints of a line-aligned chunk whose first line is ``first_line``."""
+        line_number = first_line
+        counted = 0
+
+        while self._next_offset < offset + len(chunk):
+            target = self._next_offset - offset
+            if target <= 0:
+                position = 0
+            else:
+                newline = chunk.find(b'\n', target - 1)
+                if newline < 0 or newline + 1 >= len(chunk):
+                    break
+                position = newline + 1
+
+            line_number += chunk.count(b'\n', counted, position)
+            counted = position
+            self.lines.append(line_number)
+            self.offsets.append(offset + position)
+            self._next_offset = offset + position + INDEX_STEP
+
+    def extend(self, other, line_base):
+        """Append the checkpoints of a following segment, its line numbers are shifted by ``line_base``."""
+        self.lines.extend(line + line_base for line in other.lines)
+        self.offsets.extend(other.offsets)
+        self._next_offset = other._next_offset
+
+    def locate(self, line_num):
+        """Nearest checkpoint (line number, offset) at or before ``line_num``."""
+        i = max(0, bisect_right(self.lines, line_num) - 1)
+        return self.lines[i], self.offsets[i]
+
+    def line_at(self, reader, offset):
+        """Number of the line starting at byte ``offset``, counted from the nearest checkpoint."""
+        i = max(0, bisect_right(self.offsets, offset) - 1)
+        return self.lines[i] + reader.read(self.offsets[i], offset).count(b'\n')
+
+    def is_valid_for(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime
+
+    def is_prefix_of(self, reader):
+        """Whether the file only grew since the index was built (its last checkpoint still starts a line)."""
+        last = self.offsets[-1]
+        return (not reader.compressed and reader.size > self.size
+                and (last == 0 or reader.read(last - 1, last) == b'\n'))
+
+    def grown(self, reader):
+        """Copy extended over the data appended since, counted from the last checkpoint on."""
+        index = LineIndex(reader.file_size, file_mtime(reader.path), self.offsets[-1])
+        index.lines = array('Q', self.lines)
+        index.offsets = array('Q', self.offsets)
+        line_number = self.lines[-1]
+        for offset, chunk in reader.iter_chunks(self.offsets[-1]):
+            index.add_chunk(offset, line_number, chunk)
+            line_number += count_lines(chunk)
+        return index
+
+    def save(self, path):
+        lines, offsets = self.lines, self.offsets
+        if sys.byteorder == 'big':
+            lines, offsets = array('Q', lines), array('Q', offsets)
+            lines.byteswap()
+            offsets.byteswap()
+
+        with open(path, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, self.size, self.mtime, len(lines)))
+            f.write(lines.tobytes())
+            f.write(offsets.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            magic, size, mtime, count = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+            if magic != INDEX_MAGIC:
+                raise ValueError(f"Not a line index: {path}")
+
+            index = cls(size, mtime)
+            index.lines = array('Q')
+            index.lines.frombytes(f.read(count * 8))
+            index.offsets = array('Q')
+            index.offsets.frombytes(f.read(count * 8))
+
+        if sys.byteorder == 'big':
+            index.lines.byteswap()
+            index.offsets.byteswap()
+        if len(index.lines) != count or len(index.offsets) != count:
+            raise ValueError(f"Truncated line index: {path}")
+        return index
+
+
+def store_line_index(path, index, persist=False):
+    """Keep the index for this process, and optionally write it next to the log."""
+    _index_cache[path] = index
+    if persist:
+        try:
+            index.save(path + INDEX_SUFFIX)
+        except OSError as e:
+            print(f"[ERROR] Failed to save line index for {path}: {e}")
+
+
+def line_index_for(path, reader=None, scanned_size=None):
+    """Return a valid LineIndex for the file: from memory, from the sidecar, or freshly built.
+
+    With ``scanned_size`` the index kept by a scan of the first
+    ``scanned_size`` bytes is accepted too, even when data was appended since.
+    The index of a file that only grew is extended over the new data rather
+    than built again.
+    """
+    index = known_line_index(path, scanned_size)
+    if index is not None:
+        return index
+
+    if reader is None:
+        with open_log(path) as reader:
+            index = _updated_line_index(path, reader)
+    else:
+        index = _updated_line_index(path, reader)
+    _index_cache[path] = index
+    return index
+
+
+def _updated_line_index(path, reader):
+    index = _index_cache.get(path) or _load_line_index(path)
+    if index is not None and index.is_prefix_of(reader):
+        return index.grown(reader)
+    return reader.build_index()
+
+
+def known_line_index(path, scanned_size=None):
+    """The LineIndex of the file kept in memory or in its sidecar, None when there is none (nothing is built)."""
+    index = _index_cache.get(path)
+    if index is not None and (index.is_valid_for(path) or index.size == scanned_size):
+        return index
+
+    index = _load_line_index(path)
+    if index is not None and index.is_valid_for(path):
+        _index_cache[path] = index
+        return index
+    return None
+
+
+def _load_line_index(path):
+    try:
+        return LineIndex.load(path + INDEX_SUFFIX)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def line_number_at(path, reader, offset):
+    """Number of the line starting at byte ``offset``.
+
+    Uses a known line index, otherwise counts the newlines before ``offset``
+    without building one (a fraction of the work for a single number).
+    """
+    index = known_line_index(path)
+    if index is not None:
+        return index.line_at(reader, offset)
+    count = 1
+    for position in range(0, offset, CHUNK_SIZE):
+        count += reader.read(position, min(position + CHUNK_SIZE, offset)).count(b'\n')
+    return count
+
+
+def file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
@@ -0,0 +1,416 @@
+import json
+import re
+from datetime import datetime
+
+from log_reader import CHUNK_SIZE
+
+
+# Start of every record: "YYYY.MM.DD HH:MM:SS : "
+RECORD_START_RE = re.compile(rb'^\d{4}\.\d{2}\.\d{2} \d{2}:\d{2}:\d{2} : ', re.M)
+
+# Full header line, e.g. "2024.10.20 00:00:57 : ECP -> B_19 ( EERR   ) : HU1FJGF06302-002-003 SREERR  6461{"
+HEADER_RE = re.compile(
+    rb'^(\d{4}\.\d{2}\.\d{2} \d{2}:\d{2}:\d{2}) : (\S+) (<?->) (\S+) \( *([^ )]*) *\) *:([^\n]*)',
+    re.M
+)
+
+TIMESTAMP_FORMAT = "%Y.%m.%d %H:%M:%S"
+TIMESTAMP_LENGTH = 19
+
+# A time window bound as typed by the user: "2024.10.20 02:00", "02:00:30", ...
+TIME_BOUND_RE = re.compile(r'^(?:(\d{4})[.\-/](\d{1,2})[.\-/](\d{1,2})\s+)?(\d{1,2}):(\d{2})(?::(\d{2}))?$')
+
+# Bytes read at a time when looking for the next record header
+HEADER_WINDOW = 64 * 1024
+
+# Body fields that are cheap to pull out without decoding the JSON
+EQPID_RE = re.compile(rb'"EQPID"\s*:\s*"([^"]*)"')
+CEID_RE = re.compile(rb'"CEID"\s*:\s*"([^"]*)"')
+
+# Error codes looked up in the mapping table: the alarm id, else the event id
+CODE_RE = re.compile(rb'"(ALID|CEID)"\s*:\s*"?([^",\s}]+)')
+
+# Bytes read around a hit line when looking for its record, doubled while too small
+RECORD_WINDOW = 2 * 1024
+MAX_RECORD_WINDOW = 64 * 1024
+
+# Header info after the type, e.g. "HU1FJGF06302-002-003 SREERR  6461{":
+# equipment, SR (send) / RN (reply), type padded to 6 chars, 4 digit transaction
+INFO_RE = re.compile(r'^(\S*) ([A-Z]{2})(.{6})(\d{4})')
+
+# Records are framed by STX (after the header) and ETX (after the length)
+FRAME_CHARS = '\x02\x03'
+
+# Field names accepted in a record query ("type=EALM; eqpid=U1FJGF06302-002-003")
+QUERY_FIELDS = {
+    "type": "msg_type",
+    "source": "source",
+    "src": "source",
+    "dest": "destination",
+    "dst": "destination",
+    "eqpid": "eqpid",
+    "ceid": "ceid",
+}
+
+
+_INVALID_BODY = object()
+
+
+class LogRecord:
+    """One ECP/B_xx message: a header line, a JSON body and a trailing length.
+
+    Header fields are parsed up front, the body is only decoded on access.
+    """
+
+    __slots__ = ("path", "offset", "line", "timestamp", "source", "direction", "destination",
+                 "msg_type", "info", "raw", "_body")
+
+    def __init__(self, path, offset, line, header_match, raw):
+        self.path = path
+        self.offset = offset
+        self.line = line
+        self.timestamp = header_match.group(1).decode('ascii')
+        self.source = header_match.group(2).decode('utf-8', errors='ignore')
+        self.direction = header_match.group(3).decode('ascii')
+        self.destination = header_match.group(4).decode('utf-8', errors='ignore')
+        self.msg_type = header_match.group(5).decode('utf-8', errors='ignore')
+        self.info = header_match.group(6).decode('utf-8', errors='ignore').strip().strip(FRAME_CHARS)
+        self.raw = raw
+        self._body = None
+
+    @property
+    def header(self):
+        end = self.raw.find(b'\n')
+        return self.raw[:end if end >= 0 else len(self.raw)].decode('utf-8', errors='ignore').strip()
+
+    @property
+    def time(self):
+        return datetime.strptime(self.timestamp, TIMESTAMP_FORMAT)
+
+    @property
+    def channel(self):
+        return f"{self.source} {self.direction} {self.destination}"
+
+    @property
+    def transaction(self):
+        match = INFO_RE.match(self.info)
+        return match.group(4) if match else None
+
+    @property
+    def body_text(self):
+        header_end = self.raw.find(b'\n')
+        start = self.raw.find(b'{', 0, header_end if header_end >= 0 else len(self.raw))
+        if start < 0:
+            return ""
+        body = self.raw[start:].rstrip()
+        # Drop the trailing length number
+        end = body.rfind(b'}')
+        return body[:end + 1].decode('utf-8', errors='ignore') if end >= 0 else ""
+
+    @property
+    def length(self):
+        """Trailing length number, written right after the body (or the transaction)."""
+        tail = self.raw.decode('utf-8', errors='ignore').rstrip().rstrip(FRAME_CHARS)
+        end = tail.rfind('}')
+        if end >= 0:
+            digits = tail[end + 1:].strip()
+        else:
+            match = INFO_RE.match(self.info)
+            digits = self.info[match.end():] if match else ""
+        return int(digits) if digits.isdigit() else None
+
+    @property
+    def body(self):
+        """Decoded JSON body, None when there is no body or it is not valid JSON."""
+        if self._body is None:
+            try:
+                self._body = json.loads(self.body_text)
+            except ValueError:
+                self._body = _INVALID_BODY
+        return None if self._body is _INVALID_BODY else self._body
+
+    @property
+    def eqpid(self):
+        match = EQPID_RE.search(self.raw)
+        return match.group(1).decode('utf-8', errors='ignore') if match else None
+
+    @property
+    def ceid(self):
+        match = CEID_RE.search(self.raw)
+        return match.group(1).decode('utf-8', errors='ignore') if match else None
+
+    @property
+    def code(self):
+        return record_code(self.raw)
+
+
+def record_code(data):
+    """Error code of a record's bytes: its ALID, else its CEID, None when there is neither."""
+    code = None
+    for match in CODE_RE.finditer(data):
+        if match.group(1) == b'ALID':
+            return match.group(2).decode('utf-8', errors='ignore')
+        if code is None:
+            code = match.group(2).decode('utf-8', errors='ignore')
+    return code
+
+
+def record_around(reader, offset, end=None):
+    """Bytes of the record containing the line at ``offset``.
+
+    Reads a small window around the line and widens it until the record
+    header before and the next header after are both in it.
+    """
+    end = reader.size if end is None and not reader.compressed else end
+    window = RECORD_WINDOW
+    while True:
+        base = max(0, offset - window)
+        stop = offset + window if end is None else min(end, offset + window)
+        data = reader.read(base, stop)
+        line_start = offset - base
+
+        starts = [match.start() for match in RECORD_START_RE.finditer(data)
+                  if match.start() > 0 or base == 0]
+        before = [start for start in starts if start <= line_start]
+        after = [start for start in starts if start > line_start]
+        at_end = base + len(data) < stop or stop == end
+        if (before or base == 0) and (after or at_end) or window >= MAX_RECORD_WINDOW:
+            record_start = before[-1] if before else 0
+            record_end = after[0] if after else len(data)
+            return data[record_start:record_end]
+        window *= 2
+
+
+class RecordParser:
+    """Incremental parser, fed with line-aligned chunks in file order.
+
+    The unfinished last record of a chunk is carried over to the next one,
+    so memory use is bounded by the chunk size plus one record.
+    """
+
+    def __init__(self, path=None, first_line=1):
+        self.path = path
+        self._carry = b''
+        self._carry_offset = 0
+        self._carry_line = first_line
+
+    def feed(self, offset, chunk):
+        """Return the records completed by this chunk."""
+        if self._carry:
+            data = self._carry + chunk
+            data_offset = self._carry_offset
+        else:
+            data = chunk
+            data_offset = offset
+
+        records = []
+        line = self._carry_line
+        counted = 0
+        previous = None
+
+        for match in HEADER_RE.finditer(data):
+            line += data.count(b'\n', counted, match.start())
+            counted = match.start()
+            if previous is not None:
+                records.append(self._make_record(data, data_offset, previous, match.start()))
+            previous = (match, line)
+
+        if previous is None:
+            if self._carry:
+                self._carry = data  # a record longer than a chunk
+            else:
+                self._carry_line = line + data.count(b'\n')
+            return records
+
+        match, line = previous
+        self._carry = data[match.start():]
+        self._carry_offset = data_offset + match.start()
+        self._carry_line = line
+        return records
+
+    def close(self):
+        """Return the last pending record."""
+        records = []
+        if self._carry:
+            match = HEADER_RE.match(self._carry)
+            if match:
+                records.append(LogRecord(self.path, self._carry_offset, self._carry_line, match, self._carry))
+            self._carry = b''
+        return records
+
+    def _make_record(self, data, data_offset, previous, end):
+        match, line = previous
+        start = match.start()
+        return LogRecord(self.path, data_offset + start, line, match, data[start:end])
+
+
+def iter_records(reader, start=0, end=None, first_line=1, chunk_size=CHUNK_SIZE):
+    """Stream LogRecords from a LogReader, ``start`` must be at a line start."""
+    parser = RecordParser(reader.path, first_line)
+    for offset, chunk in reader.iter_chunks(start, end, chunk_size):
+        yield from parser.feed(offset, chunk)
+    yield from parser.close()
+
+
+class RecordQuery:
+    """Field filters and plain terms parsed from the search input.
+
+    "type=EALM; eqpid=U1FJGF06302-002-003; 15031" keeps EALM records of that
+    equipment containing "15031". Values of one field are OR-ed, different
+    fields are AND-ed, plain terms are OR-ed like in a keyword search.
+    """
+
+    def __init__(self, filters, terms):
+        self.filters = filters
+        self.terms = terms
+
+    @classmethod
+    def parse(cls, search_text):
+        """Return a RecordQuery, or None when the input has no field filters."""
+        filters = {}
+        terms = []
+        for part in re.split(r'[;,]', search_text):
+            part = part.strip()
+            if not part:
+                continue
+            name, sep, value = part.partition('=')
+            name = name.strip().lower()
+            if sep and name in QUERY_FIELDS:
+                filters.setdefault(QUERY_FIELDS[name], set()).add(value.strip().lower())
+            else:
+                terms.append(part.lower())
+
+        if not filters:
+            return None
+        return cls(filters, terms)
+
+    def matches(self, record):
+        for field, values in self.filters.items():
+            value = getattr(record, field)
+            if value is None or value.lower() not in values:
+                return False
+
+        if self.terms:
+            text = record.raw.decode('utf-8', errors='ignore').lower()
+            return any(term in text for term in self.terms)
+        return True
+
+
+class TimeRange:
+    """From/to window over the record timestamps, both ends inclusive and optional.
+
+    A bound is "YYYY.MM.DD HH:MM[:SS]" or only "HH:MM[:SS]", which applies to
+    the day of the first record of each file. Missing seconds mean the whole
+    minute, so "02:00" - "02:15" includes 02:15:59.
+    """
+
+    def __init__(self, start=None, end=None):
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def parse(cls, start_text, end_text):
+        """Return a TimeRange, or None when both bounds are empty. Raises ValueError on a bad bound."""
+        start = _parse_time_bound(start_text, "00")
+        end = _parse_time_bound(end_text, "59")
+        if start is None and end is None:
+            return None
+        if start and end and len(start) == len(end) and start > end:
+            raise ValueError(f"The time range ends before it starts: {start_text} - {end_text}")
+        return cls(start, end)
+
+    def bounds(self, first_timestamp):
+        """(start, end) as comparable timestamp bytes, None for an open end."""
+        day = first_timestamp[:11].decode('ascii') if first_timestamp else ""
+        return tuple(None if bound is None else (bound if len(bound) == TIMESTAMP_LENGTH else day + bound).encode('ascii')
+                     for bound in (self.start, self.end))
+
+    def __str__(self):
+        return f"{self.start or '...'} - {self.end or '...'}"
+
+
+def _parse_time_bound(text, default_seconds):
+    text = (text or "").strip()
+    if not text:
+        return None
+
+    match = TIME_BOUND_RE.match(text)
+    if not match:
+        raise ValueError(f"Invalid time: {text} (expected YYYY.MM.DD HH:MM[:SS] or HH:MM[:SS])")
+    year, month, day, hour, minute, second = match.groups()
+    hour, minute, second = int(hour), int(minute), int(second or default_seconds)
+    if hour > 23 or minute > 59 or second > 59:
+        raise ValueError(f"Invalid time: {text}")
+
+    clock = f"{hour:02d}:{minute:02d}:{second:02d}"
+    if year is None:
+        return clock
+    if not (1 <= int(month) <= 12 and 1 <= int(day) <= 31):
+        raise ValueError(f"Invalid date: {text}")
+    return f"{year}.{int(month):02d}.{int(day):02d} {clock}"
+
+
+def find_time_range(reader, time_range, end=None):
+    """Byte range [start, end) of the records inside the time window, end None for "up to the end".
+
+    Records are written in time order, so plain logs are bisected on the
+    header timestamps and only a few KB are read per step. Compressed logs
+    cannot seek cheaply and are walked through once instead.
+    """
+    if reader.compressed:
+        return _walk_time_range(reader, time_range)
+
+    end = reader.size if end is None else end
+    start_bound, end_bound = time_range.bounds(_next_header(reader, 0, end)[1])
+    start = _bisect_headers(reader, lambda timestamp: timestamp < start_bound, end) if start_bound else 0
+    stop = _bisect_headers(reader, lambda timestamp: timestamp <= end_bound, end) if end_bound else end
+    return start, max(start, stop)
+
+
+def _bisect_headers(reader, before, end):
+    """Offset of the first record whose timestamp is not ``before``, ``end`` if there is none."""
+    low, high = 0, end
+    while low < high:
+        middle = (low + high) // 2
+        offset, timestamp = _next_header(reader, middle, end)
+        if timestamp is not None and before(timestamp):
+            low = offset + 1
+        else:
+            high = middle
+    return _next_header(reader, low, end)[0]
+
+
+def _next_header(reader, position, end):
+    """(offset, timestamp) of the first record header at or after ``position``, (end, None) if there is none."""
+    while position < end:
+        # One byte back, so a header right at ``position`` is seen as a line start
+        base = position - 1 if position else 0
+        data = reader.read(base, min(end, position + HEADER_WINDOW))
+        for match in RECORD_START_RE.finditer(data):
+            offset = base + match.start()
+            if offset >= position:
+                return offset, data[match.start():match.start() + TIMESTAMP_LENGTH]
+        if base + len(data) >= end:
+            break
+        position += HEADER_WINDOW - 64  # a header cut by the window end is found in the next one
+    return end, None
+
+
+def _walk_time_range(reader, time_range):
+    start = None
+    bounds = None
+    position = 0
+    for offset, chunk in reader.iter_chunks():
+        for match in RECORD_START_RE.finditer(chunk):
+            timestamp = chunk[match.start():match.start() + TIMESTAMP_LENGTH]
+            if bounds is None:
+                bounds = time_range.bounds(timestamp)
+            start_bound, end_bound = bounds
+
+            if start is None and (start_bound is None or timestamp >= start_bound):
+                start = offset + match.start()
+            if end_bound is not None and timestamp > end_bound:
+                stop = offset + match.start()
+                return (stop if start is None else start), stop
+        position = offset + len(chunk)
+    return (position if start is None else start), None
@@ -0,0 +1,127 @@
+from collections import Counter
+
+from log_records import EQPID_RE, HEADER_RE
+
+
+# Time buckets are timestamp prefixes: "YYYY.MM.DD HH:MM" and "YYYY.MM.DD HH"
+MINUTE_KEY_LENGTH = 16
+HOUR_KEY_LENGTH = 13
+
+
+class HitSummary:
+    """Hit counts per error code, equipment, message type, channel and time bucket.
+
+    Filled while scanning, one Counter per grouping, so memory depends on
+    the number of distinct keys and not on the number of hits. Summaries of
+    scan segments are merged with ``update``.
+    """
+
+    GROUPS = ("codes", "eqpids", "msg_types", "channels", "minutes", "hours")
+
+    def __init__(self):
+        self.total = 0
+        self.codes = Counter()
+        self.eqpids = Counter()
+        self.msg_types = Counter()
+        self.channels = Counter()
+        self.minutes = Counter()
+        self.hours = Counter()
+
+    def add(self, fields, code=None, count=1):
+        """Count one hit, ``fields`` is the record_fields() tuple of its record (or None)."""
+        self.total += count
+        keys = [(self.codes, code)]
+        if fields is not None:
+            timestamp, channel, msg_type, eqpid = fields
+            keys += [
+                (self.minutes, timestamp[:MINUTE_KEY_LENGTH]),
+                (self.hours, timestamp[:HOUR_KEY_LENGTH]),
+                (self.channels, channel),
+                (self.msg_types, msg_type),
+                (self.eqpids, eqpid),
+            ]
+        for counter, key in keys:
+            if key:
+                counter[key] += count
+                if counter[key] <= 0:
+                    del counter[key]
+
+    def remove(self, fields, code=None):
+        """Take back a hit counted by ``add``."""
+        self.add(fields, code, -1)
+
+    def update(self, other):
+        self.total += other.total
+        for group in self.GROUPS:
+            getattr(self, group).update(getattr(other, group))
+
+    def copy(self):
+        summary = HitSummary()
+        summary.update(self)
+        return summary
+
+    def top(self, group, count=10):
+        """Most frequent keys of a group as [(key, hits)]."""
+        return getattr(self, group).most_common(count)
+
+    def histogram(self, group):
+        """Time buckets of "minutes" or "hours" as [(bucket, hits)] in time order."""
+        return sorted(getattr(self, group).items())
+
+    def to_dict(self, count=None):
+        """Plain dict (e.g. for JSON): the top keys of every group and the full histograms."""
+        result = {"total": self.total}
+        for group in self.GROUPS:
+            if group in ("minutes", "hours"):
+                result[group] = dict(self.histogram(group))
+            else:
+                result[group] = dict(getattr(self, group).most_common(count))
+        return result
+
+
+def record_fields(data):
+    """(timestamp, channel, message type, EQPID) of a record's bytes, None without a header."""
+    match = HEADER_RE.match(data)
+    if match is None:
+        return None
+
+    eqpid = EQPID_RE.search(data)
+    return (
+        match.group(1).decode('ascii'),
+        " ".join(part.decode('utf-8', errors='ignore') for part in match.group(2, 3, 4)),
+        match.group(5).decode('utf-8', errors='ignore'),
+        eqpid.group(1).decode('utf-8', errors='ignore') if eqpid else None,
+    )
+
+
+# Labels of the groups in summary_text(), in display order
+GROUP_TITLES = (
+    ("codes", "Top codes"),
+    ("eqpids", "Per EQPID"),
+    ("channels", "Per channel"),
+    ("msg_types", "Per message type"),
+    ("hours", "Per hour"),
+    ("minutes", "Per minute"),
+)
+
+
+def summary_text(summary, count=10, bar_width=30):
+    """Plain text tables with bars, for a monospace view of a summary."""
+    sections = [f"Hits: {summary.total}"]
+    for group, title in GROUP_TITLES:
+        if group in ("minutes", "hours"):
+            # The most recent buckets, in time order
+            rows = summary.histogram(group)[-count:] if count else summary.histogram(group)
+        else:
+            rows = summary.top(group, count)
+        if not rows:
+            continue
+
+        key_width = max(len(str(key)) for key, _ in rows)
+        most = max(hits for _, hits in rows)
+        lines = [title]
+        for key, hits in rows:
+            bar = "#" * max(1, round(hits * bar_width / most))
+            lines.append(f"  {str(key):<{key_width}}  {hits:>8}  {bar}")
+        sections.append("\n".join(lines))
+    return "\n\n".join(sections)
@@ -0,0 +1,439 @@
+import hashlib
+import heapq
+import os
+import pickle
+import re
+from bisect import bisect_left
+from collections import Counter
+from operator import itemgetter
+
+
+MAPPING_FILE_RE = re.compile(r"mapping_table(\d+)\.xlsx")
+
+# Parsed tables are cached here, LOG_ANALYZER_CACHE overrides the location
+CACHE_DIR = os.environ.get("LOG_ANALYZER_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "log_analyzer")
+
+# Bump when MappingTable changes, old cache files are then ignored
+CACHE_FORMAT = 4
+
+# Table versions kept by MappingHistory, newest first
+MAX_HISTORY = 5
+
+# Codes returned by a search or completion
+MAX_SUGGESTIONS = 10
+
+# Length of the n-grams compared by the fuzzy search: codes are digits, so
+# short n-grams are shared by too many of them; words of causes are short
+# and typos swap letters, which trigrams punish too much
+CODE_NGRAM_SIZE = 3
+WORD_NGRAM_SIZE = 2
+
+# Words of the causes a mistyped query word may stand for
+SIMILAR_WORDS = 3
+
+# Share of the query's n-grams a fuzzy match has to contain
+MIN_SIMILARITY = 0.4
+
+# Typos (inserted, dropped, substituted or swapped characters) a mistyped code
+# may contain: a single one up to SHORT_CODE characters, else CODE_TYPOS.
+# A typo changes most n-grams of a short code, so codes are matched by edits
+SHORT_CODE = 4
+CODE_TYPOS = 2
+
+
+def ngrams(text, size):
+    """Lowercase n-grams of the words of ``text``, padded so word starts and ends count too."""
+    grams = set()
+    for word in text.lower().split():
+        padded = f" {word} "
+        grams.update(padded[i:i + size] for i in range(len(padded) - size + 1))
+    return grams
+
+
+def _ngram_index(texts, size):
+    """Posting lists (n-gram -> ids of the texts containing it) and the n-gram count of every text."""
+    postings = {}
+    sizes = []
+    for text_id, text in enumerate(texts):
+        grams = ngrams(text, size)
+        sizes.append(len(grams))
+        for gram in grams:
+            postings.setdefault(gram, []).append(text_id)
+    return postings, sizes
+
+
+def deletions(text, count):
+    """``text`` and the strings left when deleting up to ``count`` of its characters."""
+    variants = {text}
+    for _ in range(count):
+        variants |= {variant[:i] + variant[i + 1:] for variant in variants for i in range(len(variant))}
+    return variants
+
+
+def edit_distance(a, b, limit):
+    """Damerau-Levenshtein distance (adjacent swaps count once) of ``a`` and ``b``, ``limit + 1`` above ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def _similar(grams, postings, sizes, limit):
+    """Ids of the texts sharing most of ``grams``, best first, as [(score, id)]."""
+    shared = Counter()
+    for gram in grams:
+        ids = postings.get(gram)
+        if ids:
+            shared.update(ids)
+    needed = MIN_SIMILARITY * len(grams)
+    # Share of the query found in the text, then the Dice coefficient so closer lengths win ties
+    scored = (((count / len(grams), 2 * count / (len(grams) + sizes[text_id])), text_id)
+              for text_id, count in shared.items() if count >= needed)
+    return heapq.nlargest(limit, scored)
+
+
+class CodeSearchIndex:
+    """Prefix and fuzzy search over the codes and causes of a mapping table.
+
+    Codes are kept sorted (case-insensitively), so the codes starting with a
+    prefix are one bisect away. A mistyped code is found through the
+    strings left by deleting characters: a code and a query a typo or two
+    apart share one, and the candidates are ranked by their edit distance.
+    Other typos are matched by n-grams: the codes themselves, and the
+    distinct words of the causes, each word pointing to the causes that use
+    it. A cause scores the similarity of its best matching word summed over
+    the words of the query.
+    """
+
+    def __init__(self, by_code):
+        self.codes = sorted((code for code in by_code if code), key=str.lower)
+        self.keys = [code.lower() for code in self.codes]
+        self.code_postings, self.code_sizes = _ngram_index(self.codes, CODE_NGRAM_SIZE)
+        self.code_deletions = {}  # string left by deleting characters -> ids of the codes
+        for code_id, key in enumerate(self.keys):
+            for variant in deletions(key, CODE_TYPOS):
+                self.code_deletions.setdefault(variant, []).append(code_id)
+
+        codes_by_cause = {}
+        for code in self.codes:
+            codes_by_cause.setdefault(str(by_code[code]["Cause"] or "None"), []).append(code)
+        self.codes_by_cause = list(codes_by_cause.values())  # cause id -> its codes
+
+        causes_by_word = {}
+        for cause_id, cause in enumerate(codes_by_cause):
+            for word in set(cause.lower().split()):
+                causes_by_word.setdefault(word, []).append(cause_id)
+        self.words = list(causes_by_word)
+        self.causes_by_word = list(causes_by_word.values())  # word id -> ids of the causes using it
+        self.word_postings, self.word_sizes = _ngram_index(self.words, WORD_NGRAM_SIZE)
+
+    def complete(self, prefix, limit=MAX_SUGGESTIONS):
+        """Codes starting with ``prefix`` (ignoring case), in sorted order."""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        start = bisect_left(self.keys, prefix)
+        end = start
+        while end < len(self.keys) and end - start < limit and self.keys[end].startswith(prefix):
+            end += 1
+        return self.codes[start:end]
+
+    def search(self, text, limit=MAX_SUGGESTIONS):
+        """Codes matching ``text`` best first: codes starting with it, then codes or causes similar to it."""
+        found = dict.fromkeys(self.complete(text, limit))
+        words = text.lower().split()
+        if len(found) >= limit or not words:
+            return list(found)
+        if len(words) == 1:
+            for code in self._mistyped_codes(words[0], limit - len(found)):
+                found.setdefault(code)
+            if len(found) >= limit:
+                return list(found)
+
+        similar_codes = _similar(ngrams(text, CODE_NGRAM_SIZE), self.code_postings, self.code_sizes, limit)
+        candidates = [(score[0], self.codes[code_id]) for score, code_id in similar_codes]
+        for score, cause_id in self._similar_causes(words, limit):
+            candidates += [(score, code) for code in self.codes_by_cause[cause_id][:limit]]
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        for _, code in candidates:
+            if len(found) >= limit:
+                break
+            found.setdefault(code)
+        return list(found)
+
+    def _mistyped_codes(self, key, limit):
+        """Codes ``key`` may be a mistyped form of, fewest typos first."""
+        typos = 1 if len(key) <= SHORT_CODE else CODE_TYPOS
+        if len(key) <= typos:
+            return []
+        candidates = set()
+        for variant in deletions(key, typos):
+            candidates.update(self.code_deletions.get(variant, ()))
+        scored = ((edit_distance(key, self.keys[code_id], typos), code_id) for code_id in candidates)
+        close = heapq.nsmallest(limit, ((distance, abs(len(self.keys[code_id]) - len(key)), code_id)
+                                        for distance, code_id in scored if distance <= typos))
+        return [self.codes[code_id] for _, _, code_id in close]
+
+    def _similar_causes(self, words, limit):
+        """Ids of the causes best matching the query ``words``, as [(score, id)] with scores up to 1.
+
+        Causes with a match for every word come first. When there are too
+        few, the causes matching single words are added, those of the
+        rarest word first: a word in every cause (like "error") says little.
+        """
+        per_word = []  # for every query word: cause id -> similarity of its best matching word
+        for word in words:
+            similar_words = _similar(ngrams(word, WORD_NGRAM_SIZE), self.word_postings, self.word_sizes,
+                                     SIMILAR_WORDS)
+            best = {}
+            for score, word_id in reversed(similar_words):  # better words overwrite worse ones
+                best.update(dict.fromkeys(self.causes_by_word[word_id], score[0]))
+            per_word.append(best)
+
+        found = {}
+        if len(per_word) > 1:
+            common = set(per_word[0]).intersection(*per_word[1:])
+            scored = ((sum(best[cause_id] for best in per_word) / len(words), cause_id) for cause_id in common)
+            found = {cause_id: score for score, cause_id in heapq.nlargest(limit, scored)}
+        for best in sorted(per_word, key=len):
+            if len(found) >= limit:
+                break
+            for cause_id, score in heapq.nlargest(limit, best.items(), key=itemgetter(1)):
+                if len(found) >= limit:
+                    break
+                found.setdefault(cause_id, score / len(words))
+        return [(score, cause_id) for cause_id, score in found.items()]
+
+
+class MappingTable:
+    """Error code mapping table with lookup indexes built once at load time.
+
+    ``by_code`` maps a code to its first row (rows without a code only add
+    actions to their cause), ``actions_by_cause`` maps a cause to the
+    sorted actions of every row sharing it and
+    ``search_index`` answers prefix and fuzzy searches.
+    """
+
+    def __init__(self, rows, source=None, version=None):
+        self.rows = rows
+        self.source = source
+        self.version = version
+
+        self.by_code = {}
+        actions_by_cause = {}
+        for row in rows:
+            if row["Err Code"]:
+                self.by_code.setdefault(row["Err Code"], row)
+            if row["Action"]:
+                actions_by_cause.setdefault(row["Cause"], set()).add(row["Action"])
+        self.actions_by_cause = {cause: tuple(sorted(actions)) for cause, actions in actions_by_cause.items()}
+        self.search_index = CodeSearchIndex(self.by_code)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, code):
+        """Return (cause, actions) for an error code, or None if the code is unknown or empty."""
+        row = self.by_code.get(code) if code else None
+        if row is None:
+            return None
+
+        cause = row["Cause"] or "None"
+        return cause, self.actions_by_cause.get(cause, ())
+
+    def lookup_many(self, codes):
+        """Bulk lookup, returns {code: (cause, actions)} for the known codes only."""
+        found = {}
+        for code in set(codes):
+            result = self.lookup(code)
+            if result is not None:
+                found[code] = result
+        return found
+
+    def complete(self, prefix, limit=MAX_SUGGESTIONS):
+        """Codes starting with ``prefix``, e.g. for autocomplete."""
+        return self.search_index.complete(prefix, limit)
+
+    def search(self, text, limit=MAX_SUGGESTIONS):
+        """Codes for a partial or mistyped code or for words of a cause, best match first."""
+        return self.search_index.search(text, limit)
+
+
+class MappingHistory:
+    """The loaded versions of the mapping table, newest first.
+
+    A newer table is built elsewhere (e.g. in a background thread) and
+    handed to ``add``, which swaps it in by replacing one reference, so a
+    lookup running at the same time sees either the old or the new list of
+    versions, never a half built one. Lookups answer from the current
+    version only, ``lookup_removed`` tells which older version still had a
+    code that the current one dropped.
+    """
+
+    def __init__(self, limit=MAX_HISTORY):
+        self.limit = limit
+        self.tables = ()  # MappingTable per version, newest first
+
+    def __len__(self):
+        return len(self.tables[0]) if self.tables else 0
+
+    @property
+    def current(self):
+        return self.tables[0] if self.tables else None
+
+    @property
+    def version(self):
+        return self.tables[0].version if self.tables else None
+
+    @property
+    def versions(self):
+        return [table.version for table in self.tables]
+
+    def add(self, table):
+        """Swap in ``table``, replacing a loaded table of the same version."""
+        tables = [table] + [loaded for loaded in self.tables if loaded.version != table.version]
+        tables.sort(key=lambda loaded: -1 if loaded.version is None else loaded.version, reverse=True)
+        self.tables = tuple(tables[:self.limit])
+
+    def lookup(self, code):
+        """Return (cause, actions, version) for an error code, or None if the current version does not know it."""
+        table = self.current
+        result = table.lookup(code) if table is not None else None
+        return None if result is None else result + (table.version,)
+
+    def lookup_many(self, codes):
+        """Bulk lookup in the current version, returns {code: (cause, actions, version)} for the known codes only."""
+        table = self.current
+        if table is None:
+            return {}
+        return {code: result + (table.version,) for code, result in table.lookup_many(codes).items()}
+
+    def lookup_removed(self, code):
+        """Return (cause, actions, version) from the newest older version that has a code
+        missing from the current one, or None."""
+        if self.current is None or self.current.lookup(code) is not None:
+            return None
+        for table in self.tables[1:]:
+            result = table.lookup(code)
+            if result is not None:
+                return result + (table.version,)
+        return None
+
+    def complete(self, prefix, limit=MAX_SUGGESTIONS):
+        """Codes of the current version starting with ``prefix``."""
+        table = self.current
+        return table.complete(prefix, limit) if table is not None else []
+
+    def search(self, text, limit=MAX_SUGGESTIONS):
+        """Codes of the current version for a partial or mistyped code or for words of a cause."""
+        table = self.current
+        return table.search(text, limit) if table is not None else []
+
+
+def find_latest(mapping_dir):
+    """Return (version, path) of the highest numbered mapping_table<N>.xlsx, or None."""
+    latest_version = -1
+    latest_file = None
+
+    for filename in os.listdir(mapping_dir):
+        if filename.startswith("mapping_table") and filename.endswith(".xlsx"):
+            match = MAPPING_FILE_RE.search(filename)
+            if match:
+                version = int(match.group(1))
+                if version > latest_version:
+                    latest_version = version
+                    latest_file = filename
+
+    if latest_file is None:
+        return None
+    return latest_version, os.path.join(mapping_dir, latest_file)
+
+
+def read_rows(file_path):
+    import openpyxl  # only needed when the cache is stale
+
+    workbook = openpyxl.load_workbook(file_path, read_only=True)
+    sheet = workbook["Sample"]
+
+    # Получаем заголовки
+    headers = [cell.value.strip() if isinstance(cell.value, str) else str(cell.value)
+               for cell in next(sheet.iter_rows(min_row=1, max_row=1))]
+
+    # Читаем строки с ffill логикой
+    data = []
+    previous_cause = None
+    for row in sheet.iter_rows(min_row=2, values_only=True):
+        row_dict = dict(zip(headers, row))
+
+        # Приведение типов
+        code = str(row_dict.get("Err Code")).strip() if row_dict.get("Err Code") is not None else ""
+        cause = row_dict.get("Cause")
+        action = str(row_dict.get("Action")).strip() if row_dict.get("Action") is not None else ""
+
+        # FILL предыдущим Cause если пустой
+        if cause is None:
+            cause = previous_cause
+        else:
+            previous_cause = cause
+
+        data.append({
+            "Err Code": code,
+            "Cause": cause,
+            "Action": action
+        })
+
+    workbook.close()
+    return data
+
+
+def cache_path(file_path):
+    digest = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(CACHE_DIR, f"{name}-{digest}.pickle")
+
+
+def load_cached(file_path, version=None):
+    """Load a mapping table through the binary cache, rebuilding it when the workbook changed."""
+    stat = os.stat(file_path)
+    key = (CACHE_FORMAT, os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    cache_file = cache_path(file_path)
+
+    try:
+        with open(cache_file, "rb") as f:
+            cached_key, table = pickle.load(f)
+        if cached_key == key:
+            return table
+    except Exception:
+        pass  # missing, stale or unreadable cache
+
+    table = MappingTable(read_rows(file_path), source=file_path, version=version)
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "wb") as f:
+            pickle.dump((key, table), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"[ERROR] Failed to write mapping table cache: {e}")
+
+    return table
+
+
+def load_latest(mapping_dir):
+    """Load the newest mapping table found in ``mapping_dir``."""
+    latest = find_latest(mapping_dir)
+    if latest is None:
+        raise FileNotFoundError("No valid mapping_tableXXXX.xlsx file found in /data.")
+
+    version, file_path = latest
+    return load_cached(file_path, version)
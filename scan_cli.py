@@ -0,0 +1,226 @@
+"""Headless log scan, e.g. for cron jobs or servers without a display.
+
+    python scan_cli.py -t "EALM; 15031" -w 4 "logs/*.log" > hits.csv
+    python scan_cli.py --auto --format jsonl "logs/**/*.log"
+    python scan_cli.py --auto --from 02:00 --to 02:15 logs/ecp.log
+    python scan_cli.py --auto --follow logs/ecp.log
+    python scan_cli.py -t "type=EALM" --codes logs/*.log
+    python scan_cli.py --auto --summary logs/*.log > summary.json
+    python scan_cli.py --correlate --reply-window 60 logs/ecp-2024-10-20*.log
+
+Uses the same LogScanner as the GUI and never imports PyQt5. Hits are
+written to stdout while the scan runs. Exit status is 0 when something was
+found, 1 when nothing was found and 2 on errors (like grep), also when some
+of the files could not be read (missing, corrupt archives). With --follow
+the files are then watched for appended data until interrupted. With
+--summary only the hit counts per code, EQPID, channel, message type,
+minute and hour are written, as one JSON object at the end of the scan.
+--correlate pairs requests with their replies instead of searching and
+writes reply latencies per channel and the orphaned requests as JSON.
+"""
+import argparse
+import csv
+import glob
+import json
+import lzma
+import multiprocessing
+import os
+import sys
+import zlib
+
+from log_correlator import REPLY_WINDOW, correlate
+from log_follow import POLL_INTERVAL, LogFollower
+from log_records import TimeRange
+from mapping_table import load_latest
+from scan_engine import AUTO_SEARCH_TEXT, LogScanner
+
+
+FIELDS = ["file", "line", "text", "path", "offset", "term", "code", "cause", "action"]
+
+# Mapping tables are looked up here unless --mapping says otherwise
+DEFAULT_MAPPING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Errors of unreadable files, decompressors raise their own for corrupt or cut off archives
+READ_ERRORS = (OSError, zlib.error, lzma.LZMAError, EOFError)
+
+
+def expand_paths(patterns):
+    """Files matched by the glob patterns (``**`` recurses), in order and without duplicates."""
+    paths = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            if os.path.isfile(path) and path not in seen:
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+
+class CsvWriter:
+    def __init__(self, stream, fields):
+        self.writer = csv.DictWriter(stream, fieldnames=fields, extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, hit):
+        self.writer.writerow(hit)
+
+
+class JsonLinesWriter:
+    def __init__(self, stream, fields):
+        self.stream = stream
+        self.fields = fields
+
+    def write(self, hit):
+        self.stream.write(json.dumps({field: hit.get(field) for field in self.fields}, ensure_ascii=False))
+        self.stream.write("\n")
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonLinesWriter}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scan log files without the GUI.")
+    parser.add_argument("paths", nargs="+", help="log files or glob patterns")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("-t", "--terms", help="search text, like the manual mode (\"EALM; 15031\" or \"type=EALM\")")
+    mode.add_argument("--auto", action="store_true", help=f"automatic mode (searches {AUTO_SEARCH_TEXT})")
+    mode.add_argument("--correlate", action="store_true",
+                      help="pair requests with replies (EERR -> EERR_R) and report latencies and orphans")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="scan processes")
+    parser.add_argument("-f", "--format", choices=sorted(WRITERS), default="csv", help="output format")
+    parser.add_argument("--from", dest="time_from", default="", metavar="TIME",
+                        help="only records at or after TIME (HH:MM[:SS] or YYYY.MM.DD HH:MM[:SS])")
+    parser.add_argument("--to", dest="time_to", default="", metavar="TIME", help="only records up to TIME")
+    parser.add_argument("--codes", action="store_true",
+                        help="add the error code (ALID/CEID) of every hit with its cause and action")
+    parser.add_argument("--mapping", metavar="DIR", help="folder with mapping_table<N>.xlsx for --codes")
+    parser.add_argument("--use-index", action="store_true", help="use the persistent search index")
+    parser.add_argument("--save-line-index", action="store_true", help="save line indexes next to the logs")
+    parser.add_argument("--summary", action="store_true",
+                        help="write hit counts per code, EQPID, channel, type and time as JSON instead of the hits")
+    parser.add_argument("--reply-window", type=float, default=REPLY_WINDOW, metavar="SECONDS",
+                        help="with --correlate: requests without reply after this long are orphaned")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep watching the files for appended data (not with --from/--to or --summary)")
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL,
+                        help="seconds between checks when following without inotify")
+    return parser.parse_args(argv)
+
+
+def follow(files, scanner, on_hits, poll_interval):
+    """Scan what is appended to the files after the scan, until interrupted."""
+    follower = LogFollower(scanner.search_text, scanner.report_terms, on_hits=on_hits,
+                           extract_codes=scanner.extract_codes)
+    for path in files:
+        follower.add(path, scanner.scanned_sizes.get(path))
+    print(f"[INFO] Following {len(files)} files, Ctrl+C to stop", file=sys.stderr)
+    follower.run(poll_interval)
+
+
+def correlate_files(files, window, time_range):
+    """Write the request/reply report of the files as JSON."""
+    try:
+        report = correlate(files, window, time_range=time_range)
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except READ_ERRORS as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+    print(f"[INFO] {report['records']} records, {report['orphans']} orphaned requests", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    try:
+        time_range = TimeRange.parse(args.time_from, args.time_to)
+    except ValueError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+
+    files = expand_paths(args.paths)
+    if not files:
+        print("[ERROR] No log files matched.", file=sys.stderr)
+        return 2
+
+    if args.correlate:
+        return correlate_files(files, args.reply_window, time_range)
+
+    scanner = LogScanner(AUTO_SEARCH_TEXT if args.auto else args.terms, workers=max(1, args.workers),
+                         persist_index=args.save_line_index, use_index=args.use_index, time_range=time_range,
+                         extract_codes=args.codes or args.summary, summarize=args.summary)
+    scanner.report_terms = len(scanner.terms) > 1  # like the GUI: report the matched term
+
+    mapping = None
+    if args.codes:
+        try:
+            mapping = load_latest(args.mapping or DEFAULT_MAPPING_DIR)
+        except Exception as e:
+            if args.mapping:
+                print(f"[ERROR] Failed to load mapping table: {e}", file=sys.stderr)
+                return 2
+            print(f"[INFO] No mapping table, codes are written without cause/action: {e}", file=sys.stderr)
+
+    fields = [field for field in FIELDS
+              if (field != "term" or scanner.report_terms)
+              and (field != "code" or args.codes)
+              and (field not in ("cause", "action") or mapping is not None)]
+    writer = None if args.summary else WRITERS[args.format](sys.stdout, fields)
+    hit_count = 0
+
+    def on_hits(hits):
+        nonlocal hit_count
+        if args.summary:
+            # The scanner counts the hits itself
+            hit_count += len(hits)
+            hits.close()
+            return
+        # One lookup per distinct code of the batch
+        code_info = mapping.lookup_many(hits.code_names) if mapping is not None else {}
+        for hit in hits:
+            if mapping is not None:
+                cause, actions = code_info.get(hit["code"], ("", ()))
+                hit["cause"] = cause
+                hit["action"] = "; ".join(actions)
+            writer.write(hit)
+        hit_count += len(hits)
+        hits.close()
+        sys.stdout.flush()
+
+    try:
+        scanner.scan(files, on_hits=on_hits)
+        if args.summary:
+            json.dump(scanner.summary.to_dict(), sys.stdout, ensure_ascii=False, indent=2)
+            sys.stdout.write("\n")
+        elif args.follow and time_range is None and not scanner.stopped:
+            skipped = {path for path, _ in scanner.errors}
+            follow([path for path in files if path not in skipped], scanner, on_hits, args.poll_interval)
+    except BrokenPipeError:
+        # Output closed early (e.g. piped into head), silence the flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except READ_ERRORS as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        scanner.stop()
+        return 130
+
+    print(f"[INFO] {hit_count} hits in {len(files)} files", file=sys.stderr)
+    if scanner.errors:
+        print(f"[ERROR] {len(scanner.errors)} of {len(files)} files could not be read", file=sys.stderr)
+        return 2
+    return 0 if hit_count else 1
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,681 @@
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from log_index import LogIndex
+from log_reader import (CHUNK_SIZE, LineIndex, LogReader, count_lines, file_mtime, is_compressed, line_number_at,
+                        open_log, store_line_index)
+from log_records import RECORD_START_RE, RecordParser, RecordQuery, find_time_range, record_around, record_code
+from log_summary import HitSummary, record_fields
+
+# Files bigger than this are split into several segments for parallel scanning
+SEGMENT_SIZE = 64 * 1024 * 1024
+
+# How far past a split point we look for the next record header
+ALIGN_WINDOW = 1024 * 1024
+
+# Search text of the automatic mode
+AUTO_SEARCH_TEXT = "ALARM"
+
+
+def parse_search_terms(search_text):
+    """Split the user input into lowercase terms (comma or semicolon separated)."""
+    search_input = search_text.strip().lower()
+
+    if ',' in search_input or ';' in search_input:
+        terms = [term.strip() for term in re.split(r'[;,]', search_input)]
+        return [term for term in terms if term]
+    return [search_input]
+
+
+class KeywordMatcher:
+    """All search terms compiled once into a single case-insensitive regex over raw bytes.
+
+    The terms are merged into a prefix tree before being turned into a regex,
+    so hundreds of error codes cost about as much as a handful. Longer terms
+    win over their prefixes, the reported term is the most specific one.
+    """
+
+    def __init__(self, terms):
+        self.terms = list(dict.fromkeys(terms))
+        if self.terms:
+            self.pattern = re.compile(_trie_pattern(self.terms), re.IGNORECASE)
+        else:
+            self.pattern = re.compile(b'(?!)')  # nothing to search, never matches
+
+    @classmethod
+    def from_text(cls, search_text):
+        return cls(parse_search_terms(search_text))
+
+    def find_lines(self, chunk):
+        """Yield (line_start, line_end, line_index, match) for every line of the chunk with a match.
+
+        ``line_index`` is 0-based inside the chunk, ``match`` is the first match on the line.
+        """
+        search = self.pattern.search
+        position = 0
+        counted_to = 0
+        line_index = 0
+
+        while True:
+            match = search(chunk, position)
+            if match is None:
+                return
+
+            line_start = chunk.rfind(b'\n', 0, match.start()) + 1
+            line_index += chunk.count(b'\n', counted_to, line_start)
+            counted_to = line_start
+
+            line_end = chunk.find(b'\n', match.end())
+            if line_end < 0:
+                line_end = len(chunk)
+
+            yield line_start, line_end, line_index, match
+            position = line_end + 1
+
+    @staticmethod
+    def matched_term(match):
+        return match.group().decode('utf-8', errors='ignore').lower()
+
+
+def _trie_pattern(terms):
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}  # end of a term
+    return _node_pattern(trie)
+
+
+def _node_pattern(node):
+    branches = [_char_pattern(char) + _node_pattern(child) for char, child in node.items() if char]
+    if not branches:
+        return b''
+
+    pattern = branches[0] if len(branches) == 1 else b'(?:' + b'|'.join(branches) + b')'
+    if '' in node:
+        # A term ends here, the longer continuation is still preferred
+        return b'(?:' + pattern + b')?'
+    return pattern
+
+
+def _char_pattern(char):
+    # re.IGNORECASE only folds ASCII on bytes, other cased letters get both forms
+    lower, upper = char.lower(), char.upper()
+    if char.isascii() or lower == upper:
+        return re.escape(char.encode('utf-8'))
+    return b'(?:' + re.escape(lower.encode('utf-8')) + b'|' + re.escape(upper.encode('utf-8')) + b')'
+
+
+class ResultStore:
+    """Compact columnar container for scan hits.
+
+    File paths, matched terms and error codes are interned once, line
+    numbers and byte offsets of the hit lines live in arrays. The line text
+    is not copied, it is read back from the file at its offset when asked for.
+    """
+
+    def __init__(self):
+        self.paths = []
+        self._path_ids = {}
+        self.file_ids = array('I')
+        self.lines = array('Q')
+        self.offsets = array('Q')
+        self.term_names = []
+        self._term_ids = {}
+        self.term_ids = array('I')
+        self.code_names = []
+        self._code_ids = {}
+        self.code_ids = array('I')
+        self._readers = {}
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_readers'] = {}  # open files stay in their process
+        return state
+
+    def _intern_path(self, path):
+        path_id = self._path_ids.get(path)
+        if path_id is None:
+            path_id = self._path_ids[path] = len(self.paths)
+            self.paths.append(path)
+        return path_id
+
+    def _intern_term(self, term):
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            term_id = self._term_ids[term] = len(self.term_names)
+            self.term_names.append(term)
+        return term_id
+
+    def _intern_code(self, code):
+        code_id = self._code_ids.get(code)
+        if code_id is None:
+            code_id = self._code_ids[code] = len(self.code_names)
+            self.code_names.append(code)
+        return code_id
+
+    def append(self, path, line, offset, term=None, code=None):
+        """Add a hit, ``code`` is "" for a hit without error code when codes are extracted."""
+        self.file_ids.append(self._intern_path(path))
+        self.lines.append(line)
+        self.offsets.append(offset)
+        if term is not None:
+            self.term_ids.append(self._intern_term(term))
+        if code is not None:
+            self.code_ids.append(self._intern_code(code))
+
+    def extend(self, other, line_base=0):
+        """Append the hits of another store, shifting their line numbers by ``line_base``."""
+        path_map = [self._intern_path(path) for path in other.paths]
+        term_map = [self._intern_term(term) for term in other.term_names]
+        self.file_ids.extend(path_map[file_id] for file_id in other.file_ids)
+        if line_base:
+            self.lines.extend(line + line_base for line in other.lines)
+        else:
+            self.lines.extend(other.lines)
+        self.offsets.extend(other.offsets)
+        self.term_ids.extend(term_map[term_id] for term_id in other.term_ids)
+        code_map = [self._intern_code(code) for code in other.code_names]
+        self.code_ids.extend(code_map[code_id] for code_id in other.code_ids)
+
+    @property
+    def has_terms(self):
+        return len(self.term_ids) > 0
+
+    @property
+    def has_codes(self):
+        return len(self.code_ids) > 0
+
+    def path(self, row):
+        return self.paths[self.file_ids[row]]
+
+    def file_name(self, row):
+        return os.path.basename(self.path(row))
+
+    def line(self, row):
+        return self.lines[row]
+
+    def offset(self, row):
+        return self.offsets[row]
+
+    def term(self, row):
+        return self.term_names[self.term_ids[row]] if self.has_terms else None
+
+    def code(self, row):
+        return self.code_names[self.code_ids[row]] if self.has_codes else None
+
+    def text(self, row):
+        """The hit line, read through a reader per file kept open until ``close``."""
+        path = self.path(row)
+        offset = self.offsets[row]
+        reader = self._readers.get(path)
+        if reader is not None and not reader.compressed and offset >= reader.size:
+            reader.close()  # mapped before the line was appended (following)
+            reader = None
+        if reader is None:
+            try:
+                reader = self._readers[path] = open_log(path)
+            except OSError:
+                self._readers.pop(path, None)
+                return ""
+        return reader.read_line(offset).decode('utf-8', errors='ignore').strip()
+
+    def hit(self, row):
+        """The hit as a plain dict (file, line, text, path, offset and term when known)."""
+        hit = {
+            "file": self.file_name(row),
+            "line": self.line(row),
+            "text": self.text(row),
+            "path": self.path(row),
+            "offset": self.offset(row)
+        }
+        if self.has_terms:
+            hit["term"] = self.term(row)
+        if self.has_codes:
+            hit["code"] = self.code(row)
+        return hit
+
+    def __iter__(self):
+        return (self.hit(row) for row in range(len(self)))
+
+    def close(self):
+        """Close the files opened for ``text``, e.g. so they can be rotated or deleted (Windows)."""
+        for reader in self._readers.values():
+            reader.close()
+        self._readers = {}
+
+
+class LogScanner:
+    """Case-insensitive keyword scan over log files, processed in large chunks.
+
+    The scanner has no GUI dependencies, progress is reported through the
+    optional ``on_progress(bytes_done, total_bytes)`` callback once per chunk.
+    Totals come from the file sizes, so every file is read exactly once.
+
+    With ``workers`` > 1 the files (and big files split at record boundaries)
+    are scanned in a process pool, results keep the file/line order.
+
+    With ``report_terms`` every hit also gets the matched search term, with
+    ``extract_codes`` the error code (ALID, else CEID) of its record. With
+    ``summarize`` the hits are also counted into ``summary`` (a HitSummary)
+    on the way.
+
+    When the input has field filters ("type=EALM; eqpid=...") the files are
+    parsed into records instead, and every matching record is one hit on
+    its header line.
+
+    A line index of every scanned file is kept for the result viewer, with
+    ``persist_index`` it is also saved next to the log.
+
+    With ``use_index`` keyword searches go through the persistent inverted
+    index of each file (built or updated on the way), only candidate blocks
+    are read.
+
+    With a ``time_range`` (log_records.TimeRange) only the records inside the
+    window are scanned, their byte range is found by bisecting the record
+    timestamps. The lines before the window are only counted once the file
+    has hits.
+
+    A file that cannot be read (missing, unreadable or corrupt) is skipped,
+    from where the error happened on, and listed in ``errors``.
+    """
+
+    def __init__(self, search_text, chunk_size=CHUNK_SIZE, workers=1, segment_size=SEGMENT_SIZE,
+                 report_terms=False, persist_index=False, use_index=False, time_range=None, extract_codes=False,
+                 summarize=False):
+        self.search_text = search_text
+        self.record_query = RecordQuery.parse(search_text)
+        self.matcher = KeywordMatcher.from_text(search_text)
+        self.terms = self.record_query.terms if self.record_query else self.matcher.terms
+        self.report_terms = report_terms
+        self.extract_codes = extract_codes
+        self.summary = HitSummary() if summarize else None
+        self.chunk_size = chunk_size
+        self.workers = max(1, workers)
+        self.segment_size = segment_size
+        self.persist_index = persist_index
+        self.use_index = use_index
+        self.time_range = time_range
+        self.stopped = False
+        self.scanned_sizes = {}
+        self.errors = []  # (path, message) of the skipped files
+
+    def stop(self):
+        self.stopped = True
+
+    def scan(self, files, on_progress=None, on_hits=None):
+        """Scan the files and return their hits as a ResultStore.
+
+        With ``on_hits`` the hits are streamed instead: every batch is passed
+        to ``on_hits(store)`` as soon as it is final (file/line order, absolute
+        line numbers) and the returned store stays empty.
+        """
+        sizes = [file_size(path) for path in files]
+        results = ResultStore()
+        self.errors = []
+        if self.summary is not None:
+            self.summary = HitSummary()
+
+        # What was scanned, so a follow-up can continue where the scan ended
+        self.scanned_sizes = dict(zip(files, sizes))
+
+        def deliver(batch, line_base=0):
+            if not len(batch):
+                return
+            if on_hits is None:
+                results.extend(batch, line_base)
+            elif line_base:
+                shifted = ResultStore()
+                shifted.extend(batch, line_base)
+                on_hits(shifted)
+            else:
+                on_hits(batch)
+
+        if self.use_index and not self.record_query and not self.time_range:
+            self._scan_indexed(files, sizes, sum(sizes), on_progress, deliver)
+            return results
+
+        # (start, end, first line) of the part of every file to scan, end None means up to the end
+        # and first line None that it is not counted yet (see _first_line), None for a skipped file
+        ranges = []
+        for path, size in zip(files, sizes):
+            try:
+                ranges.append(self._file_range(path, size))
+            except OSError as e:
+                self._skip_file(path, e)
+                ranges.append(None)
+        total_bytes = sum(scan_weight(path, start, end)
+                          for path, file_range in zip(files, ranges) if file_range is not None
+                          for start, end, _ in [file_range])
+        whole_files = self.time_range is None
+
+        if self.workers > 1:
+            segments = []
+            for file_index, (path, file_range) in enumerate(zip(files, ranges)):
+                if file_range is None:
+                    continue
+                try:
+                    file_segments = split_file(path, file_range[0], file_range[1], self.segment_size)
+                except OSError as e:
+                    self._skip_file(path, e)
+                    ranges[file_index] = None
+                    continue
+                segments += [(file_index, path, start, end) for start, end in file_segments]
+            if len(segments) > 1:
+                self._scan_parallel(segments, ranges, whole_files, total_bytes, on_progress, deliver)
+                return results
+
+        bytes_done = 0
+        for file_index, (path, file_range) in enumerate(zip(files, ranges)):
+            if self.stopped:
+                break
+            if file_range is None:
+                continue
+            start, end, _ = file_range
+
+            def on_chunk(chunk_bytes):
+                nonlocal bytes_done
+                bytes_done += chunk_bytes
+                if on_progress:
+                    on_progress(bytes_done, total_bytes)
+
+            def deliver_file(batch, path=path, file_index=file_index):
+                deliver(batch, line_base=self._first_line(ranges, file_index, path) - 1)
+
+            try:
+                _, _, index = self.scan_segment(path, start, end, on_chunk, deliver_file)
+            except OSError as e:
+                self._skip_file(path, e)
+                continue
+            if whole_files and not self.stopped:
+                store_line_index(path, index, self.persist_index)
+
+        return results
+
+    def _skip_file(self, path, error):
+        print(f"[ERROR] Skipped {path}: {error}", file=sys.stderr)
+        self.errors.append((path, str(error)))
+
+    def _file_range(self, path, size):
+        start, end = 0, None if is_compressed(path) else size
+        if self.time_range is None:
+            return start, end, 1
+
+        with open_log(path) as reader:
+            start, end = find_time_range(reader, self.time_range, end)
+        return start, end, None if start else 1
+
+    def _first_line(self, ranges, file_index, path):
+        """Number of the first scanned line of a file, counted on first use so line numbers stay absolute."""
+        start, end, first_line = ranges[file_index]
+        if first_line is None:
+            with open_log(path) as reader:
+                first_line = line_number_at(path, reader, start)
+            ranges[file_index] = (start, end, first_line)
+        return first_line
+
+    def scan_segment(self, path, start, end, on_chunk=None, on_hits=None):
+        """Scan bytes [start, end) of a file, start must be at a line start.
+
+        Offsets of a compressed log are uncompressed offsets, end None scans
+        up to the end. ``on_chunk`` gets the scanned bytes in the unit of
+        scan_weight: compressed bytes read from disk when a compressed log is
+        scanned up to its end, uncompressed bytes otherwise.
+
+        Returns the hits as a ResultStore (line numbers counted from the
+        segment start), the number of lines in the segment and its LineIndex.
+        With ``on_hits`` the hits of every chunk are handed over right away.
+        """
+        hits = ResultStore()
+        line_num = 0
+
+        record_parser = RecordParser(path) if self.record_query else None
+
+        with open_log(path) as reader:
+            index = LineIndex(reader.file_size, file_mtime(path), start_offset=start)
+            on_disk = reader.compressed and end is None
+            done = 0 if on_disk else start
+            for offset, chunk in reader.iter_chunks(start, end, self.chunk_size):
+                if self.stopped:
+                    break
+
+                index.add_chunk(offset, line_num + 1, chunk)
+
+                if record_parser:
+                    self._record_hits(hits, record_parser.feed(offset, chunk))
+                else:
+                    self._line_hits(hits, chunk, offset, line_num, path, reader)
+
+                if on_hits and len(hits):
+                    on_hits(hits)
+                    hits = ResultStore()
+
+                line_num += count_lines(chunk)
+                if on_chunk:
+                    position = reader.disk_offset(offset + len(chunk)) if on_disk else offset + len(chunk)
+                    on_chunk(position - done)
+                    done = position
+
+        if record_parser and not self.stopped:
+            self._record_hits(hits, record_parser.close())
+            if on_hits and len(hits):
+                on_hits(hits)
+                hits = ResultStore()
+
+        return hits, line_num, index
+
+    def _scan_indexed(self, files, sizes, total_bytes, on_progress, deliver):
+        bytes_done = 0
+
+        for path, size in zip(files, sizes):
+            if self.stopped:
+                break
+
+            try:
+                hits = self._search_indexed(path)
+            except OSError as e:
+                self._skip_file(path, e)
+            else:
+                deliver(hits)
+            bytes_done += size
+            if on_progress:
+                on_progress(bytes_done, total_bytes)
+
+    def _search_indexed(self, path):
+        block_ids = None
+        if not is_compressed(path):
+            index = LogIndex.open(path)
+            block_ids = index.candidate_blocks(self.terms)
+
+        if block_ids is None:
+            # Not indexed, or the index does not narrow it down: scanned in one go
+            hits, _, line_index = self.scan_segment(path, 0, None)
+            store_line_index(path, line_index, self.persist_index)
+            return hits
+
+        hits = ResultStore()
+        with LogReader(path) as reader:
+            for offset, first_line, block in index.iter_blocks(reader, block_ids):
+                self._line_hits(hits, block, offset, first_line - 1, path, reader)
+
+            # Data appended after the index was updated
+            line_num = index.line_count
+            for offset, chunk in reader.iter_chunks(index.indexed_size, reader.size, self.chunk_size):
+                self._line_hits(hits, chunk, offset, line_num, path, reader)
+                line_num += count_lines(chunk)
+        return hits
+
+    def _line_hits(self, store, chunk, chunk_offset, line_num, path, reader):
+        per_record = self.extract_codes or self.summary is not None
+        headers = None
+        records = {}
+
+        for line_start, _, line_index, match in self.matcher.find_lines(chunk):
+            term = self.matcher.matched_term(match) if self.report_terms else None
+            code = None
+            if per_record:
+                if headers is None:
+                    headers = [header.start() for header in RECORD_START_RE.finditer(chunk)]
+                code, fields = self._line_record(reader, chunk, chunk_offset, headers, line_start, records)
+                if self.summary is not None:
+                    self.summary.add(fields, code)
+            store.append(path, line_num + line_index + 1, chunk_offset + line_start, term, code)
+
+    def _line_record(self, reader, chunk, chunk_offset, headers, line_start, records):
+        """(code, record_fields) of the record around a hit line, cached per record of the chunk."""
+        i = bisect_right(headers, line_start) - 1
+        if i < 0 or i + 1 == len(headers):
+            # The record may continue outside of the chunk
+            return self._record_info(record_around(reader, chunk_offset + line_start))
+
+        record_start = headers[i]
+        info = records.get(record_start)
+        if info is None:
+            info = records[record_start] = self._record_info(chunk[record_start:headers[i + 1]])
+        return info
+
+    def _record_info(self, data):
+        code = (record_code(data) or "") if self.extract_codes else None
+        fields = record_fields(data) if self.summary is not None else None
+        return code, fields
+
+    def _record_hits(self, store, records):
+        for record in records:
+            if self.record_query.matches(record):
+                code = (record.code or "") if self.extract_codes else None
+                if self.summary is not None:
+                    self.summary.add((record.timestamp, record.channel, record.msg_type, record.eqpid),
+                                     record.code)
+                store.append(record.path, record.line, record.offset, code=code)
+
+    def _scan_parallel(self, segments, ranges, whole_files, total_bytes, on_progress, deliver):
+        segment_results = {}
+        bytes_done = 0
+
+        # Segments are merged in file/line order as soon as all earlier ones are done
+        next_segment = 0
+        line_base = 0
+        file_index = None
+        failed = set()  # files with a segment that could not be read
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(_scan_segment_job, self.search_text, self.chunk_size, self.report_terms,
+                                self.extract_codes, self.summary is not None, path, start, end): index
+                for index, (_, path, start, end) in enumerate(segments)
+            }
+            for future in as_completed(futures):
+                if self.stopped:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    return
+
+                index = futures[future]
+                try:
+                    segment_results[index] = future.result()
+                except OSError as e:
+                    segment_file, path, _, _ = segments[index]
+                    if segment_file not in failed:
+                        failed.add(segment_file)
+                        self._skip_file(path, e)
+                    segment_results[index] = None
+
+                while next_segment in segment_results:
+                    segment_file, path, _, _ = segments[next_segment]
+                    result = segment_results.pop(next_segment)
+                    if segment_file in failed:
+                        next_segment += 1
+                        continue
+                    hits, line_count, segment_index, segment_summary = result
+                    if segment_summary is not None:
+                        self.summary.update(segment_summary)
+
+                    # Lines before the segment in the scanned part of its file
+                    if next_segment == 0 or segments[next_segment - 1][0] != segment_file:
+                        line_base = 0
+                        file_index = segment_index
+                    else:
+                        file_index.extend(segment_index, line_base)
+
+                    if len(hits):
+                        # Line numbers become absolute
+                        deliver(hits, self._first_line(ranges, segment_file, path) - 1 + line_base)
+                    line_base += line_count
+
+                    last_of_file = next_segment + 1 == len(segments) or segments[next_segment + 1][0] != segment_file
+                    if whole_files and last_of_file:
+                        store_line_index(path, file_index, self.persist_index)
+                    next_segment += 1
+
+                _, path, start, end = segments[index]
+                bytes_done += scan_weight(path, start, end)
+                if on_progress:
+                    on_progress(bytes_done, total_bytes)
+
+
+def _scan_segment_job(search_text, chunk_size, report_terms, extract_codes, summarize, path, start, end):
+    # Module level so it can be pickled for the process pool
+    scanner = LogScanner(search_text, chunk_size=chunk_size, report_terms=report_terms,
+                         extract_codes=extract_codes, summarize=summarize)
+    return scanner.scan_segment(path, start, end) + (scanner.summary,)
+
+
+def split_file(path, start, end, segment_size=SEGMENT_SIZE):
+    """Split bytes [start, end) of a file into ranges that start at a record (or line) start.
+
+    Compressed logs (end None) are not split.
+    """
+    if end is None or end - start <= segment_size:
+        return [(start, end)]
+
+    bounds = [start]
+    with open(path, 'rb') as f:
+        target = start + segment_size
+        while target < end:
+            bound = _align_to_record(f, target, end)
+            if bound >= end:
+                break
+            if bound > bounds[-1]:
+                bounds.append(bound)
+            target = max(bound, target) + segment_size
+    bounds.append(end)
+
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _align_to_record(f, position, size):
+    f.seek(position - 1)
+    window = f.read(ALIGN_WINDOW + 1)
+
+    # Skip the rest of the line we landed in, then prefer a record header
+    first_newline = window.find(b'\n')
+    if first_newline < 0:
+        return size
+
+    match = RECORD_START_RE.search(window, first_newline + 1)
+    if match:
+        return position - 1 + match.start()
+    return position + first_newline
+
+
+def scan_weight(path, start, end):
+    """Bytes counted by the progress for scanning [start, end) of a file.
+
+    Up to the end of a file (end None, only for compressed logs) that is
+    its size on disk, otherwise the length of the (uncompressed) range.
+    """
+    return file_size(path) if end is None else end - start
+
+
+def file_size(path):
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# Parsed mapping tables and inverted indexes go to a throwaway cache, set before the modules are imported
+os.environ["LOG_ANALYZER_CACHE"] = tempfile.mkdtemp(prefix="log-analyzer-tests-")
+
+SAMPLE_LOG = os.path.join(REPO_DIR, "data", "log_file_1.log")
+
+# Lines the sample lacks: non-ASCII text and a last line without newline
+EXTRA_LINES = ("2024.10.20 23:59:59 : B_19 -> ECP ( EALM   ) : Ошибка датчика TEMP_JIG_01\r\n"
+               "EERR without newline").encode("utf-8")
+
+
+@pytest.fixture
+def sample_log(tmp_path):
+    """Copy of data/log_file_1.log plus the extra lines, in a fresh directory."""
+    path = tmp_path / "sample.log"
+    with open(SAMPLE_LOG, "rb") as f:
+        path.write_bytes(f.read() + EXTRA_LINES)
+    return str(path)
+
+
+@pytest.fixture
+def generated_log(tmp_path):
+    """A synthetic log in time order (log_generator.py)."""
+    from log_generator import generate_log
+
+    path = tmp_path / "generated.log"
+    generate_log(str(path), 512 * 1024, seed=3)
+    return str(path)
+
+
+def hit_list(store):
+    """(path, line, offset) of every hit of a ResultStore."""
+    return [(store.path(row), store.line(row), store.offset(row)) for row in range(len(store))]
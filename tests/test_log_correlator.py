@@ -0,0 +1,72 @@
+from log_correlator import correlate
+from log_records import RECORD_START_RE, TimeRange
+
+EQUIPMENT = "U1FJGF06302-002-003"
+
+
+def record(time, msg_type, transaction, ack=None, channel="ECP -> B_19"):
+    """One log record, requests sent by the host (H), replies by the equipment (E)."""
+    reply = msg_type.endswith("_R")
+    sender, mode = ("E", "RN") if reply else ("H", "SR")
+    body = f'{{"ACK" : "{ack}"}}' if ack is not None else "{}"
+    return (f"2024.10.20 {time} : {channel} ( {msg_type:<6} ) : \x02{sender}{EQUIPMENT} {mode}{msg_type:<6}"
+            f"{transaction}{body}\r\n10\x03\r\n")
+
+
+def write_log(path, records):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("".join(records))
+    return str(path)
+
+
+def by_type(report):
+    return {(row["channel"], row["type"]): row for row in report["types"]}
+
+
+def exchange_records():
+    """Replies in time, late, early, without request and requests without reply."""
+    return [
+        record("00:00:00", "EERR", "0001"),
+        record("00:00:01", "EERR", "0002"),
+        record("00:00:03", "EERR_R", "0001", ack="0", channel="B_19 -> ECP"),
+        record("00:00:04", "EERR_R", "0002", ack="1", channel="B_19 -> ECP"),
+        record("00:00:10", "ECMD", "0003"),
+        record("00:00:12", "ECMD_R", "7777", ack="0", channel="B_19 -> ECP"),  # own transaction number
+        record("00:00:20", "EDNT_R", "0005", ack="0", channel="B_19 -> ECP"),  # logged before its request
+        record("00:00:20", "EDNT", "0005"),
+        record("00:00:30", "EERR", "0004"),
+        record("00:01:00", "EEER_R", "0009", ack="0", channel="B_19 -> ECP"),  # no request at all
+        record("00:10:00", "EERR", "0006"),
+    ]
+
+
+def test_requests_are_joined_with_their_replies(tmp_path):
+    report = correlate([write_log(tmp_path / "ecp.log", exchange_records())], window=300)
+    types = by_type(report)
+    assert report["records"] == 11
+    assert types[("ECP -> B_19", "EERR")]["replies"] == 2
+    assert types[("ECP -> B_19", "EERR")]["naks"] == 1
+    assert (types[("ECP -> B_19", "EERR")]["min_s"], types[("ECP -> B_19", "EERR")]["max_s"]) == (3, 3)
+    assert types[("ECP -> B_19", "ECMD")]["replies"] == 1
+    assert types[("ECP -> B_19", "EDNT")]["mean_s"] == 0
+
+    # 0004 got no reply within the window, 0006 is still waiting when the log ends
+    assert report["orphans"] == 1
+    assert [(sample["transaction"], sample["line"]) for sample in report["orphan_samples"]] == [("0004", 17)]
+    assert [sample["transaction"] for sample in report["waiting_at_end"]] == ["0006"]
+    assert report["unmatched_replies"] == [{"channel": "B_19 -> ECP", "type": "EEER", "count": 1}]
+
+
+def test_time_range_keeps_line_numbers(tmp_path):
+    path = write_log(tmp_path / "ecp.log", exchange_records())
+    report = correlate([path], window=300, time_range=TimeRange.parse("00:00:25", "00:15"))
+    assert report["records"] == 3
+    assert [(sample["transaction"], sample["line"]) for sample in report["orphan_samples"]] == [("0004", 17)]
+    assert [(sample["transaction"], sample["line"]) for sample in report["waiting_at_end"]] == [("0006", 21)]
+
+
+def test_sample_log_replies_are_found(sample_log):
+    report = correlate([sample_log])
+    with open(sample_log, "rb") as f:
+        assert report["records"] == sum(1 for line in f if RECORD_START_RE.match(line))
+    assert by_type(report)[("ECP -> B_19", "EERR")]["replies"]
@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+from conftest import hit_list
+from log_follow import LogFollower
+from log_reader import LogReader
+from log_records import record_around, record_code
+from log_summary import HitSummary, record_fields
+from scan_engine import LogScanner
+
+# Byte offsets where the first scan stops: inside a line, right after a newline, inside a record body
+CUTS = [500000, 499971, 499972, 1000, 123457, 1500001]
+
+
+def follow_from_cut(path, search_text, cut, summarize=False):
+    """Scan the first ``cut`` bytes, follow from there and append the rest.
+
+    Returns the hits of the scan, the hits reported by the follower and the follower.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:cut])
+
+    scanner = LogScanner(search_text, extract_codes=summarize, summarize=summarize)
+    scanned = hit_list(scanner.scan([path]))
+    followed = []
+    follower = LogFollower(search_text, extract_codes=summarize, summarize=summarize,
+                           on_hits=lambda store: followed.extend(hit_list(store)))
+    follower.add(path, scanner.scanned_sizes[path])
+
+    with open(path, 'ab') as f:
+        f.write(data[cut:])
+    follower.poll()
+    return scanned, followed, follower
+
+
+@pytest.mark.parametrize("cut", CUTS)
+@pytest.mark.parametrize("search_text", ["EERR", "ALID, TEMP_JIG_37", "1"])
+def test_resume_reports_every_hit_once(sample_log, search_text, cut):
+    expected = hit_list(LogScanner(search_text).scan([sample_log]))
+    scanned, followed, follower = follow_from_cut(sample_log, search_text, cut)
+    # The last line of the sample has no newline yet, it is reported once complete
+    with open(sample_log, 'rb') as f:
+        last_line = f.read().rfind(b'\n') + 1
+    assert follower.files[sample_log].offset == last_line
+    assert scanned + followed == [hit for hit in expected if hit[2] < last_line]
+
+
+@pytest.mark.parametrize("cut", CUTS)
+def test_resume_of_a_record_query(sample_log, cut):
+    expected = hit_list(LogScanner("type=EERR_R").scan([sample_log]))
+    scanned, followed, follower = follow_from_cut(sample_log, "type=EERR_R", cut)
+    # A record is reported once the next one has started, the last one stays open
+    assert scanned + followed == [hit for hit in expected if hit[2] < follower.files[sample_log].offset]
+
+
+@pytest.mark.parametrize("cut", [500000, 123457])
+def test_resume_summary_counts_reported_hits_once(sample_log, cut):
+    _, followed, follower = follow_from_cut(sample_log, "EERR", cut, summarize=True)
+
+    # Hits seen again after the resume point are taken back out, only the reported ones are counted
+    expected = HitSummary()
+    with LogReader(sample_log) as reader:
+        for _, _, offset in followed:
+            record = record_around(reader, offset)
+            expected.add(record_fields(record), record_code(record) or "")
+    assert followed
+    assert follower.summary.to_dict() == expected.to_dict()
+
+
+def test_rotation_starts_again_at_line_one(sample_log):
+    followed = []
+    follower = LogFollower("EERR", on_hits=lambda store: followed.extend(hit_list(store)))
+    follower.add(sample_log)
+
+    os.replace(sample_log, sample_log + ".1")
+    with open(sample_log, 'wb') as f:
+        f.write(b"2024.10.21 00:00:00 : ECP -> B_19 ( EERR   ) : new file\r\n")
+    follower.poll()
+    assert followed == [(sample_log, 1, 0)]
+
+
+def test_unreadable_file_is_retried(sample_log, monkeypatch):
+    with open(sample_log, 'rb') as f:
+        data = f.read()
+    with open(sample_log, 'wb') as f:
+        f.write(data[:1000])
+    follower = LogFollower("EERR", extract_codes=True, summarize=True)
+    follower.add(sample_log)
+    with open(sample_log + ".new", 'wb') as f:
+        f.write(data)
+    os.remove(sample_log)
+    assert follower.poll() == 0  # rotated away, the new file is not there yet
+    os.replace(sample_log + ".new", sample_log)
+    followed = []
+    follower.on_hits = lambda store: followed.extend(hit_list(store))
+    scan_segment = follower.scanner.scan_segment
+
+    def failing_scan(*args, **kwargs):
+        scan_segment(*args, **kwargs)
+        raise FileNotFoundError("rotated away")
+
+    # Hits passed on before the failure are not reported again, but counted once
+    monkeypatch.setattr(follower.scanner, "scan_segment", failing_scan)
+    first = follower.poll()
+    monkeypatch.undo()
+    follower.poll()
+    assert first and followed == hit_list(LogScanner("EERR").scan([sample_log]))[:len(followed)]
+    assert follower.files[sample_log].offset == data.rfind(b'\n') + 1
+
+    expected = HitSummary()
+    with LogReader(sample_log) as reader:
+        for _, _, offset in followed:
+            record = record_around(reader, offset)
+            expected.add(record_fields(record), record_code(record) or "")
+    assert follower.summary.to_dict() == expected.to_dict()
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+import log_index
+from conftest import hit_list
+from log_index import LogIndex
+from scan_engine import LogScanner
+
+SEARCHES = ["EALM", "15031", "alid; ELNK", "JGF06302-002", "ошибка", "EERR"]
+
+
+def indexed_search(path, search_text):
+    return hit_list(LogScanner(search_text, use_index=True).scan([path]))
+
+
+def full_search(path, search_text):
+    return hit_list(LogScanner(search_text).scan([path]))
+
+
+def touch_later(path):
+    """Move the mtime on, a rewrite within the same clock tick would not be noticed otherwise."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+@pytest.mark.parametrize("search_text", SEARCHES)
+def test_indexed_search_matches_full_scan(sample_log, search_text):
+    assert indexed_search(sample_log, search_text) == full_search(sample_log, search_text)
+
+
+def test_rare_terms_read_only_candidate_blocks(sample_log):
+    index = LogIndex.open(sample_log)
+    blocks = index.candidate_blocks(["ealm"])
+    assert blocks is not None and 0 < len(blocks) < len(index.block_offsets) / 10
+    assert index.candidate_blocks(["zzzz_not_there"]) == []
+
+
+def test_append_is_indexed_incrementally(sample_log):
+    indexed_search(sample_log, "EALM")
+    index = LogIndex.open(sample_log)
+    blocks_before = list(index.block_offsets)
+
+    with open(sample_log, 'ab') as f:
+        f.write(b" and more\r\n2024.10.21 00:00:00 : B_19 -> ECP ( EALM   ) : appended\r\n")
+    touch_later(sample_log)
+
+    assert indexed_search(sample_log, "EALM") == full_search(sample_log, "EALM")
+    index = LogIndex.open(sample_log)
+    assert list(index.block_offsets[:len(blocks_before) - 1]) == blocks_before[:-1]
+
+
+@pytest.mark.parametrize("grow", [False, True])
+def test_rewrite_in_place_rebuilds_the_index(sample_log, grow):
+    indexed_search(sample_log, "XXXX_R")
+    with open(sample_log, 'rb') as f:
+        data = f.read()
+    # Change one record near the end, the head of the file stays the same
+    position = data.rfind(b"EERR_R")
+    data = data[:position] + b"XXXX_R" + data[position + len(b"EERR_R"):]
+    with open(sample_log, 'wb') as f:
+        f.write(data + (b"\r\nappended line\r\n" if grow else b""))
+    touch_later(sample_log)
+
+    assert len(full_search(sample_log, "XXXX_R")) == 1
+    assert indexed_search(sample_log, "XXXX_R") == full_search(sample_log, "XXXX_R")
+
+
+def test_truncated_log_is_indexed_again(sample_log):
+    indexed_search(sample_log, "EALM")
+    with open(sample_log, 'rb') as f:
+        data = f.read()
+    with open(sample_log, 'wb') as f:
+        f.write(data[:len(data) // 2])
+    touch_later(sample_log)
+
+    assert indexed_search(sample_log, "EALM") == full_search(sample_log, "EALM")
+
+
+def test_searched_index_stays_loaded(sample_log, monkeypatch):
+    indexed_search(sample_log, "EALM")
+    index = LogIndex.open(sample_log)
+
+    def load(f):
+        raise AssertionError("index loaded again")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(log_index.pickle, "load", load)
+        assert LogIndex.open(sample_log) is index
+        assert indexed_search(sample_log, "15031") == full_search(sample_log, "15031")
+
+    # A new process loads the stored index
+    log_index._open_indexes.clear()
+    loaded = LogIndex.open(sample_log)
+    assert loaded is not index and loaded.postings.keys() == index.postings.keys()
@@ -0,0 +1,80 @@
+import gzip
+import os
+
+import pytest
+
+import log_reader
+from log_reader import INDEX_SUFFIX, LineIndex, known_line_index, line_index_for, open_log
+from scan_engine import LogScanner
+
+
+def file_lines(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data.endswith(b'\n'):
+        data = data[:-1]
+    return [line.rstrip(b'\r').decode('utf-8', errors='ignore') for line in data.split(b'\n')]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_read_context_returns_the_lines_around(generated_log, compress):
+    path = generated_log
+    if compress:
+        with open(generated_log, 'rb') as f, gzip.open(generated_log + ".gz", 'wb') as packed:
+            packed.write(f.read())
+        path = generated_log + ".gz"
+    lines = file_lines(generated_log)
+
+    with open_log(path) as reader:
+        index = reader.build_index()
+        assert len(index.lines) > 3
+        for line_num in [1, 3, 1000, index.lines[2], index.lines[2] - 1, len(lines) - 2]:
+            context = reader.read_context(line_num, before=5, after=5, index=index)
+            first = max(1, line_num - 5)
+            assert [(number, text.rstrip('\r\n')) for number, text in context] == \
+                list(enumerate(lines[first - 1:line_num + 5], first))
+
+
+def test_sidecar_index_is_loaded_while_the_log_is_unchanged(generated_log):
+    LogScanner("EALM", persist_index=True).scan([generated_log])
+    assert os.path.exists(generated_log + INDEX_SUFFIX)
+
+    log_reader._index_cache.clear()
+    index = known_line_index(generated_log)
+    with open_log(generated_log) as reader:
+        built = reader.build_index()
+    assert index is not None and (index.lines, index.offsets) == (built.lines, built.offsets)
+
+    with open(generated_log, 'ab') as f:
+        f.write(b"2024.10.21 00:00:00 : ECP -> B_19 ( EERR   ) : appended\r\n")
+    log_reader._index_cache.clear()
+    assert known_line_index(generated_log) is None
+    assert LineIndex.load(generated_log + INDEX_SUFFIX).size == built.size
+
+
+@pytest.mark.parametrize("from_sidecar", [False, True])
+def test_index_of_a_grown_log_is_extended(generated_log, from_sidecar, monkeypatch):
+    with open(generated_log, 'rb') as f:
+        data = f.read()
+    cut = data.index(b'\n', len(data) // 3) + 1
+    with open(generated_log, 'wb') as f:
+        f.write(data[:cut])
+    scanner = LogScanner("EALM", persist_index=from_sidecar)
+    scanner.scan([generated_log])
+    if from_sidecar:
+        log_reader._index_cache.clear()
+
+    with open(generated_log, 'ab') as f:
+        f.write(data[cut:])
+    # The scan's index still answers for the lines it covered
+    if not from_sidecar:
+        assert line_index_for(generated_log, scanned_size=scanner.scanned_sizes[generated_log]).size == cut
+
+    with monkeypatch.context() as patch:
+        patch.setattr(log_reader.LogReader, "build_index", None)  # only the appended data is read
+        index = line_index_for(generated_log)
+    with open_log(generated_log) as reader:
+        built = reader.build_index()
+    assert (index.size, index.mtime) == (built.size, built.mtime)
+    assert (index.lines, index.offsets) == (built.lines, built.offsets)
+    assert known_line_index(generated_log) is index
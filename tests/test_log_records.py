@@ -0,0 +1,81 @@
+import gzip
+
+import pytest
+
+from log_reader import LogReader, open_log
+from log_records import HEADER_RE, RecordParser, TimeRange, find_time_range, iter_records
+
+
+def parse_whole(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    parser = RecordParser(path)
+    return parser.feed(0, data) + parser.close()
+
+
+def record_keys(records):
+    return [(record.offset, record.line, record.timestamp, record.msg_type, record.raw) for record in records]
+
+
+@pytest.mark.parametrize("chunk_size", [512, 4096, 100 * 1000])
+def test_parser_is_independent_of_chunks(sample_log, chunk_size):
+    with LogReader(sample_log) as reader:
+        chunked = list(iter_records(reader, chunk_size=chunk_size))
+    assert record_keys(chunked) == record_keys(parse_whole(sample_log))
+
+
+def test_records_start_at_headers(sample_log):
+    with open(sample_log, 'rb') as f:
+        data = f.read()
+    records = parse_whole(sample_log)
+    assert [record.offset for record in records] == [match.start() for match in HEADER_RE.finditer(data)]
+    for record in records:
+        assert record.line == data.count(b'\n', 0, record.offset) + 1
+        assert data[record.offset:].startswith(record.raw)
+
+
+def test_record_fields(sample_log):
+    record = parse_whole(sample_log)[0]
+    assert record.channel == "ECP -> B_19"
+    assert record.msg_type == "EERR"
+    assert record.transaction == "6461"
+    assert record.length == 69
+    assert record.body == {"EERR": {"EQPID": "UCJIGF0603", "CEID": "651"}}
+    assert record.ceid == "651"
+
+
+def test_time_range_parse():
+    assert TimeRange.parse("", " ") is None
+    time_range = TimeRange.parse("02:00", "2024.10.20 02:15")
+    assert time_range.bounds(b"2024.10.20 00:00:57") == (b"2024.10.20 02:00:00", b"2024.10.20 02:15:59")
+    assert TimeRange.parse(None, "3:05:30").bounds(b"2024.10.21 23:00:00") == (None, b"2024.10.21 03:05:30")
+
+
+@pytest.mark.parametrize("start_text, end_text", [("02:15", "02:00"), ("24:00", ""), ("2:5", ""),
+                                                  ("2024.13.01 00:00", "")])
+def test_time_range_rejects_bad_bounds(start_text, end_text):
+    with pytest.raises(ValueError):
+        TimeRange.parse(start_text, end_text)
+
+
+@pytest.mark.parametrize("start_text, end_text", [("00:30", "01:10"), ("", "00:20:30"), ("01:00", ""),
+                                                  ("23:00", ""), ("", "")])
+def test_find_time_range_selects_the_window(generated_log, start_text, end_text):
+    time_range = TimeRange.parse(start_text, end_text) or TimeRange()
+    with LogReader(generated_log) as reader:
+        records = list(iter_records(reader))
+        start, end = find_time_range(reader, time_range)
+    start_bound, end_bound = time_range.bounds(records[0].timestamp.encode('ascii'))
+
+    inside = [record.offset for record in records
+              if (start_bound is None or record.timestamp.encode('ascii') >= start_bound)
+              and (end_bound is None or record.timestamp.encode('ascii') <= end_bound)]
+    assert [record.offset for record in records if start <= record.offset < end] == inside
+
+    # A compressed log is walked instead of bisected, with the same window
+    with open(generated_log, 'rb') as f, gzip.open(generated_log + ".gz", 'wb') as packed:
+        packed.write(f.read())
+    with open_log(generated_log + ".gz") as reader:
+        packed_start, packed_end = find_time_range(reader, time_range)
+    assert packed_start == start
+    assert (packed_end if packed_end is not None else end) == end
@@ -0,0 +1,47 @@
+import pytest
+
+from log_reader import LogReader
+from log_records import record_around, record_code
+from log_summary import HitSummary, record_fields, summary_text
+from scan_engine import LogScanner
+
+
+def counted_from_hits(store, path):
+    """Summary of the hits of a store, each counted from its whole record."""
+    summary = HitSummary()
+    with LogReader(path) as reader:
+        for row in range(len(store)):
+            record = record_around(reader, store.offset(row))
+            summary.add(record_fields(record), record_code(record) or "")
+    return summary
+
+
+@pytest.mark.parametrize("search_text", ["EERR", "ALID; CEID", "type=EALM"])
+@pytest.mark.parametrize("workers, segment_size", [(1, 64 * 1024 * 1024), (3, 200 * 1000)])
+def test_summary_counts_every_hit(sample_log, search_text, workers, segment_size):
+    scanner = LogScanner(search_text, workers=workers, segment_size=segment_size, extract_codes=True,
+                         summarize=True)
+    store = scanner.scan([sample_log])
+    assert len(store) and scanner.summary.total == len(store)
+    assert scanner.summary.to_dict() == counted_from_hits(store, sample_log).to_dict()
+
+
+def test_remove_takes_back_a_hit():
+    summary = HitSummary()
+    fields = ("2024.10.20 00:00:57", "ECP -> B_19", "EERR", "UCJIGF0603")
+    summary.add(fields, "651")
+    summary.add(fields, "651")
+    summary.remove(fields, "651")
+    assert summary.to_dict() == {"total": 1, "codes": {"651": 1}, "eqpids": {"UCJIGF0603": 1},
+                                 "msg_types": {"EERR": 1}, "channels": {"ECP -> B_19": 1},
+                                 "minutes": {"2024.10.20 00:00": 1}, "hours": {"2024.10.20 00": 1}}
+    summary.remove(fields, "651")
+    assert summary.total == 0 and not summary.codes and not summary.minutes
+
+
+def test_summary_text_lists_the_groups(sample_log):
+    scanner = LogScanner("EALM", extract_codes=True, summarize=True)
+    scanner.scan([sample_log])
+    text = summary_text(scanner.summary)
+    assert text.startswith(f"Hits: {scanner.summary.total}")
+    assert "Top codes" in text and "Per hour" in text
@@ -0,0 +1,137 @@
+import os
+import random
+
+import pytest
+
+import mapping_table
+from mapping_table import MappingHistory, MappingTable, edit_distance, load_latest
+from scan_engine import LogScanner
+
+
+def table_rows(codes):
+    return [{"Err Code": code, "Cause": f"Sensor {name} failure", "Action": f"Check {name}"}
+            for code, name in codes]
+
+
+@pytest.fixture(scope="module")
+def numeric_table():
+    """A table of a few hundred numeric codes, 1 to 6 digits like the real ones."""
+    rnd = random.Random(5)
+    codes = set()
+    while len(codes) < 400:
+        codes.add(str(rnd.randint(1, 10 ** rnd.randint(1, 6))))
+    return MappingTable(table_rows((code, f"unit{i}") for i, code in enumerate(sorted(codes))))
+
+
+def write_workbook(path, rows):
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Sample"
+    sheet.append(["Err Code", "Cause", "Action"])
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def typos(code):
+    """(kind, mistyped code) for every swap, substitution, drop and insertion of one character."""
+    for i in range(len(code)):
+        if i + 1 < len(code) and code[i] != code[i + 1]:
+            yield "swap", code[:i] + code[i + 1] + code[i] + code[i + 2:]
+        yield "substitute", code[:i] + str((int(code[i]) + 3) % 10) + code[i + 1:]
+        yield "drop", code[:i] + code[i + 1:]
+        yield "insert", code[:i] + "7" + code[i:]
+
+
+def test_prefix_matches_come_first():
+    table = MappingTable(table_rows([("15031", "a"), ("1503", "b"), ("651", "c"), ("E100", "d")]))
+    assert table.complete("150") == ["1503", "15031"]
+    assert table.search("e1") == ["E100"]
+    assert table.search("1503")[:2] == ["1503", "15031"]
+
+
+def test_cause_words_find_their_codes():
+    table = MappingTable(table_rows([("15031", "pressure"), ("651", "temperature"), ("652", "vacuum")]))
+    assert table.search("temperture")[0] == "651"
+    assert table.search("sensor vacum")[0] == "652"
+
+
+@pytest.mark.parametrize("kind", ["swap", "substitute", "drop", "insert"])
+def test_mistyped_codes_are_found(numeric_table, kind):
+    codes = set(numeric_table.by_code)
+    # Two digits left after a typo can stand for too many codes to list them all
+    queries = [(code, query) for code in sorted(codes) if len(code) >= 3
+               for typo, query in typos(code) if typo == kind and query not in codes and len(query) >= 3]
+    missed = [(code, query) for code, query in queries if code not in numeric_table.search(query)]
+    assert queries and len(missed) <= len(queries) // 100, missed
+
+
+def test_short_codes_allow_one_typo():
+    table = MappingTable(table_rows([("83", "a"), ("878", "b"), ("387", "c"), ("1234", "d")]))
+    assert table.search("38") == ["387", "83"]
+    assert table.search("877")[0] == "878"
+    assert table.search("2134") == ["1234"]
+    assert "1234" not in table.search("2143")  # two typos in a short code
+
+
+def test_edit_distance_counts_a_swap_once():
+    assert edit_distance("15031", "15031", 2) == 0
+    assert edit_distance("15031", "15301", 2) == 1
+    assert edit_distance("15031", "1531", 2) == 1
+    assert edit_distance("15031", "51301", 2) == 2
+    assert edit_distance("15031", "99999", 2) == 3
+
+
+def test_cached_table_is_reused_until_the_workbook_changes(tmp_path, monkeypatch):
+    path = str(tmp_path / "mapping_table7.xlsx")
+    write_workbook(path, [("651", "Vacuum low", "Check pump")])
+    table = load_latest(str(tmp_path))
+    assert (table.version, table.lookup("651")) == (7, ("Vacuum low", ("Check pump",)))
+
+    def read_rows(file_path):
+        raise AssertionError("workbook parsed again")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(mapping_table, "read_rows", read_rows)
+        assert load_latest(str(tmp_path)).lookup("651") == ("Vacuum low", ("Check pump",))
+
+    write_workbook(path, [("651", "Vacuum low", "Check pump"), ("652", "Vacuum high", "Check valve")])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert load_latest(str(tmp_path)).lookup("652") == ("Vacuum high", ("Check valve",))
+
+
+def test_rows_without_code_only_add_actions(sample_log):
+    table = MappingTable([{"Err Code": "651", "Cause": "Vacuum low", "Action": "Check pump"},
+                          {"Err Code": "", "Cause": "Vacuum low", "Action": "Call service"},
+                          {"Err Code": "", "Cause": "Unrelated", "Action": "Reboot"}])
+    assert table.lookup("651") == ("Vacuum low", ("Call service", "Check pump"))
+    assert table.lookup("") is None and "" not in table.by_code
+    assert "" not in table.search("Unrelated")
+
+    # Hits without an error code are not joined with those rows
+    store = LogScanner("EERR", extract_codes=True).scan([sample_log])
+    assert "" in store.code_names
+    assert "" not in table.lookup_many(store.code_names)
+
+
+def test_history_answers_from_the_current_version():
+    history = MappingHistory(limit=2)
+    old = MappingTable(table_rows([("651", "old"), ("652", "dropped")]), version=2)
+    new = MappingTable(table_rows([("651", "new"), ("653", "added")]), version=3)
+    history.add(new)
+    history.add(old)  # loaded later, still older
+    assert history.versions == [3, 2]
+
+    assert history.lookup("651") == ("Sensor new failure", ("Check new",), 3)
+    assert history.lookup("652") is None
+    assert set(history.lookup_many(["651", "652", "653"])) == {"651", "653"}
+    assert history.lookup_removed("652") == ("Sensor dropped failure", ("Check dropped",), 2)
+    assert history.lookup_removed("651") is None
+    assert "652" not in history.search("652")
+
+    history.add(MappingTable(table_rows([("651", "newest")]), version=4))
+    assert history.versions == [4, 3]
+    assert history.lookup_removed("652") is None  # its version is no longer kept
@@ -0,0 +1,38 @@
+import gzip
+
+import pytest
+
+import scan_cli
+
+
+def corrupt_gzip(source, path):
+    with open(source, 'rb') as f:
+        packed = gzip.compress(f.read())
+    with open(path, 'wb') as f:
+        f.write(packed[:len(packed) // 2] + bytes(1000) + packed[len(packed) // 2 + 1000:])
+    return path
+
+
+@pytest.mark.parametrize("terms, status", [("EERR", 0), ("no such text", 1)])
+def test_exit_status_tells_whether_something_was_found(sample_log, capsys, terms, status):
+    assert scan_cli.main(["-w", "1", "-t", terms, sample_log]) == status
+    out, err = capsys.readouterr()
+    assert out.startswith("file,line,text")
+    assert "[ERROR]" not in err
+
+
+def test_corrupt_archive_is_an_error(sample_log, tmp_path, capsys):
+    corrupt = corrupt_gzip(sample_log, str(tmp_path / "corrupt.log.gz"))
+    # The other files are still scanned and their hits written
+    assert scan_cli.main(["-w", "1", "-t", "EERR", corrupt, sample_log]) == 2
+    out, err = capsys.readouterr()
+    assert {line.split(",", 1)[0] for line in out.splitlines()[1:]} == {"sample.log"}
+    assert f"[ERROR] Skipped {corrupt}" in err
+
+    assert scan_cli.main(["--correlate", corrupt]) == 2
+    assert "[ERROR]" in capsys.readouterr().err
+
+
+def test_missing_files_are_an_error(tmp_path, capsys):
+    assert scan_cli.main(["-w", "1", "-t", "EERR", str(tmp_path / "*.log")]) == 2
+    assert "[ERROR] No log files matched." in capsys.readouterr().err
@@ -0,0 +1,131 @@
+import gzip
+import re
+
+import pytest
+
+from conftest import hit_list
+from log_records import TimeRange, record_around
+from log_reader import LogReader
+from scan_engine import LogScanner
+
+SEARCHES = ["EERR", "ealm; 15031", "TEMP_JIG_37, alid", "ошибка", "eerr; EERR_R"]
+
+# (chunk_size, workers, segment_size): one chunk, many small chunks, parallel segments
+SCAN_SETTINGS = [(1024 * 1024, 1, 64 * 1024 * 1024), (4096, 1, 64 * 1024 * 1024), (65536, 2, 256 * 1024),
+                 (4096, 3, 100 * 1000)]
+
+
+def baseline_search(path, search_text):
+    """(line, text) of the matching lines, the way the first version of the app searched line by line."""
+    search_input = search_text.strip().lower()
+    if ',' in search_input or ';' in search_input:
+        terms = [term.strip() for term in re.split(r'[;,]', search_input)]
+    else:
+        terms = [search_input]
+
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return [(line_num, line.strip()) for line_num, line in enumerate(f.readlines(), 1)
+                if any(term in line.lower() for term in terms)]
+
+
+def scanned_lines(store):
+    return [(store.line(row), store.text(row)) for row in range(len(store))]
+
+
+@pytest.mark.parametrize("search_text", SEARCHES)
+@pytest.mark.parametrize("chunk_size, workers, segment_size", SCAN_SETTINGS)
+def test_scan_matches_baseline(sample_log, search_text, chunk_size, workers, segment_size):
+    scanner = LogScanner(search_text, chunk_size=chunk_size, workers=workers, segment_size=segment_size)
+    assert scanned_lines(scanner.scan([sample_log])) == baseline_search(sample_log, search_text)
+
+
+@pytest.mark.parametrize("chunk_size, workers, segment_size", SCAN_SETTINGS)
+def test_streamed_hits_match_returned_hits(sample_log, chunk_size, workers, segment_size):
+    expected = hit_list(LogScanner("eerr").scan([sample_log]))
+    streamed = []
+    scanner = LogScanner("eerr", chunk_size=chunk_size, workers=workers, segment_size=segment_size)
+    scanner.scan([sample_log], on_hits=lambda hits: streamed.extend(hit_list(hits)))
+    assert streamed == expected
+
+
+def test_scan_several_files(sample_log, generated_log):
+    store = LogScanner("EALM", workers=2, segment_size=200 * 1000).scan([sample_log, generated_log])
+    expected = [(path, line) for path in (sample_log, generated_log) for line, _ in baseline_search(path, "EALM")]
+    assert [(path, line) for path, line, _ in hit_list(store)] == expected
+
+
+def test_compressed_log_matches_plain(sample_log):
+    with open(sample_log, 'rb') as f, gzip.open(sample_log + ".gz", 'wb') as packed:
+        packed.write(f.read())
+    plain = LogScanner("EERR_R").scan([sample_log])
+    compressed = LogScanner("EERR_R", chunk_size=4096).scan([sample_log + ".gz"])
+    assert [hit[1:] for hit in hit_list(compressed)] == [hit[1:] for hit in hit_list(plain)]
+
+
+def test_longest_term_is_reported(sample_log):
+    store = LogScanner("eerr; eerr_r", report_terms=True).scan([sample_log])
+    for row in range(len(store)):
+        expected = "eerr_r" if "eerr_r" in store.text(row).lower() else "eerr"
+        assert store.term(row) == expected
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_time_range_scan_keeps_absolute_lines(generated_log, compress, workers):
+    path = generated_log
+    if compress:
+        with open(generated_log, 'rb') as f, gzip.open(generated_log + ".gz", 'wb') as packed:
+            packed.write(f.read())
+        path = generated_log + ".gz"
+    time_range = TimeRange.parse("00:30", "01:10")
+    start_bound, end_bound = time_range.bounds(b"2024.10.20 00:00:00")
+
+    full = LogScanner("EALM; EERR_R").scan([path])
+    with LogReader(generated_log) as reader:
+        expected = [hit[1:] for hit in hit_list(full)
+                    if start_bound <= record_around(reader, hit[2])[:19] <= end_bound]
+
+    progress = []
+    scanner = LogScanner("EALM; EERR_R", workers=workers, segment_size=64 * 1024, time_range=time_range)
+    store = scanner.scan([path], on_progress=lambda done, total: progress.append((done, total)))
+    assert expected
+    assert [hit[1:] for hit in hit_list(store)] == expected
+
+    done = [value for value, _ in progress]
+    assert done == sorted(done) and done[0] >= 0
+    assert progress[-1][0] == progress[-1][1]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("use_index", [False, True])
+def test_unreadable_files_are_skipped(sample_log, tmp_path, workers, use_index):
+    with open(sample_log, 'rb') as f:
+        packed = gzip.compress(f.read())
+    corrupt = str(tmp_path / "corrupt.log.gz")
+    with open(corrupt, 'wb') as f:
+        f.write(packed[:len(packed) // 2] + bytes(1000) + packed[len(packed) // 2 + 1000:])
+    missing = str(tmp_path / "missing.log")
+
+    scanner = LogScanner("EALM", workers=workers, segment_size=256 * 1024, use_index=use_index)
+    store = scanner.scan([missing, corrupt, sample_log])
+    assert [hit for hit in hit_list(store) if hit[0] == sample_log] == hit_list(LogScanner("EALM").scan([sample_log]))
+    assert [path for path, _ in scanner.errors] == [missing, corrupt]
+
+
+def test_hit_text_is_read_back_from_the_file(sample_log):
+    store = LogScanner("EERR").scan([sample_log])
+    expected = [text for _, text in baseline_search(sample_log, "EERR")]
+    assert [store.text(row) for row in range(len(store))] == expected
+
+    # Closing releases the files, text is still there afterwards
+    store.close()
+    assert not store._readers
+    assert store.text(0) == expected[0]
+
+    # Lines appended after the file was opened (following) are read too
+    with open(sample_log, 'ab') as f:
+        offset = f.tell()
+        f.write(b"\r\n2024.10.21 00:00:00 : ECP -> B_19 ( EERR   ) : appended\r\n")
+    store.append(sample_log, 99999, offset + 2)
+    assert store.text(len(store) - 1) == "2024.10.21 00:00:00 : ECP -> B_19 ( EERR   ) : appended"
+    store.close()